@@ -1,64 +1,393 @@
-import requests
+import json
+import os
+import re
+import threading
 import feedparser
-from tkinter import messagebox
-import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+import Http
+import Indice
+import Metricas
+from Registros import Articulo
+from Render import Bloque, mostrar_bloques
+from Utils import ruta_datos
 
-def scrapear_arxiv(query):
+# URL de la API de arXiv y límites de uso que exige su documentación. El retardo de 3 segundos entre
+# peticiones lo aplica el planificador de Http (Planificador.LIMITES)
+URL_ARXIV = "http://export.arxiv.org/api/query"
+TAMANO_PAGINA_ARXIV = 100
+MAX_TAMANO_PAGINA_ARXIV = 2000
+_TOTAL_ARXIV = re.compile(rb'<opensearch:totalResults[^>]*>(\d+)<')
+_ENTRADA_ARXIV = re.compile(rb'<entry[\s>]')
+
+# Interfaz OAI-PMH de arXiv, para descargas masivas por categoría o por fechas, y formato de metadatos pedido
+URL_OAI_ARXIV = "https://oaipmh.arxiv.org/oai"
+FORMATO_OAI_ARXIV = 'arXiv'
+_NS_OAI = '{http://www.openarchives.org/OAI/2.0/}'
+_NS_ARXIV = '{http://arxiv.org/OAI/arXiv/}'
+# Fichero del directorio de datos con el resumptionToken de cada descarga OAI-PMH sin terminar
+FICHERO_PUNTOS_OAI = 'oai_arxiv.json'
+_candado_oai = threading.Lock()
+
+class ErrorOAI(ValueError):
+    '''
+    Error devuelto por el servidor OAI-PMH (elemento <error>), con su código en el atributo codigo.
+    '''
+
+    def __init__(self, codigo, mensaje):
+        super().__init__(f"Error de OAI-PMH ({codigo}): {mensaje}")
+        self.codigo = codigo
+
+class PaginaVaciaArxiv(RuntimeError):
+    '''
+    Una página de resultados de arXiv sigue llegando vacía después de los reintentos sin haber llegado al total.
+    '''
+
+    def __init__(self, query, inicio, total):
+        super().__init__(f"La página de arXiv que empieza en {inicio} de {total} resultados de '{query}' llega vacía")
+        self.inicio = inicio
+
+def _entrada_a_resultado(entry):
+    '''
+    Convierte una entrada del feed de arXiv en el registro de resultado.
+    :param entry: feedparser.FeedParserDict - Entrada del feed devuelto por la API.
+    :return: Articulo - Registro con los datos del artículo. Los campos que no vienen en la entrada valen None.
+    '''
+    return Articulo(
+        titulo=entry.title,
+        resumen=entry.summary,
+        link=entry.link,
+        autores=', '.join(author.name for author in entry.authors) if 'authors' in entry else None,
+        fecha_publicacion=entry.get('published'),
+        categorias=', '.join(tag.term for tag in entry.tags) if 'tags' in entry else None,
+        comentarios=entry.get('arxiv_comment'),
+        referencia_journal=entry.get('arxiv_journal_ref'),
+    )
+
+def _pagina_con_entradas(respuesta):
+    # arXiv devuelve a veces páginas vacías de forma transitoria: solo se guardan en la caché las que traen artículos
+    return _ENTRADA_ARXIV.search(respuesta.content) is not None
+
+def _pedir_pagina_arxiv(query, inicio, cantidad, desde=None, cache=True):
+    '''
+    Pide una página de resultados a la API de arXiv.
+    :param query: str - La consulta de búsqueda.
+    :param inicio: int - Posición del primer resultado de la página.
+    :param cantidad: int - Número de resultados de la página.
+    :param desde: str - Si se indica, solo se buscan los artículos enviados desde esa fecha (AAAAMMDDHHMM, en
+                        UTC), del más reciente al más antiguo.
+    :param cache: bool - Si es False la página se pide a la red aunque esté en la caché, como en los reintentos.
+    :return: feedparser.FeedParserDict - El feed de la página analizado.
+    '''
+    parametros = {'search_query': f"all:{query}", 'start': inicio, 'max_results': cantidad}
+    if desde:
+        parametros['search_query'] += f" AND submittedDate:[{desde} TO 999912312359]"
+        parametros.update(sortBy='submittedDate', sortOrder='descending')
+    # Las búsquedas por fecha de envío cambian en cuanto se publican artículos nuevos, no se guardan en caché
+    respuesta = Http.obtener(URL_ARXIV, params=parametros, timeout=(Http.TIMEOUT_CONEXION, 60), cache=cache and not desde,
+                             guardar=_pagina_con_entradas)
+    respuesta.raise_for_status()
+    return feedparser.parse(respuesta.content)
+
+def extraer_arxiv(contenido):
+    '''
+    Analiza una página de resultados de la API de arXiv.
+    :param contenido: bytes - Respuesta de la API en Atom.
+    :return: list - Un registro Articulo por cada entrada del feed.
+    '''
+    return [_entrada_a_resultado(entry) for entry in feedparser.parse(contenido).entries]
+
+def descargar_paginas_arxiv(query, max_resultados=None, tamano_pagina=TAMANO_PAGINA_ARXIV):
+    '''
+    Descarga una a una las páginas de resultados de una consulta sin analizarlas, para separar la descarga
+    del análisis (Tuberia). El total de resultados se lee de la primera página sin parsear el feed.
+    :param query: str - La consulta de búsqueda.
+    :param max_resultados: int - Número máximo de artículos. Si es None se pide una única página con el tamaño por defecto de la API.
+    :param tamano_pagina: int - Resultados por petición (como máximo 2000).
+    :return: generator - Genera el contenido de cada página en bytes.
+    '''
+    if max_resultados is None:
+        respuesta = Http.obtener(URL_ARXIV, params={'search_query': f"all:{query}", 'start': 0},
+                                 timeout=(Http.TIMEOUT_CONEXION, 60), guardar=_pagina_con_entradas)
+        respuesta.raise_for_status()
+        yield respuesta.content
+        return
+    tamano_pagina = max(1, min(tamano_pagina, MAX_TAMANO_PAGINA_ARXIV, max_resultados))
+    inicio = 0
+    total = max_resultados
+    while inicio < total:
+        parametros = {'search_query': f"all:{query}", 'start': inicio, 'max_results': min(tamano_pagina, total - inicio)}
+        respuesta = Http.obtener(URL_ARXIV, params=parametros, timeout=(Http.TIMEOUT_CONEXION, 60), guardar=_pagina_con_entradas)
+        respuesta.raise_for_status()
+        if not inicio:
+            encontrado = _TOTAL_ARXIV.search(respuesta.content)
+            total = min(int(encontrado.group(1)) if encontrado else 0, max_resultados)
+        yield respuesta.content
+        inicio += tamano_pagina
+
+@Metricas.medido()
+def scrapear_arxiv(query, max_resultados=None):
     '''
     Busca artículos en arXiv utilizando una consulta y devuelve una lista de resultados.
     :param query: str - La consulta de búsqueda para encontrar artículos en arXiv.
-    :return: list - Una lista de diccionarios, cada uno representando un artículo con su título, resumen y enlace.
-    '''
-    # URL para la API de arXiv.
-    url_arxiv = "http://export.arxiv.org/api/query?"
-    #URL para hacer la busqueda
-    url_busqueda = f"{url_arxiv}search_query=all:{query}&start=0"
-    # Realiza una solicitud HTTP a la URL de búsqueda y analiza la respuesta con feedparser
-    respuesta = requests.get(url_busqueda)
-    feed = feedparser.parse(respuesta.content)
-    # Inicializa una lista para almacenar los resultados de búsqueda.
+    :param max_resultados: int - Número máximo de resultados. Si es None se pide una única página con el tamaño por defecto de la API.
+    :return: list - Una lista de registros Articulo, con el título, resumen y enlace de cada artículo.
+    '''
+    if max_resultados is not None:
+        return list(harvestear_arxiv(query, max_resultados))
+
+    # Pide la primera página de la búsqueda y guarda sus artículos en el índice local
+    return Indice.indexar('arxiv', extraer_arxiv(next(descargar_paginas_arxiv(query))), query)
+
+@Metricas.medido()
+def harvestear_arxiv(query, max_resultados=1000, tamano_pagina=TAMANO_PAGINA_ARXIV, concurrencia=3, reintentos=2, desde=None):
+    '''
+    Recorre los resultados de una consulta en arXiv página a página usando start/max_results.
+    Las páginas se piden en paralelo con una concurrencia acotada y el planificador de Http espacia las
+    peticiones con el retardo que exige arXiv. Los artículos se devuelven según va terminando cada
+    página, por lo que solo se mantienen en memoria las páginas en vuelo.
+    :param query: str - La consulta de búsqueda.
+    :param max_resultados: int - Número máximo de artículos a recorrer.
+    :param tamano_pagina: int - Resultados por petición (como máximo 2000).
+    :param concurrencia: int - Número máximo de páginas pedidas a la vez.
+    :param reintentos: int - Reintentos, sin pasar por la caché, de una página que llega vacía sin haber llegado
+                             al total. La primera página también se reintenta si llega vacía con un total de 0.
+    :param desde: str - Fecha de envío mínima (AAAAMMDDHHMM, en UTC). Si se indica, los artículos se recorren
+                        del enviado más recientemente al más antiguo.
+    :return: generator - Genera registros Articulo, como scrapear_arxiv.
+    :raises PaginaVaciaArxiv: Si una página sigue vacía después de los reintentos.
+    '''
+    tamano_pagina = max(1, min(tamano_pagina, MAX_TAMANO_PAGINA_ARXIV, max_resultados))
+
+    def pedir(inicio, reintento=False):
+        return _pedir_pagina_arxiv(query, inicio, min(tamano_pagina, max_resultados - inicio), desde, cache=not reintento)
+    # Las páginas pedidas desde el pool cuelgan en las métricas del tramo de esta llamada
+    pedir_en_pool = Metricas.propagar(pedir)
+
+    # La primera página indica cuántos resultados hay en total. arXiv devuelve a veces páginas vacías de forma
+    # transitoria, también con un total de 0; si sigue vacía tras los reintentos la consulta no tiene resultados
+    feed = pedir(0)
+    for _ in range(reintentos):
+        if feed.entries:
+            break
+        feed = pedir(0, reintento=True)
+    total = min(int(feed.feed.get('opensearch_totalresults', 0) or 0), max_resultados)
+    yield from Indice.indexar('arxiv', [_entrada_a_resultado(entry) for entry in feed.entries], query)
+    if total <= tamano_pagina:
+        return
+
+    pendientes = iter(range(tamano_pagina, total, tamano_pagina))
+    intentos = {}
+    ejecutor = ThreadPoolExecutor(max_workers=max(1, concurrencia))
+    en_vuelo = {}
+    try:
+        for inicio in pendientes:
+            en_vuelo[ejecutor.submit(pedir_en_pool, inicio)] = inicio
+            if len(en_vuelo) >= concurrencia:
+                break
+        while en_vuelo:
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                inicio = en_vuelo.pop(futuro)
+                feed = futuro.result()
+                # arXiv devuelve a veces páginas vacías de forma transitoria: se vuelven a pedir a la red
+                if not feed.entries:
+                    if intentos.get(inicio, 0) >= reintentos:
+                        raise PaginaVaciaArxiv(query, inicio, total)
+                    intentos[inicio] = intentos.get(inicio, 0) + 1
+                    en_vuelo[ejecutor.submit(pedir_en_pool, inicio, True)] = inicio
+                    continue
+                yield from Indice.indexar('arxiv', [_entrada_a_resultado(entry) for entry in feed.entries], query)
+                siguiente = next(pendientes, None)
+                if siguiente is not None:
+                    en_vuelo[ejecutor.submit(pedir_en_pool, siguiente)] = siguiente
+    finally:
+        ejecutor.shutdown(wait=False, cancel_futures=True)
+
+def _texto_oai(metadatos, etiqueta):
+    # Texto de un campo de metadatos con los saltos de línea y espacios repetidos normalizados
+    texto = metadatos.findtext(f"{_NS_ARXIV}{etiqueta}")
+    return ' '.join(texto.split()) or None if texto else None
+
+def _registro_oai_a_resultado(metadatos):
+    '''
+    Convierte los metadatos de un registro OAI-PMH en formato arXiv en el registro de resultado. La fecha de
+    envío (created) solo trae el día, así que se da en el formato de la API con la hora a 00:00:00Z. El
+    formato arXiv no indica la versión del artículo, por lo que el link no lleva el sufijo vN de la API y
+    lleva siempre a la última versión (Indice y Deduplicar ya ignoran ese sufijo al identificar artículos).
+    :param metadatos: xml.etree.ElementTree.Element - Elemento arXiv del registro.
+    :return: Articulo - Registro con los mismos campos que devuelve scrapear_arxiv, más el DOI si lo tiene.
+    '''
+    autores = []
+    for autor in metadatos.iterfind(f"{_NS_ARXIV}authors/{_NS_ARXIV}author"):
+        partes = (autor.findtext(f"{_NS_ARXIV}forenames"), autor.findtext(f"{_NS_ARXIV}keyname"), autor.findtext(f"{_NS_ARXIV}suffix"))
+        autores.append(' '.join(parte.strip() for parte in partes if parte and parte.strip()))
+    categorias = metadatos.findtext(f"{_NS_ARXIV}categories")
+    resumen = metadatos.findtext(f"{_NS_ARXIV}abstract")
+    creado = _texto_oai(metadatos, 'created')
+    return Articulo(
+        titulo=_texto_oai(metadatos, 'title'),
+        resumen=resumen.strip() or None if resumen else None,
+        link=f"http://arxiv.org/abs/{metadatos.findtext(f'{_NS_ARXIV}id', '').strip()}",
+        autores=', '.join(filter(None, autores)) or None,
+        fecha_publicacion=f"{creado}T00:00:00Z" if creado and 'T' not in creado else creado,
+        categorias=', '.join(categorias.split()) or None if categorias else None,
+        comentarios=_texto_oai(metadatos, 'comments'),
+        referencia_journal=_texto_oai(metadatos, 'journal-ref'),
+        doi=_texto_oai(metadatos, 'doi'),
+    )
+
+def parsear_pagina_oai(contenido):
+    '''
+    Analiza de forma incremental una respuesta de ListRecords, liberando cada registro después de convertirlo.
+    :param contenido: bytes - XML de la respuesta.
+    :return: tuple - Lista de registros Articulo (sin los borrados), resumptionToken de la página siguiente
+                     (None si es la última) y número total de registros de la lista si el servidor lo indica.
+    '''
     resultados = []
-    # Itera sobre cada entrada en el feed creando un diccionario para almacenar información del artículo.
-    for entry in feed.entries:
-        autores = ', '.join(author.name for author in entry.authors) if 'authors' in entry else 'No hay autores disponibles'
-        fecha_publicacion = entry.published if 'published' in entry else 'No hay fecha de publicación disponible'
-        categorias = ', '.join(tag.term for tag in entry.tags) if 'tags' in entry else 'No hay categorías disponibles'
-        comentarios = entry.arxiv_comment if 'arxiv_comment' in entry else 'No hay comentarios disponibles'
-        referencia_journal = entry.arxiv_journal_ref if 'arxiv_journal_ref' in entry else 'No hay referencia a journal disponible'
-        resultado = {
-            'titulo': entry.title,
-            'resumen': entry.summary,
-            'link': entry.link,
-            'autores': autores,
-            'fecha_publicacion': fecha_publicacion,
-            'categorias': categorias,
-            'comentarios': comentarios,
-            'referencia_journal': referencia_journal
-        }
-        resultados.append(resultado)
-    return resultados
-
-def mostrar_arxiv(query_arxiv,widget_arxiv,insertar_link):
+    token = None
+    total = None
+    for _, elemento in iterparse(BytesIO(contenido), events=('end',)):
+        if elemento.tag == f"{_NS_OAI}record":
+            # Los registros borrados solo traen la cabecera, con status="deleted"
+            cabecera = elemento.find(f"{_NS_OAI}header")
+            metadatos = elemento.find(f"{_NS_OAI}metadata/{_NS_ARXIV}arXiv")
+            if metadatos is not None and (cabecera is None or cabecera.get('status') != 'deleted'):
+                resultados.append(_registro_oai_a_resultado(metadatos))
+            elemento.clear()
+        elif elemento.tag == f"{_NS_OAI}resumptionToken":
+            token = (elemento.text or '').strip() or None
+            total = int(elemento.get('completeListSize')) if (elemento.get('completeListSize') or '').isdigit() else None
+        elif elemento.tag == f"{_NS_OAI}error":
+            codigo = elemento.get('code', '')
+            # Una lista vacía se indica con un error
+            if codigo == 'noRecordsMatch':
+                return [], None, 0
+            raise ErrorOAI(codigo, (elemento.text or '').strip())
+    return resultados, token, total
+
+def _clave_oai(desde, hasta, conjunto):
+    return f"{conjunto or ''}|{desde or ''}|{hasta or ''}"
+
+def _leer_puntos_oai():
+    ruta = ruta_datos(FICHERO_PUNTOS_OAI)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as fichero:
+        return json.load(fichero)
+
+def _guardar_punto_oai(clave, punto):
+    # Guarda (o borra, con punto None) el punto de reanudación de una descarga, con escritura atómica
+    with _candado_oai:
+        puntos = _leer_puntos_oai()
+        if punto is None:
+            if clave not in puntos:
+                return
+            del puntos[clave]
+        else:
+            puntos[clave] = punto
+        ruta = ruta_datos(FICHERO_PUNTOS_OAI)
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as fichero:
+            json.dump(puntos, fichero)
+        os.replace(temporal, ruta)
+
+@Metricas.medido()
+def harvestear_arxiv_oai(desde=None, hasta=None, conjunto=None, max_resultados=None, reanudar=True):
+    '''
+    Descarga los metadatos de arXiv de una categoría o de un rango de fechas con OAI-PMH (ListRecords),
+    siguiendo los resumptionToken. A diferencia de la API de búsqueda no tiene límite de profundidad y cada
+    petición trae cientos de registros. Tras entregar cada página se guarda el token de la siguiente, de
+    forma que una descarga interrumpida continúa desde ahí al repetir la llamada con los mismos filtros.
+    :param desde: str - Fecha mínima de la última modificación del registro (AAAA-MM-DD).
+    :param hasta: str - Fecha máxima de la última modificación del registro (AAAA-MM-DD).
+    :param conjunto: str - Set de OAI-PMH, por ejemplo 'cs' o 'physics:hep-th'. Por defecto todo arXiv.
+    :param max_resultados: int - Número máximo de artículos a descargar, contando los de ejecuciones anteriores
+                                 si se reanuda. Si se alcanza con páginas pendientes se puede seguir después.
+    :param reanudar: bool - Si es False se ignora el punto de reanudación guardado y se empieza desde el principio.
+    :return: generator - Genera registros Articulo, como scrapear_arxiv.
+    '''
+    clave = _clave_oai(desde, hasta, conjunto)
+    punto = _leer_puntos_oai().get(clave) if reanudar else None
+    # Token con el que se pide la página actual (None en la primera) y registros suyos ya entregados
+    token = punto['token'] if punto else None
+    saltar = punto.get('saltar', 0) if punto else 0
+    recibidos = punto['recibidos'] if punto else 0
+    while max_resultados is None or recibidos < max_resultados:
+        if token:
+            parametros = {'verb': 'ListRecords', 'resumptionToken': token}
+        else:
+            parametros = {'verb': 'ListRecords', 'metadataPrefix': FORMATO_OAI_ARXIV}
+            parametros.update((nombre, valor) for nombre, valor in (('from', desde), ('until', hasta), ('set', conjunto)) if valor)
+        respuesta = Http.obtener(URL_OAI_ARXIV, params=parametros, timeout=(Http.TIMEOUT_CONEXION, 120), cache=False)
+        respuesta.raise_for_status()
+        try:
+            resultados, siguiente, total = parsear_pagina_oai(respuesta.content)
+        except ErrorOAI as e:
+            # El token guardado puede haber caducado: se empieza de nuevo
+            if e.codigo != 'badResumptionToken' or punto is None:
+                raise
+            punto, token, saltar, recibidos = None, None, 0, 0
+            _guardar_punto_oai(clave, None)
+            continue
+        resultados = resultados[saltar:]
+        if max_resultados is not None and len(resultados) > max_resultados - recibidos:
+            # La página se corta: al reanudar se vuelve a pedir y se saltan los registros ya entregados
+            resultados = resultados[:max_resultados - recibidos]
+            yield from Indice.indexar('arxiv', resultados, f"OAI {clave}")
+            recibidos += len(resultados)
+            _guardar_punto_oai(clave, {'token': token, 'saltar': saltar + len(resultados), 'recibidos': recibidos, 'total': total})
+            return
+        yield from Indice.indexar('arxiv', resultados, f"OAI {clave}")
+        recibidos += len(resultados)
+        token, saltar = siguiente, 0
+        # El token de la página siguiente se guarda cuando la actual ya se ha entregado entera
+        _guardar_punto_oai(clave, {'token': token, 'saltar': 0, 'recibidos': recibidos, 'total': total} if token else None)
+        if not token:
+            return
+
+@Metricas.medido()
+def mostrar_arxiv(query_arxiv,widget_arxiv):
+    from tkinter import messagebox
+
     # Obtiene la query insertada por el usuario y verifica que no está vacía
     query = query_arxiv.get()
     if not query:
         messagebox.showwarning("Input Error", "Por favor, introduzca una consulta valida")
         return
 
-    # Scrapea en arxiv con la query insertada y verifica que haya resultados
-    resultados = scrapear_arxiv(query)
-    widget_arxiv.delete('1.0', tk.END)
+    # Scrapea en arxiv con la query insertada y muestra los resultados
+    pintar_arxiv(widget_arxiv, scrapear_arxiv(query))
+
+def bloques_arxiv(resultados):
+    '''
+    Genera los bloques de texto con los que se muestran los resultados de arXiv.
+    :param resultados: list - Lista de resultados devuelta por scrapear_arxiv.
+    :return: generator - Un Bloque por resultado.
+    '''
+    for resultado in resultados:
+        yield (Bloque()
+               .texto(f"Titulo: {resultado['titulo']}\n\n"
+                      f"Autores: {resultado.texto('autores')}\n\n"
+                      f"Resumen: {resultado.texto('resumen')}\n\n"
+                      f"Fecha de publicacion: {resultado.texto('fecha_publicacion')}\n\n"
+                      f"Categorias: {resultado.texto('categorias')}\n\n"
+                      f"Comentarios: {resultado.texto('comentarios')}\n\n"
+                      f"Referencia Journal: {resultado.texto('referencia_journal')}\n\n")
+               .link(resultado['link'], resultado['link'])
+               .texto("\n\n"))
+
+def pintar_arxiv(widget_arxiv, resultados, vacio="No se han encontrado resultados para esta consulta."):
+    '''
+    Muestra en un widget de texto los resultados de una búsqueda en arXiv.
+    :param widget_arxiv: tk.Text - El widget de texto donde se muestran los resultados.
+    :param resultados: list - Lista de resultados devuelta por scrapear_arxiv.
+    :param vacio: str - Texto que se muestra si no hay resultados.
+    :return: None
+    '''
+    # Verifica que haya resultados e introduce los datos obtenidos en el widget de texto
     if not resultados:
-        widget_arxiv.insert(tk.END, "No se han encontrado resultados para esta consulta.")
-    # Introduce los datos obtenidos en el widget de texto
+        mostrar_bloques(widget_arxiv, [Bloque().texto(vacio)])
     else:
-        for resultado in resultados:
-            widget_arxiv.insert(tk.END, f"Titulo: {resultado['titulo']}\n\n")
-            widget_arxiv.insert(tk.END, f"Autores: {resultado['autores']}\n\n")
-            widget_arxiv.insert(tk.END, f"Resumen: {resultado['resumen']}\n\n")
-            widget_arxiv.insert(tk.END, f"Fecha de publicacion: {resultado['fecha_publicacion']}\n\n")
-            widget_arxiv.insert(tk.END, f"Categorias: {resultado['categorias']}\n\n")
-            widget_arxiv.insert(tk.END, f"Comentarios: {resultado['comentarios']}\n\n")
-            widget_arxiv.insert(tk.END, f"Referencia Journal: {resultado['referencia_journal']}\n\n")
-            insertar_link(widget_arxiv, resultado['link'], resultado['link'], resultados.index(resultado))
-            widget_arxiv.insert(tk.END, "\n\n")
\ No newline at end of file
+        mostrar_bloques(widget_arxiv, bloques_arxiv(resultados))
@@ -0,0 +1,779 @@
+'''
+Benchmarks de ScienceScraper. Cada benchmark mide la mediana de varias repeticiones y puede compararse
+con una base guardada en JSON para detectar regresiones:
+
+    python Benchmark.py arranque --repeticiones 5
+    python Benchmark.py arranque --base base_benchmark.json --guardar-base
+    python Benchmark.py arranque --base base_benchmark.json
+    python Benchmark.py parseo --tamano 2000 --fixtures paginas_guardadas/
+    python Benchmark.py tableros --tamanos 500 2000 5000
+    python Benchmark.py deduplicar --tamanos 10000 100000 --repeticiones 1
+    python Benchmark.py scrapers --tamanos 50 500 grabada --hilos 1 4 16 --latencia 0.05
+    python Benchmark.py memoria --tamano 5000 --repeticiones 1
+    python Benchmark.py tuberia --scrapers tnnls web --procesos 1 2 4 --llamadas 40
+    python Benchmark.py render --tamano 2000
+'''
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+# Páginas guardadas y resultados de referencia de los extractores
+FIXTURES = os.path.join(DIRECTORIO, 'fixtures')
+# Empeoramiento relativo a partir del cual una medida se considera una regresión
+TOLERANCIA = 0.2
+
+
+def medir(funcion, repeticiones):
+    '''
+    Ejecuta una función varias veces y devuelve la mediana del tiempo de ejecución.
+    :param funcion: function - Función sin argumentos a medir.
+    :param repeticiones: int - Número de ejecuciones.
+    :return: float - Mediana en segundos.
+    '''
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def comparar_con_base(resultados, ruta_base=None, guardar=False, tolerancia=TOLERANCIA):
+    '''
+    Muestra una tabla con los resultados y, si hay base, el cambio respecto a ella.
+    :param resultados: dict - Nombre de la medida y su valor (menor es mejor).
+    :param ruta_base: str - Fichero JSON con la base.
+    :param guardar: bool - Si es True los resultados se guardan en la base.
+    :param tolerancia: float - Empeoramiento relativo permitido.
+    :return: int - Número de regresiones encontradas.
+    '''
+    base = {}
+    if ruta_base and os.path.exists(ruta_base):
+        with open(ruta_base, encoding='utf-8') as fichero:
+            base = json.load(fichero)
+
+    regresiones = 0
+    print(f"{'medida':<40} {'valor':>12} {'base':>12} {'cambio':>9}")
+    for nombre, valor in resultados.items():
+        anterior = base.get(nombre)
+        if anterior:
+            cambio = (valor - anterior) / anterior
+            marca = '  REGRESION' if cambio > tolerancia else ''
+            regresiones += bool(marca)
+            print(f"{nombre:<40} {valor:>12.4f} {anterior:>12.4f} {cambio:>+8.1%}{marca}")
+        else:
+            print(f"{nombre:<40} {valor:>12.4f} {'-':>12} {'-':>9}")
+
+    if guardar and ruta_base:
+        base.update(resultados)
+        with open(ruta_base, 'w', encoding='utf-8') as fichero:
+            json.dump(base, fichero, indent=2, sort_keys=True)
+    return regresiones
+
+
+def _arrancar_interfaz():
+    # Arranca Interfaz.py y espera a que avise de que ha dibujado la primera ventana
+    entorno = dict(os.environ, SCIENCESCRAPER_MEDIR_ARRANQUE='1')
+    proceso = subprocess.Popen([sys.executable, os.path.join(DIRECTORIO, 'Interfaz.py')], env=entorno, stdout=subprocess.PIPE, text=True)
+    for linea in proceso.stdout:
+        if linea.strip() == 'ARRANQUE_LISTO':
+            break
+    proceso.wait()
+
+
+def _importar_arranque():
+    # Importa en un proceso nuevo los módulos que carga la interfaz antes de mostrar la primera ventana
+    codigo = 'import tkinter, tkinter.ttk, tkinter.scrolledtext, Utils, Tareas'
+    subprocess.run([sys.executable, '-c', codigo], cwd=DIRECTORIO, check=True)
+
+
+def _importar_scrapers():
+    # Importa en un proceso nuevo todos los módulos de scrapeo, que la interfaz carga al usar cada pestaña
+    codigo = 'import Arxiv, Pubmed, Scraper, Scraper_ACM, Scraper_TNNLS'
+    subprocess.run([sys.executable, '-c', codigo], cwd=DIRECTORIO, check=True)
+
+
+def bench_arranque(argumentos):
+    '''
+    Mide el arranque de la interfaz: los imports previos a la primera ventana, los de los scrapers que se
+    cargan de forma diferida y, si hay pantalla disponible, el tiempo hasta dibujar la primera ventana.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Medidas en segundos.
+    '''
+    resultados = {
+        'arranque.importaciones': medir(_importar_arranque, argumentos.repeticiones),
+        'arranque.importaciones_scrapers': medir(_importar_scrapers, argumentos.repeticiones),
+    }
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        print("Sin pantalla (DISPLAY): no se mide el tiempo hasta la primera ventana", file=sys.stderr)
+    else:
+        resultados['arranque.primera_ventana'] = medir(_arrancar_interfaz, argumentos.repeticiones)
+    return resultados
+
+
+def _extractores():
+    # Función de extracción de cada scraper a partir del HTML de la página
+    from Scraper import extraer_web
+    from Scraper_ACM import extraer_ACM
+    from Scraper_TNNLS import extraer_TNNLS
+    return {
+        'web': lambda html: extraer_web('https://example.org/', html),
+        'acm': extraer_ACM,
+        'tnnls': extraer_TNNLS,
+    }
+
+
+def cargar_paginas(tamano, directorio=None):
+    '''
+    Devuelve la página de cada scraper: la guardada en el directorio de fixtures si existe (web.html,
+    acm.html, tnnls.html) o una página sintética del tamaño indicado.
+    :param tamano: int - Número de párrafos o miembros de las páginas sintéticas.
+    :param directorio: str - Directorio con páginas reales guardadas.
+    :return: dict - Nombre del scraper y contenido de la página en bytes.
+    '''
+    import Fixtures
+    paginas = {}
+    for nombre, generar in Fixtures.PAGINAS.items():
+        ruta = os.path.join(directorio, f"{nombre}.html") if directorio else None
+        if ruta and os.path.exists(ruta):
+            with open(ruta, 'rb') as fichero:
+                paginas[nombre] = fichero.read()
+        else:
+            paginas[nombre] = generar(tamano).encode('utf-8')
+    return paginas
+
+
+def bench_parseo(argumentos):
+    '''
+    Mide la extracción de cada scraper con cada parser disponible, parseando el documento completo (como
+    antes de Parseo) y solo las zonas que usa el extractor. Comprueba además que el resultado no cambia.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Medidas en segundos.
+    '''
+    import Parseo
+    parsers = ['html.parser'] + (['lxml'] if Parseo.PARSER == 'lxml' else [])
+    parser_original, filtrar_original = Parseo.PARSER, Parseo.FILTRAR
+    extractores = _extractores()
+    resultados = {}
+    try:
+        for nombre, html in cargar_paginas(argumentos.tamano, argumentos.fixtures).items():
+            extraer = extractores[nombre]
+            referencia = None
+            for parser in parsers:
+                for filtrar in (False, True):
+                    Parseo.configurar(parser, filtrar)
+                    salida = extraer(html)
+                    if referencia is None:
+                        referencia = salida
+                    elif salida != referencia:
+                        print(f"Aviso: {nombre} con {parser} ({'zonas' if filtrar else 'completo'}) no da el mismo resultado", file=sys.stderr)
+                    clave = f"parseo.{nombre}.{parser}.{'zonas' if filtrar else 'completo'}"
+                    resultados[clave] = medir(lambda: extraer(html), argumentos.repeticiones)
+            base = resultados[f"parseo.{nombre}.html.parser.completo"]
+            mejor = min(v for k, v in resultados.items() if k.startswith(f"parseo.{nombre}."))
+            print(f"{nombre}: {len(html) / 1024:.0f} KiB, {base / mejor:.1f}x más rápido que html.parser completo", file=sys.stderr)
+    finally:
+        Parseo.configurar(parser_original, filtrar_original)
+    return resultados
+
+
+def _tableros():
+    from Scraper_ACM import extraer_ACM
+    from Scraper_TNNLS import extraer_TNNLS
+    return {'acm': extraer_ACM, 'tnnls': extraer_TNNLS}
+
+
+def _filas_referencia(nombre, miembros):
+    # Las referencias guardan cada miembro como una fila con las columnas del CSV, con '' en los campos vacíos
+    import Scraper_ACM
+    import Scraper_TNNLS
+    campos = {'acm': Scraper_ACM.CAMPOS_CSV, 'tnnls': Scraper_TNNLS.CAMPOS_CSV}[nombre]
+    return [[valor or '' for valor in miembro.valores(campos)] for miembro in miembros]
+
+
+def _escribir_referencia(ruta, journal_name, datos):
+    # Una fila por línea para que los cambios en la referencia se lean bien en un diff
+    with open(ruta, 'w', encoding='utf-8', newline='\n') as fichero:
+        fichero.write('{"journal_name": ' + json.dumps(journal_name, ensure_ascii=False) + ', "datos": [\n')
+        fichero.write(',\n'.join(json.dumps(fila, ensure_ascii=False) for fila in datos))
+        fichero.write('\n]}\n')
+
+
+def _paginas_referencia(nombre):
+    # La página grabada (<nombre>.html) y los casos escritos a mano (<nombre>_<caso>.html)
+    return sorted(fichero[:-len('.html')] for fichero in os.listdir(FIXTURES)
+                  if fichero.endswith('.html') and fichero.split('.')[0].split('_')[0] == nombre)
+
+
+def comprobar_referencias(actualizar=False):
+    '''
+    Compara la salida de los extractores de editorial boards sobre las páginas guardadas en fixtures con
+    el resultado de referencia guardado junto a ellas (acm.html y acm.json, tnnls.html y tnnls.json). Los
+    casos escritos a mano, como tnnls_incompletos.html con fichas a las que les faltan campos, tienen su
+    referencia comprobada a mano y no se reescriben.
+    :param actualizar: bool - Si es True se reescriben las referencias de las páginas grabadas con la salida actual.
+    :return: list - Páginas cuya salida no coincide con la referencia.
+    '''
+    distintos = []
+    for nombre, extraer in _tableros().items():
+        for pagina in _paginas_referencia(nombre):
+            with open(os.path.join(FIXTURES, f"{pagina}.html"), 'rb') as fichero:
+                journal_name, miembros = extraer(fichero.read())
+            datos = _filas_referencia(nombre, miembros)
+            ruta = os.path.join(FIXTURES, f"{pagina}.json")
+            if actualizar and pagina == nombre:
+                _escribir_referencia(ruta, journal_name, datos)
+                continue
+            with open(ruta, encoding='utf-8') as fichero:
+                referencia = json.load(fichero)
+            if referencia != {'journal_name': journal_name, 'datos': datos}:
+                distintos.append(pagina)
+    return distintos
+
+
+# La maquetación de ACM descrita en modo contenedor: cada div.board-section tiene su rol y sus fichas
+PERFIL_CONTENEDOR_ACM = {
+    'modo': 'contenedor',
+    'titulo': 'h1.title',
+    'seccion': 'div.board-section',
+    'rol': 'h3.section__title',
+    'miembro': '.item-meta__info',
+    'campos': {'nombre': 'h4', 'afiliacion': 'p', 'pais': 'span'},
+}
+
+
+def comprobar_perfiles():
+    '''
+    Comprueba el motor de perfiles de Tableros: la página de ACM guardada en fixtures extraída en modo
+    contenedor, con y sin zonas, debe dar los mismos miembros que el perfil secuencial de ACM, y los
+    perfiles incompletos deben rechazarse con ValueError.
+    :return: list - Descripción de cada comprobación que ha fallado.
+    '''
+    from Tableros import PERFILES, extraer_tablero
+    with open(os.path.join(FIXTURES, 'acm.html'), 'rb') as fichero:
+        html = fichero.read()
+    fallos = []
+    esperado = extraer_tablero(html, PERFILES['acm'])
+    con_zonas = dict(PERFIL_CONTENEDOR_ACM, zonas={'nombres': ['h1'], 'clases': ['board-section']})
+    for nombre, perfil in (('contenedor', PERFIL_CONTENEDOR_ACM), ('contenedor con zonas', con_zonas)):
+        if extraer_tablero(html, perfil) != esperado:
+            fallos.append(f"el perfil {nombre} no da los miembros del perfil secuencial de ACM")
+
+    incompletos = {
+        'secuencial sin rol': {'modo': 'secuencial', 'miembro': '.item-meta__info'},
+        'secuencial sin miembro': {'modo': 'secuencial', 'rol': 'h3'},
+        'contenedor sin miembro': {'modo': 'contenedor', 'seccion': 'div.board-section', 'rol': 'h3'},
+        'contenedor con zonas sin la sección': dict(PERFIL_CONTENEDOR_ACM, zonas={'nombres': ['h1', 'h3'], 'clases': ['item-meta__info']}),
+    }
+    for nombre, perfil in incompletos.items():
+        try:
+            extraer_tablero(html, perfil)
+        except ValueError:
+            continue
+        fallos.append(f"el perfil {nombre} no se rechaza")
+    return fallos
+
+
+def bench_tableros(argumentos):
+    '''
+    Comprueba los extractores de editorial boards contra sus referencias y mide cuánto tardan en páginas
+    sintéticas de distintos tamaños, en las que faltan algunos campos de las fichas.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Medidas en segundos.
+    '''
+    import Fixtures
+    distintos = comprobar_referencias(argumentos.actualizar_referencias)
+    if distintos:
+        sys.exit(f"Error: la salida de {', '.join(distintos)} no coincide con la referencia de {FIXTURES}")
+    fallos = comprobar_perfiles()
+    if fallos:
+        sys.exit(f"Error: {'; '.join(fallos)}")
+
+    resultados = {}
+    for nombre, extraer in _tableros().items():
+        for tamano in argumentos.tamanos:
+            html = Fixtures.PAGINAS[nombre](tamano).encode('utf-8')
+            resultados[f"tableros.{nombre}.{tamano}"] = medir(lambda: extraer(html), argumentos.repeticiones)
+    return resultados
+
+
+def bench_deduplicar(argumentos):
+    '''
+    Mide la deduplicación de resultados sintéticos de arXiv y PubMed de distintos tamaños y comprueba que
+    los grupos encontrados coinciden con los artículos de origen.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Medidas en segundos.
+    '''
+    import Fixtures
+    from Deduplicar import agrupar
+    resultados = {}
+    for tamano in argumentos.tamanos:
+        registros = Fixtures.articulos(tamano)
+        grupos = agrupar(registros)
+        mezclados = sum(len({registros[i]['articulo'] for i in grupo}) > 1 for grupo in grupos)
+        if mezclados:
+            sys.exit(f"Error: {mezclados} grupos mezclan artículos distintos con {tamano} artículos")
+        # Proporción de duplicados reales que no se han encontrado
+        resultados[f"deduplicar.{tamano}.sin_fusionar"] = (len(grupos) - tamano) / max(1, len(registros) - tamano)
+        resultados[f"deduplicar.{tamano}"] = medir(lambda: agrupar(registros), argumentos.repeticiones)
+    return resultados
+
+
+def _scrapers(url_base, tamano):
+    # Llamada a cada scraper contra el servidor de fixtures; devuelve el número de resultados obtenidos
+    import Arxiv
+    import Pubmed
+    from Scraper import scrapear_web
+    from Scraper_ACM import scrapear_ACM
+    from Scraper_TNNLS import scrapear_TNNLS
+
+    def web():
+        datos = scrapear_web(f"{url_base}/web/{tamano}")
+        # scrapear_web devuelve el mensaje de error como texto
+        if isinstance(datos, str):
+            raise RuntimeError(datos)
+        return len(datos['parrafos'])
+
+    scrapers = {
+        'web': web,
+        'acm': lambda: len(scrapear_ACM(f"{url_base}/acm/{tamano}")[1]),
+        'tnnls': lambda: len(scrapear_TNNLS(f"{url_base}/tnnls/{tamano}")[1]),
+    }
+    # Las APIs de arXiv y PubMed no tienen respuestas grabadas, solo sintéticas
+    if tamano != 'grabada':
+        Arxiv.URL_ARXIV = f"{url_base}/arxiv/{tamano}/api/query"
+        Pubmed.URL_EUTILS = f"{url_base}/eutils/{tamano}/"
+        scrapers['arxiv'] = lambda: len(Arxiv.scrapear_arxiv('benchmark', int(tamano)))
+        scrapers['pubmed'] = lambda: len(Pubmed.scrapear_pubmed('benchmark', int(tamano)))
+        Arxiv.URL_OAI_ARXIV = f"{url_base}/oai/{tamano}"
+        scrapers['oai'] = lambda: len(list(Arxiv.harvestear_arxiv_oai(reanudar=False)))
+    return scrapers
+
+
+# Registros del archivo OAI-PMH sintético de comprobar_oai (tres páginas) y cortes de la descarga reanudada
+TOTAL_OAI = 250
+CORTES_OAI = (37, 130)
+
+
+def comprobar_oai(url_base):
+    '''
+    Comprueba la descarga OAI-PMH de arXiv contra el servidor de fixtures: cada registro debe tener los mismos
+    campos que el artículo correspondiente de la API de búsqueda (salvo el sufijo de versión del link y las
+    categorías), y una descarga cortada con max_resultados dentro de una página y reanudada después debe
+    entregar, entre todas las llamadas, exactamente los registros de la descarga completa y en su orden.
+    El punto de reanudación se guarda en un directorio de datos temporal.
+    :param url_base: str - URL del servidor de fixtures.
+    :return: list - Descripción de cada comprobación que ha fallado.
+    '''
+    import tempfile
+    import Arxiv
+    Arxiv.URL_ARXIV = f"{url_base}/arxiv/{TOTAL_OAI}/api/query"
+    Arxiv.URL_OAI_ARXIV = f"{url_base}/oai/{TOTAL_OAI}"
+    datos_original = os.environ.get('SCIENCESCRAPER_DATOS')
+    fallos = []
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ['SCIENCESCRAPER_DATOS'] = directorio
+        try:
+            completa = list(Arxiv.harvestear_arxiv_oai(reanudar=False))
+            partes = []
+            for corte in (*CORTES_OAI, None):
+                partes.append(list(Arxiv.harvestear_arxiv_oai(max_resultados=corte)))
+            api = {articulo['link'].rsplit('v', 1)[0]: articulo for articulo in Arxiv.scrapear_arxiv('benchmark', TOTAL_OAI)}
+        finally:
+            if datos_original is None:
+                del os.environ['SCIENCESCRAPER_DATOS']
+            else:
+                os.environ['SCIENCESCRAPER_DATOS'] = datos_original
+
+    reanudada = [articulo for parte in partes for articulo in parte]
+    if [len(parte) for parte in partes[:-1]] != [CORTES_OAI[0], CORTES_OAI[1] - CORTES_OAI[0]]:
+        fallos.append(f"las descargas cortadas entregan {[len(parte) for parte in partes]} registros")
+    if [articulo['link'] for articulo in reanudada] != [articulo['link'] for articulo in completa]:
+        fallos.append(f"la descarga reanudada entrega {len(reanudada)} registros distintos de los {len(completa)} de la completa")
+    campos = ('titulo', 'resumen', 'autores', 'fecha_publicacion', 'comentarios')
+    for articulo in completa:
+        esperado = api.get(articulo['link'])
+        if esperado is None:
+            fallos.append(f"{articulo['link']} no está en la API de búsqueda")
+        elif any(articulo[campo] != esperado[campo] for campo in campos):
+            distintos = [campo for campo in campos if articulo[campo] != esperado[campo]]
+            fallos.append(f"{articulo['link']} tiene {', '.join(distintos)} distintos de la API de búsqueda")
+    return fallos
+
+
+def medir_concurrencia(funcion, llamadas, hilos):
+    '''
+    Ejecuta una función varias veces repartida entre varios hilos.
+    :param funcion: function - Función sin argumentos a medir.
+    :param llamadas: int - Número total de llamadas.
+    :param hilos: int - Llamadas simultáneas.
+    :return: tuple - Segundos totales, lista con la duración de cada llamada y lista con sus resultados.
+    '''
+    latencias = []
+
+    def llamada(_):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        latencias.append(time.perf_counter() - inicio)
+        return resultado
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        resultados = list(ejecutor.map(llamada, range(llamadas)))
+    return time.perf_counter() - inicio, latencias, resultados
+
+
+def _percentil(valores, percentil):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * percentil))]
+
+
+def bench_scrapers(argumentos):
+    '''
+    Mide los scrapers completos (petición HTTP, parseo y extracción) contra un servidor local que sirve
+    páginas sintéticas y las páginas grabadas en fixtures, con distintos tamaños de página y número de
+    llamadas simultáneas. La caché HTTP y el índice local se desactivan para que cada llamada vaya a la red.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Latencia mediana y p95 de cada llamada y segundos por llamada (inversa del rendimiento).
+    '''
+    import Arxiv
+    import Cache
+    import Fixtures
+    import Indice
+    import Pubmed
+    Cache.configurar(activar=False)
+    Indice.configurar(activar=False)
+    url_arxiv, url_oai, url_eutils = Arxiv.URL_ARXIV, Arxiv.URL_OAI_ARXIV, Pubmed.URL_EUTILS
+    servidor = Fixtures.ServidorFixtures(argumentos.latencia)
+    resultados = {}
+    try:
+        if not argumentos.scrapers or 'oai' in argumentos.scrapers:
+            fallos = comprobar_oai(servidor.url)
+            if fallos:
+                sys.exit(f"Error en la descarga OAI-PMH: {'; '.join(fallos[:5])}")
+        for tamano in argumentos.tamanos:
+            for nombre, funcion in _scrapers(servidor.url, tamano).items():
+                if argumentos.scrapers and nombre not in argumentos.scrapers:
+                    continue
+                # La primera llamada genera las páginas en el servidor y da el número de resultados esperado
+                esperados = funcion()
+                for hilos in argumentos.hilos:
+                    totales = []
+                    latencias = []
+                    for _ in range(argumentos.repeticiones):
+                        total, duraciones, cantidades = medir_concurrencia(funcion, argumentos.llamadas, hilos)
+                        if any(cantidad != esperados for cantidad in cantidades):
+                            sys.exit(f"Error: {nombre} con tamaño {tamano} y {hilos} hilos no siempre devuelve {esperados} resultados")
+                        totales.append(total)
+                        latencias.extend(duraciones)
+                    clave = f"scrapers.{nombre}.{tamano}.h{hilos}"
+                    resultados[f"{clave}.latencia_p50"] = statistics.median(latencias)
+                    resultados[f"{clave}.latencia_p95"] = _percentil(latencias, 0.95)
+                    resultados[f"{clave}.por_llamada"] = statistics.median(totales) / argumentos.llamadas
+                    print(f"{nombre} {tamano} x{hilos}: {esperados} resultados, "
+                          f"{argumentos.llamadas / statistics.median(totales):.1f} llamadas/s", file=sys.stderr)
+    finally:
+        servidor.cerrar()
+        Arxiv.URL_ARXIV, Arxiv.URL_OAI_ARXIV, Pubmed.URL_EUTILS = url_arxiv, url_oai, url_eutils
+    return resultados
+
+
+def memoria_retenida(construir):
+    '''
+    Mide la memoria que sigue ocupada por el resultado de una función cuando termina, sin contar la que
+    usó mientras se ejecutaba (documentos parseados, respuestas...).
+    :param construir: function - Función sin argumentos que devuelve el resultado.
+    :return: tuple - Bytes retenidos y resultado.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        resultado = construir()
+        gc.collect()
+        retenidos = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return retenidos, resultado
+
+
+def _copia(texto):
+    # Cadena nueva con el mismo contenido, como la que creaban los extractores para cada registro
+    return None if texto is None else (texto + ' ')[:-1]
+
+
+def _arxiv_legado(entry):
+    # Diccionario de resultado de arXiv anterior a Registros, con los textos de los campos que faltan
+    return {
+        'titulo': entry.title,
+        'resumen': entry.summary,
+        'link': entry.link,
+        'autores': ', '.join(author.name for author in entry.authors) if 'authors' in entry else 'No hay autores disponibles',
+        'fecha_publicacion': entry.published if 'published' in entry else 'No hay fecha de publicación disponible',
+        'categorias': ', '.join(tag.term for tag in entry.tags) if 'tags' in entry else 'No hay categorías disponibles',
+        'comentarios': entry.arxiv_comment if 'arxiv_comment' in entry else 'No hay comentarios disponibles',
+        'referencia_journal': entry.arxiv_journal_ref if 'arxiv_journal_ref' in entry else 'No hay referencia a journal disponible',
+    }
+
+
+def _pubmed_legado(articulo):
+    # Diccionario de resultado de PubMed anterior a Registros
+    return {
+        'titulo': articulo.titulo,
+        'autores': articulo.texto('autores'),
+        'resumen': articulo.texto('resumen'),
+        'link': articulo.link,
+        'pmid': articulo.pmid,
+        'revista': _copia(articulo.revista) or '',
+        'fecha_publicacion': articulo.texto('fecha_publicacion'),
+        'doi': articulo.doi or '',
+    }
+
+
+def _web_legado(pagina):
+    # Diccionario de scrapear_web anterior a Registros, con listas de diccionarios para enlaces e imágenes
+    return {
+        'titulo': pagina.texto('titulo'),
+        'parrafos': list(pagina.parrafos),
+        'links': [{'text': link.text, 'url': link.url} for link in pagina.links],
+        'imagenes': [{'alt': imagen.alt, 'src': imagen.src} for imagen in pagina.imagenes],
+    }
+
+
+def _construcciones_memoria(tamano):
+    # Para cada tipo de resultado: función que da los datos de origen y constructores con el formato
+    # anterior a Registros y con los registros actuales, que devuelven (resultados, número de registros)
+    import feedparser
+    import Fixtures
+    from io import BytesIO
+    from Arxiv import _entrada_a_resultado
+    from Pubmed import parsear_efetch
+    from Scraper import extraer_web
+    from Scraper_TNNLS import CAMPOS_CSV, extraer_TNNLS
+
+    def arxiv(convertir):
+        def construir(feed):
+            resultados = [convertir(entry) for entry in feedparser.parse(feed).entries]
+            return resultados, len(resultados)
+        return construir
+
+    def pubmed(convertir):
+        def construir(xml):
+            resultados = [convertir(articulo) for articulo in parsear_efetch(BytesIO(xml))]
+            return resultados, len(resultados)
+        return construir
+
+    def tnnls(convertir):
+        def construir(html):
+            miembros = [convertir(miembro) for miembro in extraer_TNNLS(html)[1]]
+            return miembros, len(miembros)
+        return construir
+
+    def web(convertir):
+        def construir(html):
+            return convertir(extraer_web('https://example.org/', html)), 1
+        return construir
+
+    def tnnls_legado(miembro):
+        return ['' if valor is None else _copia(valor) for valor in miembro.valores(CAMPOS_CSV)]
+
+    return {
+        'arxiv': (lambda: Fixtures.feed_arxiv(tamano, 0, tamano), arxiv(_arxiv_legado), arxiv(_entrada_a_resultado)),
+        'pubmed': (lambda: Fixtures.efetch_pubmed(0, tamano).encode('utf-8'), pubmed(_pubmed_legado), pubmed(lambda a: a)),
+        'tnnls': (lambda: Fixtures.pagina_tnnls(tamano).encode('utf-8'), tnnls(tnnls_legado), tnnls(lambda m: m)),
+        'web': (lambda: Fixtures.pagina_web(tamano).encode('utf-8'), web(_web_legado), web(lambda p: p)),
+    }
+
+
+def bench_memoria(argumentos):
+    '''
+    Mide la memoria que ocupan los resultados de cada scraper con los registros de Registros y con el
+    formato anterior de diccionarios y listas por resultado, a partir de las respuestas sintéticas de
+    Fixtures. Solo se cuenta la memoria que queda ocupada por los resultados, no la del parseo.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Bytes por resultado (por artículo, por miembro o por página) de cada formato.
+    '''
+    resultados = {}
+    for nombre, (origen, legado, registros) in _construcciones_memoria(argumentos.tamano).items():
+        datos = origen()
+        medidas = {}
+        for formato, construir in (('legado', legado), ('registros', registros)):
+            # Una primera llamada sin medir, para no contar las cachés y los imports que se crean la primera vez
+            construir(datos)
+            bytes_retenidos = []
+            for _ in range(argumentos.repeticiones):
+                retenidos, (salida, cantidad) = memoria_retenida(lambda: construir(datos))
+                bytes_retenidos.append(retenidos / max(1, cantidad))
+                del salida
+            medidas[formato] = resultados[f"memoria.{nombre}.{formato}"] = statistics.median(bytes_retenidos)
+        print(f"{nombre}: {medidas['registros']:.0f} bytes por resultado, "
+              f"{1 - medidas['registros'] / medidas['legado']:.0%} menos que con diccionarios", file=sys.stderr)
+    return resultados
+
+
+def bench_tuberia(argumentos):
+    '''
+    Mide un lote de llamadas a cada scraper contra el servidor local de fixtures ejecutado de dos formas:
+    con los scrapers en un pool de hilos, que descargan y parsean en el mismo hilo, y con Tuberia, que
+    descarga en hilos y parsea en un pool de procesos. Comprueba además que los resultados coinciden.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Segundos por llamada (inversa del rendimiento) de cada forma.
+    '''
+    import Cache
+    import Fixtures
+    import Indice
+    from Tuberia import procesar
+    Cache.configurar(activar=False)
+    Indice.configurar(activar=False)
+    servidor = Fixtures.ServidorFixtures(argumentos.latencia)
+    resultados = {}
+    try:
+        for nombre in argumentos.scrapers:
+            url = f"{servidor.url}/{nombre}/{argumentos.tamano}"
+            scrapear = _scrapers(servidor.url, argumentos.tamano)[nombre]
+            esperados = scrapear()
+            urls = [url] * argumentos.llamadas
+            clave = f"tuberia.{nombre}.{argumentos.tamano}"
+            total, _, cantidades = medir_concurrencia(scrapear, argumentos.llamadas, argumentos.hilos)
+            if any(cantidad != esperados for cantidad in cantidades):
+                sys.exit(f"Error: {nombre} no siempre devuelve {esperados} resultados")
+            resultados[f"{clave}.hilos"] = total / argumentos.llamadas
+            for procesos in argumentos.procesos:
+                def tuberia():
+                    cantidades = []
+                    for _, filas, error in procesar(nombre, urls, hilos=argumentos.hilos, procesos=procesos):
+                        if error is not None:
+                            raise error
+                        # Las páginas web dan un registro por página; se cuentan sus párrafos, como en _scrapers
+                        cantidades.append(len(filas[0].parrafos) if nombre == 'web' else len(filas))
+                    return cantidades
+                inicio = time.perf_counter()
+                cantidades = tuberia()
+                resultados[f"{clave}.p{procesos}"] = (time.perf_counter() - inicio) / argumentos.llamadas
+                if len(cantidades) != argumentos.llamadas or any(cantidad != esperados for cantidad in cantidades):
+                    sys.exit(f"Error: {nombre} con {procesos} procesos no siempre devuelve {esperados} resultados")
+            mejor = min(v for k, v in resultados.items() if k.startswith(f"{clave}.p"))
+            print(f"{nombre}: {resultados[f'{clave}.hilos'] / mejor:.1f}x con la tubería respecto a {argumentos.hilos} hilos "
+                  f"({os.cpu_count()} núcleos)", file=sys.stderr)
+    finally:
+        servidor.cerrar()
+    return resultados
+
+
+def bench_render(argumentos):
+    '''
+    Prepara para el widget los bloques de una página web sintética, con links e imágenes seguidos, y
+    comprueba que cada línea de cada link se resuelve a la URL que muestra, también entre links contiguos.
+    No necesita pantalla: no se crea ningún widget.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: dict - Medidas en segundos.
+    '''
+    import Fixtures
+    from Render import Destinos, preparar_lote
+    from Scraper import bloques_web, extraer_web
+    bloques = list(bloques_web(extraer_web('https://example.org/', Fixtures.pagina_web(argumentos.tamano))))
+
+    destinos = Destinos()
+    preparar_lote(bloques, 1, destinos)
+    linea = 1
+    anterior = None
+    for bloque in bloques:
+        for texto, etiqueta, _ in bloque.partes:
+            saltos = texto.count('\n')
+            if etiqueta:
+                # La URL es lo que se muestra después del último ' - '
+                url = texto.rstrip().rsplit(' - ', 1)[-1]
+                for pulsada in (linea, linea + saltos - 1):
+                    destino = destinos.buscar(etiqueta, pulsada)
+                    if destino != url:
+                        sys.exit(f"Error: la línea {pulsada} muestra {url} y abre {destino}")
+                if anterior and anterior[0] == etiqueta and anterior[1] == url:
+                    sys.exit(f"Error: dos links seguidos en la línea {linea} abren {url}")
+                anterior = (etiqueta, url)
+            else:
+                anterior = None
+            linea += saltos
+
+    return {f"render.{argumentos.tamano}": medir(lambda: preparar_lote(bloques, 1, Destinos()), argumentos.repeticiones)}
+
+
+def _argumentos_scrapers(sub):
+    sub.add_argument('--tamanos', nargs='+', default=['50', '500', '2000'],
+                     help="Párrafos, miembros o artículos de cada página sintética; 'grabada' usa las páginas de fixtures")
+    sub.add_argument('--hilos', type=int, nargs='+', default=[1, 4, 16], help='Llamadas simultáneas de cada prueba')
+    sub.add_argument('--llamadas', type=int, default=20, help='Llamadas de cada repetición')
+    sub.add_argument('--latencia', type=float, default=0.0, help='Segundos que tarda el servidor local en responder')
+    sub.add_argument('--scrapers', nargs='+', choices=['web', 'acm', 'tnnls', 'arxiv', 'oai', 'pubmed'], help='Scrapers a medir. Por defecto todos')
+
+
+def _argumentos_tuberia(sub):
+    sub.add_argument('--scrapers', nargs='+', choices=['web', 'acm', 'tnnls'], default=['web', 'tnnls'], help='Scrapers a medir')
+    sub.add_argument('--tamano', default='2000', help="Párrafos o miembros de la página sintética; 'grabada' usa las páginas de fixtures")
+    sub.add_argument('--llamadas', type=int, default=40, help='Páginas del lote')
+    sub.add_argument('--hilos', type=int, default=8, help='Descargas simultáneas')
+    sub.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4], help='Procesos de extracción de cada prueba')
+    sub.add_argument('--latencia', type=float, default=0.0, help='Segundos que tarda el servidor local en responder')
+
+
+def _argumentos_memoria(sub):
+    sub.add_argument('--tamano', type=int, default=5000, help='Artículos, miembros o párrafos de cada respuesta sintética')
+
+
+def _argumentos_deduplicar(sub):
+    sub.add_argument('--tamanos', type=int, nargs='+', default=[10000, 100000], help='Artículos distintos de cada prueba')
+
+
+def _argumentos_tableros(sub):
+    sub.add_argument('--tamanos', type=int, nargs='+', default=[500, 2000, 5000], help='Miembros de las páginas sintéticas')
+    sub.add_argument('--actualizar-referencias', action='store_true', help='Reescribe las referencias con la salida actual')
+
+
+def _argumentos_render(sub):
+    sub.add_argument('--tamano', type=int, default=2000, help='Párrafos de la página sintética')
+
+
+def _argumentos_parseo(sub):
+    sub.add_argument('--tamano', type=int, default=2000, help='Párrafos o miembros de las páginas sintéticas')
+    sub.add_argument('--fixtures', help='Directorio con páginas guardadas (web.html, acm.html, tnnls.html)')
+
+
+BENCHMARKS = {
+    'arranque': (bench_arranque, 'Tiempo de arranque de la interfaz', None),
+    'parseo': (bench_parseo, 'Parseo y extracción de cada scraper', _argumentos_parseo),
+    'tableros': (bench_tableros, 'Extracción de los editorial boards', _argumentos_tableros),
+    'deduplicar': (bench_deduplicar, 'Deduplicación de resultados de arXiv y PubMed', _argumentos_deduplicar),
+    'scrapers': (bench_scrapers, 'Scrapers completos contra un servidor local con las páginas de prueba', _argumentos_scrapers),
+    'tuberia': (bench_tuberia, 'Lotes de scrapeo con la descarga en hilos y el parseo en procesos', _argumentos_tuberia),
+    'memoria': (bench_memoria, 'Memoria ocupada por los resultados de cada scraper', _argumentos_memoria),
+    'render': (bench_render, 'Preparación de los resultados para el widget y links de cada línea', _argumentos_render),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de ScienceScraper.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    for nombre, (_, ayuda, argumentos_propios) in BENCHMARKS.items():
+        sub = subparsers.add_parser(nombre, help=ayuda)
+        if argumentos_propios:
+            argumentos_propios(sub)
+        sub.add_argument('--repeticiones', type=int, default=5, help='Repeticiones de cada medida')
+        sub.add_argument('--base', help='Fichero JSON con la base con la que comparar')
+        sub.add_argument('--guardar-base', action='store_true', help='Guarda los resultados en el fichero de base')
+        sub.add_argument('--tolerancia', type=float, default=TOLERANCIA, help='Empeoramiento relativo permitido')
+    argumentos = parser.parse_args(argv)
+
+    funcion, _, _ = BENCHMARKS[argumentos.benchmark]
+    resultados = funcion(argumentos)
+    regresiones = comparar_con_base(resultados, argumentos.base, argumentos.guardar_base, argumentos.tolerancia)
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
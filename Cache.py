@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import Utils
+
+# Configuración por defecto de la caché de respuestas HTTP
+TTL = 3600
+TAMANO_MAXIMO = 200 * 1024 * 1024
+
+# Cabeceras que no se guardan porque el cuerpo se almacena ya descomprimido
+CABECERAS_EXCLUIDAS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+
+class CacheHTTP:
+    '''
+    Caché persistente en disco de respuestas HTTP. Cada entrada guarda el cuerpo y un fichero de metadatos
+    con las cabeceras, el ETag y el Last-Modified para poder revalidarla con peticiones condicionales.
+    Cuando el tamaño total supera el máximo se eliminan las entradas usadas hace más tiempo (LRU).
+    '''
+
+    def __init__(self, directorio, ttl=TTL, tamano_maximo=TAMANO_MAXIMO):
+        '''
+        :param directorio: str - Directorio donde se guardan las entradas.
+        :param ttl: float - Segundos durante los que una entrada se sirve sin consultar al servidor.
+        :param tamano_maximo: int - Tamaño máximo en bytes de la caché.
+        '''
+        self.directorio = directorio
+        self.ttl = ttl
+        self.tamano_maximo = tamano_maximo
+        self._candado = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        self._tamano = sum(self._tamano_entrada(clave) for clave in self._claves())
+
+    def _rutas(self, clave):
+        return os.path.join(self.directorio, clave + '.cuerpo'), os.path.join(self.directorio, clave + '.json')
+
+    def _claves(self):
+        return [nombre[:-5] for nombre in os.listdir(self.directorio) if nombre.endswith('.json')]
+
+    def _tamano_entrada(self, clave):
+        tamano = 0
+        for ruta in self._rutas(clave):
+            try:
+                tamano += os.path.getsize(ruta)
+            except OSError:
+                pass
+        return tamano
+
+    @staticmethod
+    def clave(url):
+        '''
+        :param url: str - URL completa, incluida la query string.
+        :return: str - Nombre de la entrada asociada a la URL.
+        '''
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def leer(self, url):
+        '''
+        Lee la entrada de una URL y la marca como usada recientemente.
+        :param url: str - URL completa de la petición.
+        :return: tuple - (metadatos, cuerpo) o None si la URL no está en caché.
+        '''
+        ruta_cuerpo, ruta_meta = self._rutas(self.clave(url))
+        try:
+            with open(ruta_meta, encoding='utf-8') as fichero:
+                meta = json.load(fichero)
+            with open(ruta_cuerpo, 'rb') as fichero:
+                cuerpo = fichero.read()
+            # La fecha de modificación de los metadatos marca el último uso para el LRU
+            os.utime(ruta_meta)
+        except (OSError, ValueError):
+            return None
+        return meta, cuerpo
+
+    def es_fresca(self, meta, ttl=None):
+        '''
+        :param meta: dict - Metadatos de la entrada.
+        :param ttl: float - TTL a aplicar en lugar del de la caché.
+        :return: bool - True si la entrada puede servirse sin consultar al servidor.
+        '''
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() - meta['guardado'] < ttl
+
+    @staticmethod
+    def cabeceras_condicionales(meta):
+        '''
+        :param meta: dict - Metadatos de la entrada.
+        :return: dict - Cabeceras If-None-Match / If-Modified-Since para revalidar la entrada.
+        '''
+        cabeceras = {}
+        if meta.get('etag'):
+            cabeceras['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            cabeceras['If-Modified-Since'] = meta['last_modified']
+        return cabeceras
+
+    def guardar(self, url, estado, cabeceras, cuerpo):
+        '''
+        Guarda la respuesta de una URL, sustituyendo la entrada anterior si existía.
+        :param url: str - URL completa de la petición.
+        :param estado: int - Código de estado de la respuesta.
+        :param cabeceras: Mapping - Cabeceras de la respuesta.
+        :param cuerpo: bytes - Cuerpo de la respuesta ya descomprimido.
+        :return: None
+        '''
+        clave = self.clave(url)
+        ruta_cuerpo, ruta_meta = self._rutas(clave)
+        meta = {
+            'url': url,
+            'estado': estado,
+            'cabeceras': {k: v for k, v in cabeceras.items() if k.lower() not in CABECERAS_EXCLUIDAS},
+            'etag': cabeceras.get('ETag'),
+            'last_modified': cabeceras.get('Last-Modified'),
+            'guardado': time.time(),
+        }
+        with self._candado:
+            anterior = self._tamano_entrada(clave)
+            # Escritura atómica para que otro hilo nunca lea una entrada a medias
+            for ruta, datos in ((ruta_cuerpo, cuerpo), (ruta_meta, json.dumps(meta).encode('utf-8'))):
+                temporal = f"{ruta}.{threading.get_ident()}.tmp"
+                with open(temporal, 'wb') as fichero:
+                    fichero.write(datos)
+                os.replace(temporal, ruta)
+            self._tamano += self._tamano_entrada(clave) - anterior
+            if self._tamano > self.tamano_maximo:
+                self._podar()
+
+    def refrescar(self, url, meta):
+        '''
+        Renueva la fecha de una entrada después de que el servidor haya respondido 304 Not Modified.
+        :param url: str - URL completa de la petición.
+        :param meta: dict - Metadatos de la entrada.
+        :return: None
+        '''
+        meta['guardado'] = time.time()
+        clave = self.clave(url)
+        ruta_cuerpo, ruta_meta = self._rutas(clave)
+        with self._candado:
+            # Si otro hilo ha podado la entrada no se crean unos metadatos sin cuerpo
+            if not os.path.exists(ruta_cuerpo):
+                return
+            anterior = self._tamano_entrada(clave)
+            temporal = f"{ruta_meta}.{threading.get_ident()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as fichero:
+                json.dump(meta, fichero)
+            os.replace(temporal, ruta_meta)
+            self._tamano += self._tamano_entrada(clave) - anterior
+
+    def _podar(self):
+        # Elimina las entradas menos usadas hasta quedar por debajo del 90% del máximo
+        objetivo = self.tamano_maximo * 0.9
+        entradas = []
+        for clave in self._claves():
+            try:
+                entradas.append((os.path.getmtime(self._rutas(clave)[1]), clave))
+            except OSError:
+                pass
+        for _, clave in sorted(entradas):
+            if self._tamano <= objetivo:
+                break
+            tamano = self._tamano_entrada(clave)
+            for ruta in self._rutas(clave):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            self._tamano -= tamano
+
+    def vaciar(self):
+        '''
+        Elimina todas las entradas de la caché.
+        :return: None
+        '''
+        with self._candado:
+            for clave in self._claves():
+                for ruta in self._rutas(clave):
+                    try:
+                        os.remove(ruta)
+                    except OSError:
+                        pass
+            self._tamano = 0
+
+
+_candado = threading.Lock()
+_cache = None
+activada = True
+
+
+def obtener_cache():
+    '''
+    Devuelve la caché compartida por todas las funciones de descarga, creándola la primera vez.
+    :return: CacheHTTP - La caché compartida, o None si está desactivada.
+    '''
+    global _cache
+    if not activada:
+        return None
+    with _candado:
+        if _cache is None:
+            _cache = CacheHTTP(Utils.ruta_datos('cache'), TTL, TAMANO_MAXIMO)
+        return _cache
+
+
+def configurar(activar=None, ttl=None, tamano_maximo=None, directorio=None):
+    '''
+    Cambia la configuración de la caché compartida.
+    :param activar: bool - Activa o desactiva la caché.
+    :param ttl: float - Segundos durante los que una entrada se sirve sin consultar al servidor.
+    :param tamano_maximo: int - Tamaño máximo en bytes de la caché.
+    :param directorio: str - Directorio donde se guardan las entradas.
+    :return: None
+    '''
+    global _cache, activada, TTL, TAMANO_MAXIMO
+    with _candado:
+        if activar is not None:
+            activada = activar
+        if ttl is not None:
+            TTL = ttl
+        if tamano_maximo is not None:
+            TAMANO_MAXIMO = tamano_maximo
+        if directorio is not None or _cache is not None:
+            _cache = CacheHTTP(directorio or _cache.directorio, TTL, TAMANO_MAXIMO)
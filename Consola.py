@@ -0,0 +1,306 @@
+'''
+Punto de entrada por consola para ejecutar los scrapers sin interfaz gráfica, por ejemplo desde cron:
+
+    python -m Consola arxiv "deep learning" --max 500 --salida arxiv.jsonl
+    python -m Consola arxiv "graph neural networks" --max 5000 --salida arxiv.parquet --anadir
+    python -m Consola arxiv-oai cs --desde 2024-01-01 --salida cs_2024.jsonl --anadir
+    python -m Consola pubmed --consultas consultas.txt --hilos 4 --formato csv --salida pubmed.csv
+    python -m Consola web https://example.org
+    python -m Consola web --consultas urls.txt --hilos 16 --procesos 4 --salida paginas.jsonl
+    python -m Consola rastrear https://example.org --profundidad 2 --ambito dominio --max-paginas 2000
+    python -m Consola acm
+    python -m Consola tnnls
+    python -m Consola tableros --consultas revistas.txt --hilos 8 --formato csv --salida boards.csv
+    python -m Consola cambios --consultas revistas.txt --salida cambios.jsonl
+    python -m Consola biblioteca "graph neural" --en arxiv --desde 2020 --formato csv
+    python -m Consola biblioteca "protein folding" --deduplicar --limite 500
+    python -m Consola pubmed "crispr" --max 2000 --metricas --puerto-metricas 9100
+    python -m Consola arxiv "graph neural networks" --solo-nuevos --salida novedades.jsonl --anadir
+    python -m Consola pubmed --solo-nuevos
+
+Nunca importa tkinter ni PIL, por lo que funciona en servidores sin pantalla.
+'''
+import argparse
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Exportar import FORMATOS, abrir_exportador
+
+def ejecutar_novedades(consulta, argumentos):
+    from Suscripciones import novedades
+    if argumentos.sin_indice:
+        import Indice
+        Indice.configurar(activar=False)
+    # Un refresco recorre toda su ventana: --max no se aplica, porque los artículos que se quedaran sin pedir no llegarían nunca
+    return novedades(argumentos.fuente, consulta)
+
+
+def ejecutar_arxiv(consulta, argumentos):
+    from Arxiv import harvestear_arxiv, scrapear_arxiv
+    if argumentos.solo_nuevos:
+        return ejecutar_novedades(consulta, argumentos)
+    if argumentos.sin_indice:
+        import Indice
+        Indice.configurar(activar=False)
+    # Con --max se pagina y los resultados se escriben según llega cada página
+    return harvestear_arxiv(consulta, argumentos.max) if argumentos.max else scrapear_arxiv(consulta)
+
+
+def ejecutar_arxiv_oai(consulta, argumentos):
+    from Arxiv import harvestear_arxiv_oai
+    if argumentos.sin_indice:
+        import Indice
+        Indice.configurar(activar=False)
+    # Cada consulta es un set de OAI-PMH ('cs', 'math', 'physics:hep-th'...); una consulta vacía es todo arXiv.
+    # Si una ejecución anterior con los mismos filtros se interrumpió, se continúa desde su último token
+    return harvestear_arxiv_oai(argumentos.desde, argumentos.hasta, consulta or None, argumentos.max,
+                                reanudar=not argumentos.reiniciar)
+
+
+def ejecutar_pubmed(consulta, argumentos):
+    from Pubmed import harvestear_pubmed
+    if argumentos.solo_nuevos:
+        return ejecutar_novedades(consulta, argumentos)
+    if argumentos.sin_indice:
+        import Indice
+        Indice.configurar(activar=False)
+    return harvestear_pubmed(consulta, argumentos.max or 100)
+
+
+def ejecutar_web(consulta, argumentos):
+    from Scraper import scrapear_web
+    data = scrapear_web(consulta)
+    # scrapear_web devuelve el mensaje de error como texto
+    if isinstance(data, str):
+        raise RuntimeError(data)
+    return [data]
+
+
+def ejecutar_rastrear(consulta, argumentos):
+    from Rastreador import rastrear_web
+    # Generador: las páginas se escriben según se descargan
+    return rastrear_web(consulta, argumentos.profundidad, argumentos.ambito, argumentos.max_paginas,
+                        concurrencia=argumentos.concurrencia, retardo_host=argumentos.retardo,
+                        respetar_robots=not argumentos.ignorar_robots)
+
+
+def ejecutar_acm(consulta, argumentos):
+    from Scraper_ACM import scrapear_ACM
+    journal_name, datos = scrapear_ACM(consulta)
+    return [{**dato, 'revista': journal_name} for dato in datos]
+
+
+def ejecutar_tnnls(consulta, argumentos):
+    from Scraper_TNNLS import scrapear_TNNLS
+    journal_name, datos = scrapear_TNNLS(consulta)
+    return [{**dato, 'revista': journal_name} for dato in datos]
+
+
+def ejecutar_tableros(consulta, argumentos):
+    from Tableros import cargar_perfiles, scrapear_tablero
+    return scrapear_tablero(consulta, cargar_perfiles(argumentos.perfiles))
+
+
+_almacen = None
+_candado_almacen = threading.Lock()
+
+
+def ejecutar_cambios(consulta, argumentos):
+    from Instantaneas import AlmacenInstantaneas, refrescar_tablero
+    from Tableros import cargar_perfiles
+    global _almacen
+    # Un único almacén de instantáneas compartido por todas las consultas
+    with _candado_almacen:
+        if _almacen is None:
+            _almacen = AlmacenInstantaneas(argumentos.base_datos)
+    return refrescar_tablero(consulta, _almacen, cargar_perfiles(argumentos.perfiles))
+
+
+def ejecutar_biblioteca(consulta, argumentos):
+    import Indice
+    # Búsqueda en el índice local de artículos ya descargados, sin conexión
+    resultados = Indice.obtener_indice().buscar(consulta, argumentos.en, argumentos.desde, argumentos.hasta,
+                                                argumentos.categoria, argumentos.limite)
+    if argumentos.deduplicar:
+        from Deduplicar import deduplicar
+        return deduplicar(resultados)
+    return resultados
+
+
+FUENTES = {
+    'arxiv': (ejecutar_arxiv, 'Búsqueda en arXiv'),
+    'arxiv-oai': (ejecutar_arxiv_oai, 'Descarga masiva de arXiv por categoría o fechas con OAI-PMH'),
+    'pubmed': (ejecutar_pubmed, 'Búsqueda en PubMed'),
+    'web': (ejecutar_web, 'Scrapeo de páginas web'),
+    'rastrear': (ejecutar_rastrear, 'Rastreo de un sitio web siguiendo sus enlaces'),
+    'acm': (ejecutar_acm, 'Editorial board de ACM'),
+    'tnnls': (ejecutar_tnnls, 'Editorial board de TNNLS'),
+    'tableros': (ejecutar_tableros, 'Editorial boards de varias revistas según los perfiles de Tableros'),
+    'cambios': (ejecutar_cambios, 'Cambios en los editorial boards desde la última ejecución'),
+    'biblioteca': (ejecutar_biblioteca, 'Búsqueda en el índice local de artículos de arXiv y PubMed ya descargados'),
+}
+
+
+def ejecutar_en_tuberia(consultas, argumentos, escritor):
+    '''
+    Ejecuta las consultas con Tuberia: las descargas en --hilos hilos y la extracción en --procesos procesos.
+    :param consultas: list - Consultas (o URLs) a ejecutar.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :param escritor: Exportador - Exportador en el que se escriben las filas.
+    :return: int - Código de salida: 0 si todas las consultas terminaron bien, 1 si alguna falló.
+    '''
+    from Tuberia import procesar
+    if getattr(argumentos, 'sin_indice', False):
+        import Indice
+        Indice.configurar(activar=False)
+    totales = dict.fromkeys(consultas, 0)
+    errores = {}
+    for consulta, resultados, error in procesar(argumentos.fuente, consultas, getattr(argumentos, 'max', None),
+                                                argumentos.hilos, argumentos.procesos or None):
+        if error is not None:
+            errores[consulta] = error
+            continue
+        for fila in resultados:
+            escritor.escribir({'consulta': consulta, **fila})
+        totales[consulta] += len(resultados)
+    for consulta, total in totales.items():
+        if consulta in errores:
+            print(f"Error en '{consulta}': {errores[consulta]}", file=sys.stderr)
+        else:
+            print(f"'{consulta}': {total} resultados", file=sys.stderr)
+    return 1 if errores else 0
+
+
+def leer_consultas(argumentos):
+    '''
+    Reúne las consultas indicadas en la línea de comandos y en el fichero de consultas.
+    :param argumentos: argparse.Namespace - Argumentos de la línea de comandos.
+    :return: list - Consultas (o URLs) a ejecutar.
+    '''
+    consultas = list(argumentos.consultas)
+    if argumentos.fichero:
+        with open(argumentos.fichero, encoding='utf-8') as fichero:
+            # Una consulta por línea, ignorando líneas vacías y comentarios
+            consultas.extend(linea.strip() for linea in fichero if linea.strip() and not linea.lstrip().startswith('#'))
+    if not consultas and getattr(argumentos, 'solo_nuevos', False):
+        # Sin consultas se refrescan todas las guardadas de la fuente
+        from Suscripciones import obtener_almacen
+        consultas.extend(suscripcion['consulta'] for suscripcion in obtener_almacen().suscripciones(argumentos.fuente))
+    if not consultas and argumentos.fuente == 'arxiv-oai':
+        # Sin set se descarga todo arXiv
+        consultas.append('')
+    if not consultas and argumentos.fuente == 'acm':
+        from Scraper_ACM import URL_ACM
+        consultas.append(URL_ACM)
+    if not consultas and argumentos.fuente == 'tnnls':
+        from Scraper_TNNLS import URL_TNNLS
+        consultas.append(URL_TNNLS)
+    return consultas
+
+
+def crear_parser():
+    from Tuberia import FUENTES as FUENTES_TUBERIA
+    parser = argparse.ArgumentParser(prog='python -m Consola', description='Ejecuta los scrapers de ScienceScraper sin interfaz gráfica.')
+    subparsers = parser.add_subparsers(dest='fuente', required=True)
+    for nombre, (_, ayuda) in FUENTES.items():
+        sub = subparsers.add_parser(nombre, help=ayuda)
+        sub.add_argument('consultas', nargs='*', help='Consultas o URLs a scrapear')
+        sub.add_argument('--consultas', dest='fichero', metavar='FICHERO', help='Fichero con una consulta o URL por línea')
+        sub.add_argument('--hilos', type=int, default=4, help='Número de consultas ejecutadas en paralelo')
+        sub.add_argument('--salida', help='Fichero de salida. Por defecto la salida estándar')
+        sub.add_argument('--formato', choices=FORMATOS, help='Formato de salida. Por defecto según la extensión de --salida, o jsonl')
+        sub.add_argument('--anadir', action='store_true', help='Añade los resultados al final del fichero de salida si ya existe')
+        sub.add_argument('--metricas', nargs='?', const='', metavar='FICHERO',
+                         help='Mide cada operación, la escribe en FICHERO (por defecto metricas.jsonl del directorio de datos) y muestra un resumen al terminar')
+        sub.add_argument('--puerto-metricas', type=int, metavar='PUERTO',
+                         help='Publica las métricas en formato Prometheus en http://127.0.0.1:PUERTO/metrics mientras dura la ejecución')
+        if nombre in ('arxiv', 'arxiv-oai', 'pubmed'):
+            sub.add_argument('--max', type=int, default=None, help='Número máximo de resultados por consulta')
+            sub.add_argument('--sin-indice', action='store_true', help='No guarda los resultados en el índice local')
+        if nombre in ('arxiv', 'pubmed'):
+            sub.add_argument('--solo-nuevos', action='store_true',
+                             help='Guarda las consultas y devuelve solo los artículos nuevos desde la ejecución anterior, sin límite de --max; sin consultas refresca todas las guardadas')
+        if nombre == 'arxiv-oai':
+            sub.add_argument('--desde', help='Fecha mínima de la última modificación del registro (AAAA-MM-DD)')
+            sub.add_argument('--hasta', help='Fecha máxima de la última modificación del registro (AAAA-MM-DD)')
+            sub.add_argument('--reiniciar', action='store_true', help='Empieza desde el principio aunque haya una descarga interrumpida con los mismos filtros')
+        if nombre in FUENTES_TUBERIA:
+            sub.add_argument('--procesos', type=int, nargs='?', const=0, metavar='N',
+                             help='Separa las descargas (en --hilos hilos) de la extracción, que se hace en N procesos (por defecto uno por núcleo)')
+        if nombre in ('tableros', 'cambios'):
+            sub.add_argument('--perfiles', help='Fichero JSON con perfiles de editorial board adicionales')
+        if nombre == 'cambios':
+            sub.add_argument('--base-datos', help='Fichero SQLite de instantáneas. Por defecto el del directorio de datos')
+        if nombre == 'biblioteca':
+            sub.add_argument('--en', choices=['arxiv', 'pubmed'], help='Busca solo en los artículos de una fuente')
+            sub.add_argument('--desde', help='Fecha mínima de publicación (AAAA, AAAA-MM o AAAA-MM-DD)')
+            sub.add_argument('--hasta', help='Fecha máxima de publicación (AAAA, AAAA-MM o AAAA-MM-DD)')
+            sub.add_argument('--categoria', help='Categoría de arXiv, por ejemplo cs.LG')
+            sub.add_argument('--limite', type=int, default=50, help='Número máximo de resultados por consulta')
+            sub.add_argument('--deduplicar', action='store_true', help='Fusiona los artículos que aparecen en arXiv y en PubMed')
+        if nombre == 'rastrear':
+            sub.add_argument('--profundidad', type=int, default=1, help='Saltos de enlace a seguir desde cada URL')
+            sub.add_argument('--ambito', choices=['host', 'dominio', 'todo'], default='dominio', help='Enlaces que se siguen')
+            sub.add_argument('--max-paginas', type=int, default=1000, help='Número máximo de páginas por URL inicial')
+            sub.add_argument('--concurrencia', type=int, default=8, help='Descargas simultáneas por URL inicial')
+            sub.add_argument('--retardo', type=float, default=0.5, help='Segundos mínimos entre peticiones a un mismo host')
+            sub.add_argument('--ignorar-robots', action='store_true', help='No consulta robots.txt')
+    return parser
+
+
+def main(argv=None):
+    '''
+    Ejecuta las consultas en paralelo y escribe los resultados según se obtienen.
+    :param argv: list - Argumentos de la línea de comandos. Por defecto sys.argv.
+    :return: int - Código de salida: 0 si todas las consultas terminaron bien, 1 si alguna falló.
+    '''
+    argumentos = crear_parser().parse_args(argv)
+    consultas = leer_consultas(argumentos)
+    if not consultas:
+        print("Error: no se ha indicado ninguna consulta", file=sys.stderr)
+        return 2
+
+    metricas = argumentos.metricas is not None or argumentos.puerto_metricas
+    if metricas:
+        import Metricas
+        Metricas.configurar(activar=True, ruta=argumentos.metricas or None)
+        if argumentos.puerto_metricas:
+            Metricas.servir(argumentos.puerto_metricas)
+
+    ejecutar, _ = FUENTES[argumentos.fuente]
+    try:
+        escritor = abrir_exportador(argumentos.salida or sys.stdout, argumentos.fuente, argumentos.formato, argumentos.anadir)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    codigo = 0
+    with escritor:
+        if getattr(argumentos, 'procesos', None) is not None and not getattr(argumentos, 'solo_nuevos', False):
+            codigo = ejecutar_en_tuberia(consultas, argumentos, escritor)
+        else:
+            def trabajo(consulta):
+                # Cada hilo escribe sus filas según las obtiene, sin esperar a que acabe la consulta
+                total = 0
+                for fila in ejecutar(consulta, argumentos):
+                    escritor.escribir({'consulta': consulta, **fila})
+                    total += 1
+                return total
+
+            with ThreadPoolExecutor(max_workers=max(1, argumentos.hilos)) as ejecutor:
+                futuros = {ejecutor.submit(trabajo, consulta): consulta for consulta in consultas}
+                for futuro in as_completed(futuros):
+                    consulta = futuros[futuro]
+                    try:
+                        total = futuro.result()
+                    except Exception as e:
+                        print(f"Error en '{consulta}': {e}", file=sys.stderr)
+                        codigo = 1
+                        continue
+                    print(f"'{consulta}': {total} resultados", file=sys.stderr)
+    if metricas:
+        print(Metricas.resumen(), file=sys.stderr)
+    return codigo
+
+
+if __name__ == '__main__':
+    sys.exit(main())
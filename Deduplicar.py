@@ -0,0 +1,273 @@
+'''
+Deduplicación de artículos de arXiv y PubMed. Un mismo artículo suele aparecer en las dos fuentes con el
+título escrito de forma algo distinta y los autores en otro formato ('Ana Pérez' en arXiv, 'Pérez A' en
+PubMed). Los candidatos a duplicado se buscan sin comparar todos los pares:
+
+  - Bloques exactos: mismo DOI, PMID o ID de arXiv.
+  - MinHash/LSH sobre las palabras del título: cada artículo se resume en una firma MinHash de una sola
+    permutación (con densificación), que se divide en bandas; dos artículos son candidatos si coinciden en
+    alguna banda.
+
+Cada par candidato se confirma comparando los títulos (Jaccard) y los apellidos de los autores, y los
+grupos de duplicados se fusionan en un único registro canónico.
+'''
+import random
+import re
+import unicodedata
+import zlib
+
+# Parámetros de MinHash/LSH: BANDAS * FILAS valores por firma
+BANDAS = 8
+FILAS = 3
+VALORES = BANDAS * FILAS
+# Similitud mínima de los títulos (Jaccard de sus palabras) para considerar dos artículos el mismo
+UMBRAL_TITULO = 0.8
+# Proporción mínima de apellidos comunes, sobre la lista de autores más corta
+UMBRAL_AUTORES = 0.5
+# Los cubos de LSH con más artículos que este corresponden a títulos genéricos y no se comparan
+MAX_CUBO = 100
+PALABRAS_VACIAS = {'a', 'an', 'the', 'of', 'for', 'and', 'in', 'on', 'with', 'to', 'by', 'from', 'at', 'via', 'using'}
+# Campos que al fusionar conservan todos los valores distintos, separados por comas
+CAMPOS_UNIDOS = ('fuente', 'identificador', 'link', 'consulta')
+
+_MASCARA = (1 << 61) - 1
+# Constante impar con la que se mezclan los bits del CRC32 de cada palabra
+_MEZCLA = 0x9E3779B97F4A7C15
+
+
+def _orden_sondeo(semilla=0):
+    # Para cada cubo, el orden fijo (y distinto para cada cubo) en que se buscan cubos no vacíos al densificar
+    rnd = random.Random(semilla)
+    ordenes = []
+    for cubo in range(VALORES):
+        otros = [otro for otro in range(VALORES) if otro != cubo]
+        rnd.shuffle(otros)
+        ordenes.append(otros)
+    return ordenes
+
+
+_SONDEO = _orden_sondeo()
+# Valor de un cubo vacío, mayor que cualquier valor real
+_VACIO = _MASCARA + 1
+
+
+_MARCAS = re.compile(r'[\u0300-\u036f]')
+_VERSION_ARXIV = re.compile(r'v\d+$')
+_PALABRA = re.compile(r'[a-z0-9]+')
+
+
+def _sin_tildes(texto):
+    if texto.isascii():
+        return texto
+    return _MARCAS.sub('', unicodedata.normalize('NFKD', texto))
+
+
+def normalizar_titulo(titulo):
+    '''
+    :param titulo: str - Título del artículo.
+    :return: str - Título sin tildes, en minúsculas, sin puntuación y con los espacios normalizados.
+    '''
+    return ' '.join(_PALABRA.findall(_sin_tildes(titulo or '').casefold()))
+
+
+def palabras_titulo(titulo):
+    '''
+    :param titulo: str - Título del artículo.
+    :return: list - Palabras significativas del título normalizado, en orden.
+    '''
+    return [palabra for palabra in _PALABRA.findall(_sin_tildes(titulo or '').casefold()) if palabra not in PALABRAS_VACIAS]
+
+
+def apellidos(autores):
+    '''
+    Extrae el apellido de cada autor tanto en el formato de arXiv ('Ana van der Berg') como en el de
+    PubMed ('van der Berg A'). Solo se usa la última palabra del apellido, que coincide en ambos.
+    :param autores: str - Autores separados por comas.
+    :return: set - Apellidos normalizados.
+    '''
+    if not autores or autores.startswith('No hay '):
+        return set()
+    resultado = set()
+    for autor in _sin_tildes(autores).split(','):
+        palabras = autor.split()
+        # En PubMed las iniciales van al final en mayúsculas ('Perez AB')
+        if len(palabras) > 1 and len(palabras[-1]) <= 3 and palabras[-1].isupper():
+            palabras.pop()
+        if palabras:
+            resultado.add(palabras[-1].casefold().strip('.-\''))
+    return resultado
+
+
+def firma_minhash(palabras):
+    '''
+    Firma MinHash de una sola permutación: cada palabra se reparte por su hash en uno de VALORES cubos y
+    cada cubo guarda el mínimo. Cada cubo vacío toma el valor del primer cubo no vacío en su propio orden
+    de sondeo, de forma que la probabilidad de que dos firmas coincidan en una posición sigue siendo la
+    similitud de Jaccard y los cubos vacíos de una misma banda no dependen todos de la misma palabra.
+    El hash es estable, por lo que el resultado no cambia entre ejecuciones.
+    :param palabras: iterable - Palabras del título (las repetidas no cambian la firma).
+    :return: list - Firma con VALORES enteros, o None si no hay palabras.
+    '''
+    minimos = [_VACIO] * VALORES
+    for palabra in palabras:
+        valor, cubo = divmod(zlib.crc32(palabra.encode()) * _MEZCLA & _MASCARA, VALORES)
+        if valor < minimos[cubo]:
+            minimos[cubo] = valor
+    if minimos.count(_VACIO) == VALORES:
+        return None
+    if _VACIO in minimos:
+        propios = minimos[:]
+        for cubo in range(VALORES):
+            if propios[cubo] == _VACIO:
+                for otro in _SONDEO[cubo]:
+                    if propios[otro] != _VACIO:
+                        minimos[cubo] = propios[otro]
+                        break
+    return minimos
+
+
+def jaccard(a, b):
+    '''
+    :param a: set - Primer conjunto.
+    :param b: set - Segundo conjunto.
+    :return: float - Similitud de Jaccard entre 0 y 1.
+    '''
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _claves_exactas(registro):
+    # Identificadores que, si coinciden, indican sin más comprobaciones que es el mismo artículo
+    claves = []
+    doi = registro.get('doi')
+    if doi:
+        claves.append(('doi', doi.strip().lower()))
+    if registro.get('pmid'):
+        claves.append(('pmid', registro['pmid']))
+    link = registro.get('link') or ''
+    if 'arxiv.org/abs/' in link:
+        claves.append(('arxiv', _VERSION_ARXIV.sub('', link.rpartition('arxiv.org/abs/')[2])))
+    return claves
+
+
+class _Grupos:
+    '''
+    Union-find sobre los índices de los registros.
+    '''
+
+    def __init__(self, total):
+        self.padre = list(range(total))
+
+    def raiz(self, i):
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+
+    def unir(self, i, j):
+        i, j = self.raiz(i), self.raiz(j)
+        if i != j:
+            self.padre[max(i, j)] = min(i, j)
+
+
+def agrupar(registros, umbral_titulo=UMBRAL_TITULO, umbral_autores=UMBRAL_AUTORES):
+    '''
+    Agrupa los registros que corresponden al mismo artículo.
+    :param registros: list - Resultados de scrapear_arxiv, scrapear_pubmed o del índice local.
+    :param umbral_titulo: float - Similitud mínima de los títulos.
+    :param umbral_autores: float - Proporción mínima de apellidos comunes.
+    :return: list - Grupos de índices de registros, cada uno ordenado y en orden de primera aparición.
+    '''
+    grupos = _Grupos(len(registros))
+    palabras = []
+    exactos = {}
+    cubos = {}
+    for i, registro in enumerate(registros):
+        for clave in _claves_exactas(registro):
+            primero = exactos.setdefault(clave, i)
+            if primero != i:
+                grupos.unir(primero, i)
+        conjunto = set(palabras_titulo(registro.get('titulo')))
+        palabras.append(conjunto)
+        firma = firma_minhash(conjunto)
+        if firma is None:
+            continue
+        for banda in range(BANDAS):
+            cubos.setdefault((banda, *firma[banda * FILAS:(banda + 1) * FILAS]), []).append(i)
+
+    # Los apellidos solo se extraen de los registros que llegan a compararse
+    autores = {}
+
+    def apellidos_de(i):
+        if i not in autores:
+            autores[i] = apellidos(registros[i].get('autores'))
+        return autores[i]
+
+    def mismos_autores(i, j):
+        a, b = apellidos_de(i), apellidos_de(j)
+        if not a or not b:
+            return True
+        return len(a & b) / min(len(a), len(b)) >= umbral_autores
+
+    for cubo in cubos.values():
+        if len(cubo) < 2 or len(cubo) > MAX_CUBO:
+            continue
+        for posicion, i in enumerate(cubo):
+            for j in cubo[posicion + 1:]:
+                # Un par puede coincidir en varias bandas; una vez unido no se vuelve a comparar
+                if grupos.raiz(i) != grupos.raiz(j) and jaccard(palabras[i], palabras[j]) >= umbral_titulo and mismos_autores(i, j):
+                    grupos.unir(i, j)
+
+    resultado = {}
+    for i in range(len(registros)):
+        resultado.setdefault(grupos.raiz(i), []).append(i)
+    return list(resultado.values())
+
+
+def _vacio(valor):
+    return valor is None or valor == '' or (isinstance(valor, str) and valor.startswith('No hay '))
+
+
+def fusionar(registros):
+    '''
+    Fusiona en un registro canónico los registros de un mismo artículo. Se parte del registro más completo;
+    el resumen más largo y la lista de autores con más nombres tienen preferencia, los campos vacíos se
+    rellenan con los de los demás registros y los de CAMPOS_UNIDOS conservan todos sus valores.
+    :param registros: list - Registros del mismo artículo.
+    :return: dict - Registro fusionado, con 'duplicados' igual al número de registros fusionados.
+    '''
+    if len(registros) == 1:
+        return dict(registros[0], duplicados=1)
+    ordenados = sorted(registros, key=lambda r: sum(not _vacio(v) for v in r.values()), reverse=True)
+    fusion = dict(ordenados[0])
+    for registro in ordenados[1:]:
+        for campo, valor in registro.items():
+            if campo not in fusion or (_vacio(fusion[campo]) and not _vacio(valor)):
+                fusion[campo] = valor
+
+    resumenes = [r['resumen'] for r in registros if not _vacio(r.get('resumen'))]
+    if resumenes:
+        fusion['resumen'] = max(resumenes, key=len)
+    listas = [r['autores'] for r in registros if not _vacio(r.get('autores'))]
+    if listas:
+        # A igual número de autores se prefieren los nombres completos de arXiv a las iniciales de PubMed
+        fusion['autores'] = max(listas, key=lambda a: (a.count(',') + 1, len(a)))
+    for campo in CAMPOS_UNIDOS:
+        valores = [str(r[campo]) for r in registros if not _vacio(r.get(campo))]
+        if valores:
+            fusion[campo] = ', '.join(dict.fromkeys(valores))
+    fusion['duplicados'] = len(registros)
+    return fusion
+
+
+def deduplicar(registros, umbral_titulo=UMBRAL_TITULO, umbral_autores=UMBRAL_AUTORES):
+    '''
+    Elimina los duplicados de una lista de resultados de arXiv y PubMed, fusionando cada grupo.
+    :param registros: iterable - Resultados de scrapear_arxiv, scrapear_pubmed o del índice local.
+    :param umbral_titulo: float - Similitud mínima de los títulos.
+    :param umbral_autores: float - Proporción mínima de apellidos comunes.
+    :return: list - Registros fusionados, en el orden en que aparece el primero de cada grupo.
+    '''
+    registros = list(registros)
+    return [fusionar([registros[i] for i in grupo]) for grupo in agrupar(registros, umbral_titulo, umbral_autores)]
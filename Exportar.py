@@ -0,0 +1,271 @@
+'''
+Exportación en streaming de los resultados de cualquier scraper a CSV, JSONL o Parquet. Las filas se escriben
+según llegan, sin reunir antes todos los resultados en memoria, con un esquema fijo de columnas por fuente
+y con la opción de añadirlas al final de un fichero ya existente.
+'''
+import csv
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from Registros import serializar
+
+# Columnas de cada fuente, en el orden en que se escriben
+ESQUEMAS = {
+    'arxiv': ['consulta', 'titulo', 'autores', 'resumen', 'link', 'fecha_publicacion', 'categorias', 'comentarios', 'referencia_journal'],
+    'arxiv-oai': ['consulta', 'titulo', 'autores', 'resumen', 'link', 'fecha_publicacion', 'categorias', 'comentarios', 'referencia_journal', 'doi'],
+    'pubmed': ['consulta', 'pmid', 'titulo', 'autores', 'resumen', 'link', 'revista', 'fecha_publicacion', 'doi'],
+    'web': ['consulta', 'titulo', 'parrafos', 'links', 'imagenes'],
+    'rastrear': ['consulta', 'url', 'profundidad', 'titulo', 'parrafos', 'links', 'imagenes'],
+    'acm': ['consulta', 'revista', 'rol', 'nombre', 'afiliacion', 'pais'],
+    'tnnls': ['consulta', 'revista', 'rol', 'nombre', 'afiliacion', 'pais', 'email', 'web'],
+    'tableros': ['consulta', 'url', 'perfil', 'revista', 'rol', 'nombre', 'afiliacion', 'pais', 'email', 'web'],
+    'cambios': ['consulta', 'url', 'revista', 'tipo', 'rol', 'nombre', 'afiliacion', 'pais', 'email', 'web', 'cambios'],
+    'biblioteca': ['consulta', 'fuente', 'identificador', 'fecha', 'titulo', 'autores', 'resumen', 'categorias', 'link', 'duplicados'],
+}
+# Columnas enteras; el resto se guardan como texto
+ENTEROS = {'profundidad'}
+FORMATOS = ('csv', 'jsonl', 'parquet')
+# Filas que se acumulan antes de escribir un grupo de filas en Parquet
+TAMANO_GRUPO_PARQUET = 10000
+
+
+def formato_de(ruta, por_defecto='jsonl'):
+    '''
+    :param ruta: str - Ruta del fichero de salida.
+    :param por_defecto: str - Formato si la extensión no es conocida.
+    :return: str - Formato deducido de la extensión ('csv', 'jsonl' o 'parquet').
+    '''
+    extension = os.path.splitext(ruta or '')[1].lower().lstrip('.')
+    if extension == 'json':
+        return 'jsonl'
+    return extension if extension in FORMATOS else por_defecto
+
+
+def _celda(valor):
+    # Las listas, tuplas y diccionarios (párrafos, links, cambios...) se guardan como JSON dentro de la celda
+    if isinstance(valor, (list, tuple, dict)):
+        return json.dumps(valor, ensure_ascii=False, default=serializar)
+    return valor
+
+
+class Exportador(ABC):
+    '''
+    Escritor de filas con un esquema fijo. Se puede usar desde varios hilos y como gestor de contexto.
+    Las claves de una fila que no están en el esquema se ignoran y las que faltan quedan vacías.
+    Si se sale del contexto por una excepción (por ejemplo TareaCancelada) se cierra con completo=False.
+    '''
+
+    def __init__(self, columnas):
+        '''
+        :param columnas: list - Columnas del esquema.
+        '''
+        self.columnas = list(columnas)
+        self.filas = 0
+        self._candado = threading.Lock()
+
+    def escribir(self, fila):
+        '''
+        Escribe una fila.
+        :param fila: dict - La fila a escribir.
+        :return: None
+        '''
+        fila = [fila.get(columna) for columna in self.columnas]
+        with self._candado:
+            self._escribir(fila)
+            self.filas += 1
+
+    def escribir_todas(self, filas):
+        '''
+        Escribe las filas de un iterable según se van generando.
+        :param filas: iterable - Filas a escribir. Puede ser un generador de resultados aún en curso.
+        :return: int - Número de filas escritas.
+        '''
+        total = 0
+        for fila in filas:
+            self.escribir(fila)
+            total += 1
+        return total
+
+    @abstractmethod
+    def _escribir(self, valores):
+        pass
+
+    def cerrar(self, completo=True):
+        '''
+        :param completo: bool - Si es False la exportación se ha interrumpido.
+        :return: None
+        '''
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar(completo=excepcion[0] is None)
+
+
+class ExportadorCSV(Exportador):
+    '''
+    Exportador a CSV. Los ficheros nuevos se escriben con BOM para que Excel reconozca el UTF-8; al añadir a
+    un fichero existente se comprueba que su cabecera coincide con el esquema.
+    '''
+
+    def __init__(self, flujo, columnas, cabecera=True, cerrar_flujo=True):
+        '''
+        :param flujo: file - Fichero de texto abierto con newline=''.
+        :param columnas: list - Columnas del esquema.
+        :param cabecera: bool - Si es True se escribe la fila de cabecera.
+        :param cerrar_flujo: bool - Si es False el flujo sigue abierto al cerrar el exportador.
+        '''
+        super().__init__(columnas)
+        self.flujo = flujo
+        self.cerrar_flujo = cerrar_flujo
+        self.escritor = csv.writer(flujo)
+        if cabecera:
+            self.escritor.writerow(self.columnas)
+            self.flujo.flush()
+
+    def _escribir(self, valores):
+        self.escritor.writerow([_celda(valor) for valor in valores])
+        self.flujo.flush()
+
+    def cerrar(self, completo=True):
+        if self.cerrar_flujo:
+            self.flujo.close()
+
+
+class ExportadorJSONL(Exportador):
+    '''
+    Exportador a JSON Lines: un objeto JSON por línea con las columnas del esquema.
+    '''
+
+    def __init__(self, flujo, columnas, cerrar_flujo=True):
+        '''
+        :param flujo: file - Fichero de texto abierto.
+        :param columnas: list - Columnas del esquema.
+        :param cerrar_flujo: bool - Si es False el flujo sigue abierto al cerrar el exportador.
+        '''
+        super().__init__(columnas)
+        self.flujo = flujo
+        self.cerrar_flujo = cerrar_flujo
+
+    def _escribir(self, valores):
+        self.flujo.write(json.dumps(dict(zip(self.columnas, valores)), ensure_ascii=False, default=serializar) + '\n')
+        self.flujo.flush()
+
+    def cerrar(self, completo=True):
+        if self.cerrar_flujo:
+            self.flujo.close()
+
+
+class ExportadorParquet(Exportador):
+    '''
+    Exportador a Parquet (requiere pyarrow). Las filas se escriben por grupos de TAMANO_GRUPO_PARQUET, de
+    forma que la memoria usada no depende del número total de filas. Como Parquet no permite añadir a un
+    fichero, para añadir se copian primero sus grupos de filas, uno a uno, a un fichero nuevo.
+    '''
+
+    def __init__(self, ruta, columnas, anadir=False):
+        '''
+        :param ruta: str - Fichero de salida.
+        :param columnas: list - Columnas del esquema.
+        :param anadir: bool - Si es True se conservan las filas que ya tuviera el fichero.
+        '''
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Para exportar a Parquet es necesario instalar pyarrow")
+        super().__init__(columnas)
+        self._pa = pa
+        self.ruta = ruta
+        self.esquema = pa.schema([(c, pa.int64() if c in ENTEROS else pa.string()) for c in self.columnas])
+        self._pendientes = []
+        self._temporal = f"{ruta}.{os.getpid()}.tmp"
+        self.escritor = pq.ParquetWriter(self._temporal, self.esquema)
+        if anadir and os.path.exists(ruta):
+            anterior = pq.ParquetFile(ruta)
+            if anterior.schema_arrow.names != self.columnas:
+                self.escritor.close()
+                os.remove(self._temporal)
+                raise ValueError(f"Las columnas de '{ruta}' no coinciden con las del esquema")
+            for grupo in range(anterior.num_row_groups):
+                self.escritor.write_table(anterior.read_row_group(grupo).cast(self.esquema))
+
+    def _escribir(self, valores):
+        self._pendientes.append([valor if columna in ENTEROS or valor is None else str(_celda(valor))
+                                 for columna, valor in zip(self.columnas, valores)])
+        if len(self._pendientes) >= TAMANO_GRUPO_PARQUET:
+            self._volcar()
+
+    def _volcar(self):
+        if self._pendientes:
+            columnas = list(zip(*self._pendientes))
+            self.escritor.write_table(self._pa.table(dict(zip(self.columnas, columnas)), schema=self.esquema))
+            self._pendientes = []
+
+    def cerrar(self, completo=True):
+        with self._candado:
+            if not completo:
+                # Si la exportación se ha interrumpido se conserva el fichero anterior
+                self.escritor.close()
+                os.remove(self._temporal)
+                return
+            self._volcar()
+            self.escritor.close()
+            # El fichero final solo se sustituye cuando está completo
+            os.replace(self._temporal, self.ruta)
+
+
+def _cabecera_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as fichero:
+        return next(csv.reader(fichero), None)
+
+
+def abrir_exportador(destino, fuente=None, formato=None, anadir=False, columnas=None):
+    '''
+    Abre un exportador para una fuente.
+    :param destino: str or file - Ruta del fichero, o flujo de texto ya abierto (por ejemplo sys.stdout).
+    :param fuente: str - Fuente de los resultados, que determina el esquema (ver ESQUEMAS).
+    :param formato: str - 'csv', 'jsonl' o 'parquet'. Por defecto se deduce de la extensión.
+    :param anadir: bool - Si es True las filas se añaden al final del fichero si ya existe.
+    :param columnas: list - Columnas a usar en lugar del esquema de la fuente.
+    :return: Exportador - El exportador abierto.
+    '''
+    columnas = columnas or ESQUEMAS[fuente]
+    if not isinstance(destino, str):
+        formato = formato or 'jsonl'
+        if formato == 'parquet':
+            raise ValueError("La salida Parquet necesita un fichero")
+        if formato == 'csv':
+            return ExportadorCSV(destino, columnas, cerrar_flujo=False)
+        return ExportadorJSONL(destino, columnas, cerrar_flujo=False)
+
+    formato = formato or formato_de(destino)
+    existe = anadir and os.path.exists(destino) and os.path.getsize(destino) > 0
+    if formato == 'parquet':
+        return ExportadorParquet(destino, columnas, existe)
+    if formato == 'csv':
+        if existe:
+            cabecera = _cabecera_csv(destino)
+            if cabecera != list(columnas):
+                raise ValueError(f"La cabecera de '{destino}' no coincide con las columnas del esquema")
+            return ExportadorCSV(open(destino, 'a', newline='', encoding='utf-8'), columnas, cabecera=False)
+        return ExportadorCSV(open(destino, 'w', newline='', encoding='utf-8-sig'), columnas)
+    return ExportadorJSONL(open(destino, 'a' if existe else 'w', encoding='utf-8'), columnas)
+
+
+def exportar(filas, destino, fuente=None, formato=None, anadir=False, columnas=None):
+    '''
+    Escribe en un fichero las filas de un iterable según se van generando.
+    :param filas: iterable - Filas a exportar, por ejemplo el generador de harvestear_arxiv.
+    :param destino: str or file - Ruta del fichero o flujo de texto.
+    :param fuente: str - Fuente de los resultados (ver ESQUEMAS).
+    :param formato: str - 'csv', 'jsonl' o 'parquet'. Por defecto se deduce de la extensión.
+    :param anadir: bool - Si es True las filas se añaden al final del fichero si ya existe.
+    :param columnas: list - Columnas a usar en lugar del esquema de la fuente.
+    :return: int - Número de filas escritas.
+    '''
+    with abrir_exportador(destino, fuente, formato, anadir, columnas) as exportador:
+        return exportador.escribir_todas(filas)
@@ -0,0 +1,395 @@
+'''
+Páginas sintéticas con la misma estructura que las páginas reales de cada scraper, para los benchmarks.
+Incluyen el ruido habitual de una página real (cabecera, menús, scripts, iconos) alrededor de los datos.
+ServidorFixtures las sirve por HTTP junto con las respuestas de las APIs de arXiv y PubMed, para medir los
+scrapers completos sin depender de las páginas reales.
+'''
+import json
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+# Páginas y respuestas guardadas de los sitios reales
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+PAISES = ['Spain', 'USA', 'China', 'Germany', 'United Kingdom', 'Japan', 'Italy', 'Canada', 'France', 'Australia']
+INSTITUCIONES = ['University of {}', 'Institute of Technology of {}', '{} Research Center', 'National Laboratory of {}']
+CIUDADES = ['Madrid', 'Boston', 'Beijing', 'Munich', 'Oxford', 'Tokyo', 'Milan', 'Toronto', 'Paris', 'Sydney']
+# Registros por página de las respuestas OAI-PMH (arXiv devuelve unos pocos cientos)
+TAMANO_PAGINA_OAI = 100
+STATUS_BORRADO = ' status="deleted"'
+PALABRAS = ('learning neural network model data system method analysis deep graph optimization '
+            'robust adaptive control signal image language training inference scalable').split()
+
+
+def _nombre(rnd, i):
+    return f"{rnd.choice(['Ana', 'Luis', 'Wei', 'John', 'Maria', 'Kenji', 'Sara', 'Paul'])} Member{i}"
+
+
+def _institucion(rnd):
+    return rnd.choice(INSTITUCIONES).format(rnd.choice(CIUDADES))
+
+
+def _frase(rnd, palabras):
+    return ' '.join(rnd.choice(PALABRAS) for _ in range(palabras)).capitalize() + '.'
+
+
+def _ruido(rnd, cantidad):
+    # Bloques de navegación, scripts e iconos que no contienen datos
+    partes = []
+    for i in range(cantidad):
+        partes.append(f'<div class="nav-block"><ul>{"".join(f"<li><a href=/menu/{i}/{j}>Menu {j}</a></li>" for j in range(8))}</ul>'
+                      f'<svg class="icon"><path d="M0 0L10 10"/></svg><script>var x{i} = {i};</script></div>')
+    return ''.join(partes)
+
+
+def _documento(titulo, cuerpo, rnd):
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{titulo}</title>'
+            f'<style>.nav-block {{ display: none; }}</style><script src="/app.js"></script></head>'
+            f'<body><header>{_ruido(rnd, 20)}</header><main>{cuerpo}</main><footer>{_ruido(rnd, 10)}</footer></body></html>')
+
+
+def pagina_web(parrafos=500, semilla=0):
+    '''
+    :param parrafos: int - Número de párrafos de la página.
+    :param semilla: int - Semilla para que la página sea siempre la misma.
+    :return: str - HTML de una página web genérica con párrafos, enlaces e imágenes.
+    '''
+    rnd = random.Random(semilla)
+    cuerpo = []
+    for i in range(parrafos):
+        cuerpo.append(f'<div class="section"><h2>Section {i}</h2><p>{_frase(rnd, 40)} <a href="/articulo/{i}">Artículo {i}</a></p>'
+                      f'<div class="card"><span class="badge">{i}</span><img src="/img/{i}.png" alt="Imagen {i}"></div></div>')
+    return _documento('Página de prueba', ''.join(cuerpo), rnd)
+
+
+def pagina_acm(miembros=500, semilla=0):
+    '''
+    :param miembros: int - Número de miembros del editorial board.
+    :param semilla: int - Semilla para que la página sea siempre la misma.
+    :return: str - HTML con la estructura del editorial board de ACM.
+    '''
+    rnd = random.Random(semilla)
+    roles = ['Editor-in-Chief', 'Associate Editors', 'Advisory Board', 'Emeritus Editors']
+    por_rol = max(1, miembros // len(roles))
+    cuerpo = ['<h1 class="title">ACM Journal on Emerging Technologies in Computing Systems</h1>']
+    contador = 0
+    for rol in roles:
+        cuerpo.append(f'<div class="board-section"><h3 class="section__title">{rol}</h3><ul class="rlist">')
+        for _ in range(por_rol):
+            cuerpo.append(f'<li><div class="item-meta"><div class="item-meta__image"><img src="/avatar/{contador}.jpg" alt=""></div>'
+                          f'<div class="item-meta__info"><h4>{_nombre(rnd, contador)}</h4><p>{_institucion(rnd)}</p>'
+                          f'<span>{rnd.choice(PAISES)}</span></div></div></li>')
+            contador += 1
+        cuerpo.append('</ul></div>')
+    return _documento('Editorial Board', ''.join(cuerpo), rnd)
+
+
+def pagina_tnnls(miembros=500, semilla=0, incompletos=0.15):
+    '''
+    Las tres partes de la página de TNNLS: el Editor-in-Chief, las secciones h2 con tablas y párrafos, y la
+    lista final de fichas por rol, en la que algunos campos faltan.
+    :param miembros: int - Número aproximado de miembros del editorial board.
+    :param semilla: int - Semilla para que la página sea siempre la misma.
+    :param incompletos: float - Probabilidad de que falte cada campo de una ficha de la lista final.
+    :return: str - HTML con la estructura del editorial board de TNNLS.
+    '''
+    rnd = random.Random(semilla)
+    cuerpo = ['<h1>IEEE Transactions on Neural Networks and Learning Systems</h1>',
+              '<h2 style="text-align: center;">Editor-in-Chief</h2>',
+              f'<p style="text-align: center;"><strong>{_nombre(rnd, 0)}</strong><br>Department of Computer Science<br>'
+              f'{_institucion(rnd)}<br>{rnd.choice(PAISES)}<br>eic@example.org</p>']
+    tercio = max(1, miembros // 3)
+    contador = 1
+    for seccion in ('Associate Editors', 'Guest Editors'):
+        cuerpo.append(f'<h2><strong>{seccion}</strong></h2><table><tbody><tr><td>Name</td><td>Affiliation</td><td>Country</td></tr>')
+        for _ in range(tercio // 4):
+            cuerpo.append(f'<tr><td>{_nombre(rnd, contador)}</td><td>{_institucion(rnd)}</td><td>{rnd.choice(PAISES)}</td></tr>')
+            contador += 1
+        cuerpo.append('</tbody></table>')
+        for _ in range(tercio // 4):
+            cuerpo.append(f'<p><span>{_nombre(rnd, contador)}</span><span>Department of Engineering</span>'
+                          f'<span>{_institucion(rnd)}</span><span>{rnd.choice(PAISES)}</span></p>')
+            contador += 1
+        cuerpo.append('<p>Last updated 2024</p>')
+    campos = [('indvlistaffil', lambda: f"Department of Science , {_institucion(rnd)}"),
+              ('indvfulllistaddr', lambda: rnd.choice(PAISES)),
+              ('indvlistemail', lambda: f"member{contador}@example.org"),
+              ('indvlistwebsite', lambda: f"https://example.org/~member{contador}")]
+    for rol in ('Editorial Board', 'Senior Editors', 'Steering Committee'):
+        cuerpo.append(f'<h3 class="roletitle">{rol}</h3><div class="indvlist">')
+        for _ in range(max(1, (miembros - contador) // 3)):
+            cuerpo.append(f'<div class="indvlistitem"><div class="indvlistname">{_nombre(rnd, contador)}</div>')
+            for clase, valor in campos:
+                # Algunos miembros no tienen todos los campos
+                if rnd.random() >= incompletos:
+                    cuerpo.append(f'<div class="{clase}">{valor()}</div>')
+            cuerpo.append('</div>')
+            contador += 1
+        cuerpo.append('</div>')
+    return _documento('TNNLS Editor and Associate Editors', ''.join(cuerpo), rnd)
+
+
+PAGINAS = {
+    'web': pagina_web,
+    'acm': pagina_acm,
+    'tnnls': pagina_tnnls,
+}
+
+
+def articulos(cantidad=1000, duplicados=0.3, semilla=0):
+    '''
+    Resultados sintéticos de arXiv y PubMed en los que una parte de los artículos aparece en las dos fuentes,
+    con el título escrito de otra forma (mayúsculas, puntuación, alguna palabra distinta) y los autores en el
+    formato de cada fuente.
+    :param cantidad: int - Número de artículos distintos.
+    :param duplicados: float - Proporción de artículos que aparecen también en la otra fuente.
+    :param semilla: int - Semilla para que los resultados sean siempre los mismos.
+    :return: list - Resultados mezclados; 'articulo' indica el artículo del que procede cada uno.
+    '''
+    rnd = random.Random(semilla)
+    silabas = ['ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'vi', 'so', 'de', 'pa', 'gri', 'tor', 'ben', 'qua', 'zel', 'mon']
+    vocabulario = list({''.join(rnd.choice(silabas) for _ in range(rnd.randint(2, 4))) for _ in range(5000)})
+    nombres = ['Ana', 'Luis', 'Wei', 'John', 'Maria', 'Kenji', 'Sara', 'Paul', 'Chen', 'Olga']
+    resultados = []
+    for i in range(cantidad):
+        titulo = ' '.join(rnd.choice(vocabulario) for _ in range(rnd.randint(6, 12))).capitalize()
+        autores = [(rnd.choice(nombres), rnd.choice(vocabulario).capitalize()) for _ in range(rnd.randint(1, 6))]
+        fecha = f"{rnd.randint(2015, 2024)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        resultados.append({'articulo': i, 'titulo': titulo, 'autores': ', '.join(f"{n} {a}" for n, a in autores),
+                           'resumen': _frase(rnd, 60), 'link': f"http://arxiv.org/abs/{2000 + i // 10000}.{i % 10000:05d}v1",
+                           'fecha_publicacion': f"{fecha}T00:00:00Z", 'categorias': 'cs.LG', 'comentarios': '', 'referencia_journal': ''})
+        if rnd.random() < duplicados:
+            palabras = titulo.split()
+            if len(palabras) > 8 and rnd.random() < 0.5:
+                palabras[rnd.randrange(len(palabras))] = rnd.choice(vocabulario)
+            titulo_pubmed = ' '.join(palabras).upper() if rnd.random() < 0.3 else ' '.join(palabras) + '.'
+            resultados.append({'articulo': i, 'titulo': titulo_pubmed, 'autores': ', '.join(f"{a} {n[0]}" for n, a in autores),
+                               'resumen': _frase(rnd, 80), 'link': f"https://pubmed.ncbi.nlm.nih.gov/{30000000 + i}/",
+                               'pmid': str(30000000 + i), 'revista': 'Journal of Synthetic Studies',
+                               'fecha_publicacion': f"{fecha[:4]} Jan", 'doi': f"10.1000/sintetico.{i}"})
+    rnd.shuffle(resultados)
+    return resultados
+
+
+def _articulo_api(i, semilla):
+    # Los datos de cada artículo dependen solo de su posición, para poder generar cualquier página suelta
+    rnd = random.Random(semilla * 1000003 + i)
+    return {
+        'titulo': _frase(rnd, rnd.randint(6, 12)).rstrip('.'),
+        'autores': [(rnd.choice(['Ana', 'Luis', 'Wei', 'John', 'Maria', 'Kenji']), f"Author{rnd.randint(1, 5000)}")
+                    for _ in range(rnd.randint(1, 6))],
+        'resumen': _frase(rnd, 150),
+        'fecha': f"{rnd.randint(2015, 2024)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+    }
+
+
+def feed_arxiv(total, inicio=0, cantidad=100, semilla=0):
+    '''
+    :param total: int - Resultados totales de la búsqueda.
+    :param inicio: int - Posición del primer artículo de la página (start).
+    :param cantidad: int - Artículos pedidos (max_results).
+    :param semilla: int - Semilla para que los artículos sean siempre los mismos.
+    :return: str - Página de resultados de la API de arXiv en Atom.
+    '''
+    entradas = []
+    for i in range(inicio, min(total, inicio + cantidad)):
+        articulo = _articulo_api(i, semilla)
+        identificador = f"http://arxiv.org/abs/{2000 + i // 10000}.{i % 10000:05d}v1"
+        autores = ''.join(f"<author><name>{nombre} {apellido}</name></author>" for nombre, apellido in articulo['autores'])
+        entradas.append(f'<entry><id>{identificador}</id><updated>{articulo["fecha"]}T00:00:00Z</updated>'
+                        f'<published>{articulo["fecha"]}T00:00:00Z</published><title>{escape(articulo["titulo"])}</title>'
+                        f'<summary>{escape(articulo["resumen"])}</summary>{autores}<arxiv:comment>10 pages</arxiv:comment>'
+                        f'<link href="{identificador}" rel="alternate" type="text/html"/>'
+                        f'<arxiv:primary_category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>'
+                        f'<category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/></entry>')
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" xmlns:arxiv="http://arxiv.org/schemas/atom">'
+            f'<title>ArXiv Query</title><opensearch:totalResults>{total}</opensearch:totalResults>'
+            f'<opensearch:startIndex>{inicio}</opensearch:startIndex><opensearch:itemsPerPage>{cantidad}</opensearch:itemsPerPage>'
+            f'{"".join(entradas)}</feed>')
+
+
+def oai_arxiv(total, desde=None, hasta=None, token=None, cantidad=TAMANO_PAGINA_OAI, semilla=0):
+    '''
+    :param total: int - Registros del archivo sintético, de los que se devuelven los que están entre desde y hasta.
+    :param desde: str - Fecha mínima (from) en formato AAAA-MM-DD.
+    :param hasta: str - Fecha máxima (until) en formato AAAA-MM-DD.
+    :param token: str - resumptionToken de la página pedida. Indica la posición y los filtros de la lista.
+    :param cantidad: int - Registros por página.
+    :param semilla: int - Semilla para que los artículos sean siempre los mismos.
+    :return: str - Respuesta de ListRecords de OAI-PMH en formato arXiv. Uno de cada 50 registros está borrado.
+    '''
+    inicio = 0
+    if token:
+        try:
+            marca, inicio, desde, hasta = token.split('|')
+            inicio = int(inicio)
+        except ValueError:
+            marca = None
+        if marca != 'fixtures':
+            return _documento_oai('<error code="badResumptionToken">El token no es válido</error>')
+    desde, hasta = desde or None, hasta or None
+    posiciones = range(total)
+    if desde or hasta:
+        posiciones = [i for i in posiciones if (desde or '') <= _articulo_api(i, semilla)['fecha'] <= (hasta or '9999')]
+    if not posiciones:
+        return _documento_oai('<error code="noRecordsMatch">No hay registros</error>')
+    registros = []
+    for i in posiciones[inicio:inicio + cantidad]:
+        articulo = _articulo_api(i, semilla)
+        identificador = f"{2000 + i // 10000}.{i % 10000:05d}"
+        borrado = i % 50 == 49
+        cabecera = (f'<header{STATUS_BORRADO if borrado else ""}><identifier>oai:arXiv.org:{identificador}</identifier>'
+                    f'<datestamp>{articulo["fecha"]}</datestamp><setSpec>cs</setSpec></header>')
+        if borrado:
+            registros.append(f'<record>{cabecera}</record>')
+            continue
+        autores = ''.join(f"<author><keyname>{apellido}</keyname><forenames>{nombre}</forenames></author>"
+                          for nombre, apellido in articulo['autores'])
+        registros.append(f'<record>{cabecera}<metadata><arXiv xmlns="http://arxiv.org/OAI/arXiv/">'
+                         f'<id>{identificador}</id><created>{articulo["fecha"]}</created><authors>{autores}</authors>'
+                         f'<title>{escape(articulo["titulo"])}</title><categories>cs.LG stat.ML</categories>'
+                         f'<comments>10 pages</comments><abstract>  {escape(articulo["resumen"])}\n</abstract>'
+                         f'</arXiv></metadata></record>')
+    siguiente = inicio + cantidad
+    token_siguiente = f"fixtures|{siguiente}|{desde or ''}|{hasta or ''}" if siguiente < len(posiciones) else ''
+    return _documento_oai(f'<ListRecords>{"".join(registros)}<resumptionToken cursor="{inicio}" '
+                          f'completeListSize="{len(posiciones)}">{token_siguiente}</resumptionToken></ListRecords>')
+
+
+def _documento_oai(cuerpo):
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+            f'<responseDate>2024-01-01T00:00:00Z</responseDate><request verb="ListRecords">http://arxiv.org/oai</request>'
+            f'{cuerpo}</OAI-PMH>')
+
+
+def esearch_pubmed(total):
+    '''
+    :param total: int - Resultados totales de la búsqueda.
+    :return: str - Respuesta JSON de esearch con usehistory=y.
+    '''
+    return json.dumps({'header': {'type': 'esearch', 'version': '0.3'},
+                       'esearchresult': {'count': str(total), 'retmax': '0', 'retstart': '0', 'idlist': [],
+                                         'querykey': '1', 'webenv': 'MCID_fixtures'}})
+
+
+def efetch_pubmed(inicio=0, cantidad=500, semilla=0):
+    '''
+    :param inicio: int - Posición del primer artículo del lote (retstart).
+    :param cantidad: int - Artículos del lote (retmax).
+    :param semilla: int - Semilla para que los artículos sean siempre los mismos.
+    :return: str - Respuesta XML de efetch con un PubmedArticle por artículo.
+    '''
+    articulos_xml = []
+    for i in range(inicio, inicio + cantidad):
+        articulo = _articulo_api(i, semilla)
+        anio, mes, dia = articulo['fecha'].split('-')
+        autores = ''.join(f'<Author ValidYN="Y"><LastName>{apellido}</LastName><ForeName>{nombre}</ForeName>'
+                          f'<Initials>{nombre[0]}</Initials></Author>' for nombre, apellido in articulo['autores'])
+        articulos_xml.append(
+            f'<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">{30000000 + i}</PMID><Article>'
+            f'<Journal><Title>Journal of Synthetic Studies</Title><JournalIssue><PubDate><Year>{anio}</Year>'
+            f'<Month>{mes}</Month><Day>{dia}</Day></PubDate></JournalIssue></Journal>'
+            f'<ArticleTitle>{escape(articulo["titulo"])}.</ArticleTitle>'
+            f'<Abstract><AbstractText Label="BACKGROUND">{escape(articulo["resumen"])}</AbstractText></Abstract>'
+            f'<AuthorList>{autores}</AuthorList></Article></MedlineCitation><PubmedData><ArticleIdList>'
+            f'<ArticleId IdType="pubmed">{30000000 + i}</ArticleId><ArticleId IdType="doi">10.1000/sintetico.{i}</ArticleId>'
+            f'</ArticleIdList></PubmedData></PubmedArticle>')
+    return f'<?xml version="1.0" ?>\n<PubmedArticleSet>{"".join(articulos_xml)}</PubmedArticleSet>'
+
+
+def _pagina_guardada(nombre, tamano):
+    if tamano == 'grabada':
+        with open(os.path.join(DIRECTORIO_FIXTURES, f"{nombre}.html"), 'rb') as fichero:
+            return fichero.read()
+    return PAGINAS[nombre](int(tamano)).encode('utf-8')
+
+
+@lru_cache(maxsize=1024)
+def respuesta_fixture(ruta):
+    '''
+    Genera la respuesta a una ruta de ServidorFixtures. Se guarda en memoria para que los benchmarks no
+    midan la generación de las páginas.
+    :param ruta: str - Ruta pedida, con su query string.
+    :return: tuple - Cuerpo de la respuesta en bytes y su Content-Type.
+    '''
+    partes = urlsplit(ruta)
+    parametros = {clave: valores[0] for clave, valores in parse_qs(partes.query).items()}
+    segmentos = partes.path.strip('/').split('/')
+    if segmentos[0] in PAGINAS:
+        return _pagina_guardada(segmentos[0], segmentos[1]), 'text/html; charset=utf-8'
+    if segmentos[0] == 'arxiv':
+        feed = feed_arxiv(int(segmentos[1]), int(parametros.get('start', 0)), int(parametros.get('max_results', 10)))
+        return feed.encode('utf-8'), 'application/atom+xml; charset=utf-8'
+    if segmentos[0] == 'oai':
+        oai = oai_arxiv(int(segmentos[1]), parametros.get('from'), parametros.get('until'), parametros.get('resumptionToken'))
+        return oai.encode('utf-8'), 'text/xml; charset=utf-8'
+    if segmentos[0] == 'eutils' and segmentos[2] == 'esearch.fcgi':
+        return esearch_pubmed(int(segmentos[1])).encode('utf-8'), 'application/json; charset=utf-8'
+    if segmentos[0] == 'eutils' and segmentos[2] == 'efetch.fcgi':
+        inicio = int(parametros.get('retstart', 0))
+        cantidad = min(int(parametros.get('retmax', 20)), int(segmentos[1]) - inicio)
+        return efetch_pubmed(inicio, cantidad).encode('utf-8'), 'text/xml; charset=utf-8'
+    raise KeyError(ruta)
+
+
+class ServidorFixtures:
+    '''
+    Servidor HTTP local que sustituye a los sitios reales en los benchmarks. Rutas:
+
+      /web/<tamaño>, /acm/<tamaño>, /tnnls/<tamaño>   página sintética del tamaño indicado, o la guardada
+                                                      en fixtures si el tamaño es 'grabada'
+      /arxiv/<total>/api/query                        API de arXiv con <total> resultados
+      /oai/<total>                                    OAI-PMH de arXiv (ListRecords) con <total> registros
+      /eutils/<total>/esearch.fcgi, efetch.fcgi       E-utilities de PubMed con <total> resultados
+
+    Las respuestas de la API de arXiv y de efetch se generan según start/max_results y retstart/retmax.
+    Cada respuesta se genera una sola vez (respuesta_fixture) y después se sirve desde memoria.
+    '''
+
+    def __init__(self, latencia=0.0, puerto=0):
+        '''
+        :param latencia: float - Segundos que espera el servidor antes de cada respuesta, como un servidor remoto.
+        :param puerto: int - Puerto en el que se escucha. Con 0 se elige uno libre.
+        '''
+        servidor_fixtures = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                try:
+                    cuerpo, tipo = respuesta_fixture(self.path)
+                except (KeyError, ValueError, OSError):
+                    self.send_error(404)
+                    return
+                if servidor_fixtures.latencia:
+                    time.sleep(servidor_fixtures.latencia)
+                self.send_response(200)
+                self.send_header('Content-Type', tipo)
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.latencia = latencia
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', puerto), Manejador)
+        self._servidor.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._servidor.server_address[1]}"
+        threading.Thread(target=self._servidor.serve_forever, name='fixtures', daemon=True).start()
+
+    def cerrar(self):
+        '''
+        Detiene el servidor.
+        :return: None
+        '''
+        self._servidor.shutdown()
+        self._servidor.server_close()
@@ -0,0 +1,351 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+import Cache
+import Metricas
+import Planificador
+
+# Configuración por defecto de la capa de transporte compartida
+TIMEOUT_CONEXION = 10
+TIMEOUT_LECTURA = 30
+REINTENTOS = 3
+FACTOR_ESPERA = 0.5
+# Los 429 y 503 no se reintentan aquí: los gestiona obtener() a través del planificador de cada host
+ESTADOS_REINTENTO = (500, 502, 504)
+MAX_CONEXIONES_POR_HOST = 4
+MAX_HOSTS = 32
+# Bytes leídos en cada lectura de las descargas por bloques
+TAMANO_BLOQUE = 64 * 1024
+
+# urllib3 solo descomprime brotli si está instalado alguno de sus paquetes
+try:
+    import brotli  # noqa: F401
+    CODIFICACIONES = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        CODIFICACIONES = 'gzip, deflate, br'
+    except ImportError:
+        CODIFICACIONES = 'gzip, deflate'
+
+_candado = threading.Lock()
+_sesion = None
+_semaforos = {}
+
+
+def configurar(timeout_conexion=None, timeout_lectura=None, reintentos=None, factor_espera=None, max_conexiones_por_host=None):
+    '''
+    Cambia la configuración de la capa de transporte. La sesión se vuelve a crear en la siguiente petición.
+    :param timeout_conexion: float - Segundos máximos para establecer la conexión.
+    :param timeout_lectura: float - Segundos máximos de espera entre datos recibidos.
+    :param reintentos: int - Número de reintentos ante errores de conexión o respuestas 500/502/504 (ESTADOS_REINTENTO),
+                             y de veces que _pedir vuelve a pedir turno al planificador del host tras un 429/503.
+    :param factor_espera: float - Factor de espera exponencial entre reintentos.
+    :param max_conexiones_por_host: int - Peticiones simultáneas permitidas contra un mismo host.
+    :return: None
+    '''
+    global TIMEOUT_CONEXION, TIMEOUT_LECTURA, REINTENTOS, FACTOR_ESPERA, MAX_CONEXIONES_POR_HOST, _sesion
+    with _candado:
+        if timeout_conexion is not None:
+            TIMEOUT_CONEXION = timeout_conexion
+        if timeout_lectura is not None:
+            TIMEOUT_LECTURA = timeout_lectura
+        if reintentos is not None:
+            REINTENTOS = reintentos
+        if factor_espera is not None:
+            FACTOR_ESPERA = factor_espera
+        if max_conexiones_por_host is not None:
+            MAX_CONEXIONES_POR_HOST = max_conexiones_por_host
+            _semaforos.clear()
+        if _sesion is not None:
+            _sesion.close()
+        _sesion = None
+
+
+class _ConexionHTTP(HTTPConnection):
+    '''
+    Conexión HTTP que mide en las métricas el tiempo de establecerla (resolución DNS y conexión TCP).
+    '''
+
+    def _new_conn(self):
+        with Metricas.tramo('tcp', host=self.host):
+            return super()._new_conn()
+
+
+class _ConexionHTTPS(HTTPSConnection):
+    '''
+    Conexión HTTPS que mide por separado la resolución DNS y conexión TCP ('tcp') y el tiempo total hasta
+    terminar el handshake TLS ('conexion').
+    '''
+
+    def _new_conn(self):
+        with Metricas.tramo('tcp', host=self.host):
+            return super()._new_conn()
+
+    def connect(self):
+        with Metricas.tramo('conexion', host=self.host):
+            super().connect()
+
+
+class _PoolHTTP(HTTPConnectionPool):
+    ConnectionCls = _ConexionHTTP
+
+
+class _PoolHTTPS(HTTPSConnectionPool):
+    ConnectionCls = _ConexionHTTPS
+
+
+def obtener_sesion():
+    '''
+    Devuelve la sesión compartida, creándola la primera vez. Mantiene las conexiones abiertas (keep-alive)
+    en un pool por host y reintenta con espera exponencial ante errores de conexión y respuestas 5xx.
+    :return: requests.Session - La sesión compartida por todos los scrapers.
+    '''
+    global _sesion
+    with _candado:
+        if _sesion is None:
+            reintentos = Retry(
+                total=REINTENTOS,
+                backoff_factor=FACTOR_ESPERA,
+                status_forcelist=ESTADOS_REINTENTO,
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                respect_retry_after_header=False,
+                raise_on_status=False,
+            )
+            adaptador = HTTPAdapter(pool_connections=MAX_HOSTS, pool_maxsize=MAX_CONEXIONES_POR_HOST, max_retries=reintentos)
+            adaptador.poolmanager.pool_classes_by_scheme = {'http': _PoolHTTP, 'https': _PoolHTTPS}
+            sesion = requests.Session()
+            sesion.mount('http://', adaptador)
+            sesion.mount('https://', adaptador)
+            sesion.headers['Accept-Encoding'] = CODIFICACIONES
+            _sesion = sesion
+        return _sesion
+
+
+@contextmanager
+def _limite_host(host):
+    '''
+    Limita el número de peticiones simultáneas contra un mismo host.
+    :param host: str - Host de la petición.
+    '''
+    with _candado:
+        semaforo = _semaforos.get(host)
+        if semaforo is None:
+            semaforo = _semaforos[host] = threading.BoundedSemaphore(MAX_CONEXIONES_POR_HOST)
+    with semaforo:
+        yield
+
+
+def _respuesta_desde_cache(url, meta, cuerpo):
+    '''
+    Construye una respuesta a partir de una entrada de la caché.
+    :param url: str - URL completa de la petición.
+    :param meta: dict - Metadatos de la entrada.
+    :param cuerpo: bytes - Cuerpo guardado.
+    :return: requests.Response - Respuesta equivalente a la original, con el atributo from_cache a True.
+    '''
+    respuesta = requests.Response()
+    respuesta.status_code = meta['estado']
+    respuesta.reason = 'OK'
+    respuesta.url = url
+    respuesta.headers = CaseInsensitiveDict(meta['cabeceras'])
+    respuesta.encoding = get_encoding_from_headers(respuesta.headers)
+    respuesta._content = cuerpo
+    respuesta.from_cache = True
+    return respuesta
+
+
+def obtener(url, params=None, cabeceras=None, timeout=None, cache=True, ttl=None, max_bytes=None, tipos=None, guardar=True):
+    '''
+    Realiza una petición GET a través de la sesión compartida y descarga el cuerpo completo de la respuesta.
+    Cada petición espera su turno en el planificador del host y los 429/503 se reintentan tras el Retry-After.
+    Si la caché está activa, las respuestas recientes se sirven desde disco sin usar la red y las antiguas
+    se revalidan con If-None-Match / If-Modified-Since, sirviendo el cuerpo guardado si el servidor responde 304.
+    Con max_bytes o tipos el cuerpo se lee por bloques y la descarga se interrumpe en cuanto se sabe que no es válida.
+    :param url: str - La URL a pedir.
+    :param params: dict - Parámetros de la query string.
+    :param cabeceras: dict - Cabeceras adicionales de la petición.
+    :param timeout: float or tuple - Timeout de la petición. Por defecto (TIMEOUT_CONEXION, TIMEOUT_LECTURA).
+    :param cache: bool - Si es False la petición no consulta ni actualiza la caché.
+    :param ttl: float - Segundos de validez de la entrada en caché, en lugar del TTL por defecto.
+    :param max_bytes: int - Tamaño máximo del cuerpo. Si lo supera se lanza DescargaDemasiadoGrande.
+    :param tipos: tuple - Content-Type permitidos en las respuestas 2xx, por ejemplo 'text/html', o prefijos
+                          acabados en '/' como 'text/'. Si no es ninguno se lanza TipoNoPermitido.
+    :param guardar: bool or function - Si es False una respuesta nueva no se guarda en la caché, aunque sí se
+                                       consulta. Si es una función, recibe la respuesta y solo se guarda si
+                                       devuelve True; sirve para no guardar respuestas que pueden llegar vacías
+                                       o incompletas de forma transitoria, como las páginas de las APIs.
+    :return: requests.Response - La respuesta obtenida.
+    '''
+    with Metricas.tramo('http', host=urlsplit(url).netloc) as medida:
+        return _obtener(url, params, cabeceras, timeout, cache, ttl, max_bytes, tipos, guardar, medida)
+
+
+def _pedir(url, params, cabeceras, timeout, por_bloques, max_bytes, tipos, tamano_bloque=TAMANO_BLOQUE):
+    '''
+    Realiza una petición GET esperando el turno del host y reintentando los 429/503. Ante un 429 o un 503 el
+    planificador bloquea el host el tiempo indicado en Retry-After y reduce su tasa, así que basta con volver
+    a pedir el turno. El resultado se registra en el planificador cuando el cuerpo ya se ha leído, de forma
+    que los fallos durante la lectura también cuentan como errores del host.
+    :param url: str - La URL a pedir.
+    :param params: dict - Parámetros de la query string.
+    :param cabeceras: dict - Cabeceras de la petición.
+    :param timeout: float or tuple - Timeout de la petición.
+    :param por_bloques: bool - Si es True el cuerpo se lee por bloques comprobando max_bytes y tipos.
+    :param max_bytes: int - Tamaño máximo del cuerpo, o None.
+    :param tipos: tuple - Content-Type permitidos, o None.
+    :param tamano_bloque: int - Bytes leídos en cada lectura.
+    :return: tuple - Respuesta con el cuerpo ya leído, segundos esperando turno, segundos de la petición y reintentos.
+    '''
+    espera = 0.0
+    for intento in range(REINTENTOS + 1):
+        espera += Planificador.esperar_turno(url)
+        try:
+            with _limite_host(urlsplit(url).netloc):
+                inicio = time.perf_counter()
+                respuesta = obtener_sesion().get(url, params=params, headers=cabeceras, timeout=timeout, stream=por_bloques)
+                # Lee el cuerpo dentro del límite para liberar la conexión al pool
+                if por_bloques:
+                    _leer_cuerpo(respuesta, max_bytes, tipos, tamano_bloque)
+                else:
+                    respuesta.content
+                duracion = time.perf_counter() - inicio
+        except (DescargaDemasiadoGrande, TipoNoPermitido):
+            # El host ha respondido bien: la respuesta es la que no se quiere
+            Planificador.registrar(url, respuesta.status_code, respuesta.headers)
+            raise
+        except requests.RequestException:
+            Planificador.registrar(url, error=True)
+            raise
+        Planificador.registrar(url, respuesta.status_code, respuesta.headers)
+        if respuesta.status_code not in Planificador.ESTADOS_LIMITE:
+            break
+    return respuesta, espera, duracion, intento
+
+
+def _comprobar_respuesta(url, estado, cabeceras, max_bytes, tipos, longitud=None):
+    '''
+    Comprueba el Content-Type y el tamaño de una respuesta antes de leer (o de devolver) su cuerpo.
+    :param url: str - URL de la petición, para el mensaje de error.
+    :param estado: int - Código de estado de la respuesta.
+    :param cabeceras: dict - Cabeceras de la respuesta.
+    :param max_bytes: int - Tamaño máximo del cuerpo, o None.
+    :param tipos: tuple - Content-Type permitidos, o None.
+    :param longitud: int - Tamaño del cuerpo si ya se conoce. Por defecto el de Content-Length.
+    :return: None
+    '''
+    tipo = cabeceras.get('Content-Type', '').split(';')[0].strip().lower()
+    # Las respuestas sin Content-Type se aceptan: muchos servidores no lo envían en sus páginas
+    if tipos and tipo and 200 <= estado < 300 and not any(tipo == t or (t.endswith('/') and tipo.startswith(t)) for t in tipos):
+        raise TipoNoPermitido(f"{url} es de tipo {tipo}")
+    if longitud is None:
+        longitud = cabeceras.get('Content-Length', '')
+        longitud = int(longitud) if longitud.isdigit() else None
+    if max_bytes is not None and longitud is not None and longitud > max_bytes:
+        raise DescargaDemasiadoGrande(f"{url} ocupa {longitud} bytes (máximo {max_bytes})")
+
+
+def _leer_cuerpo(respuesta, max_bytes, tipos, tamano_bloque=TAMANO_BLOQUE):
+    '''
+    Lee por bloques el cuerpo de una respuesta pedida con stream=True y lo deja en respuesta.content.
+    La conexión se cierra si la respuesta no es válida; si se lee entera vuelve al pool.
+    :param respuesta: requests.Response - Respuesta con el cuerpo sin leer.
+    :param max_bytes: int - Tamaño máximo del cuerpo, o None.
+    :param tipos: tuple - Content-Type permitidos, o None.
+    :param tamano_bloque: int - Bytes leídos en cada lectura.
+    :return: int - Bytes leídos.
+    '''
+    try:
+        _comprobar_respuesta(respuesta.url, respuesta.status_code, respuesta.headers, max_bytes, tipos)
+        bloques = []
+        leidos = 0
+        for bloque in respuesta.iter_content(tamano_bloque):
+            leidos += len(bloque)
+            if max_bytes is not None and leidos > max_bytes:
+                raise DescargaDemasiadoGrande(f"{respuesta.url} ocupa más de {max_bytes} bytes")
+            bloques.append(bloque)
+        respuesta._content = b''.join(bloques)
+        return leidos
+    except requests.RequestException as e:
+        e.response = respuesta
+        raise
+    finally:
+        respuesta.close()
+
+
+def _obtener(url, params, cabeceras, timeout, cache, ttl, max_bytes, tipos, guardar, medida):
+    if timeout is None:
+        timeout = (TIMEOUT_CONEXION, TIMEOUT_LECTURA)
+    cache_http = Cache.obtener_cache() if cache else None
+    entrada = None
+    if cache_http is not None:
+        url = requests.Request('GET', url, params=params).prepare().url
+        params = None
+        entrada = cache_http.leer(url)
+        if entrada and cache_http.es_fresca(entrada[0], ttl):
+            medida.anotar(cache='fresca', bytes=len(entrada[1]))
+            _comprobar_respuesta(url, entrada[0]['estado'], CaseInsensitiveDict(entrada[0]['cabeceras']), max_bytes, tipos, len(entrada[1]))
+            return _respuesta_desde_cache(url, *entrada)
+        if entrada:
+            cabeceras = {**(cabeceras or {}), **cache_http.cabeceras_condicionales(entrada[0])}
+
+    por_bloques = max_bytes is not None or tipos is not None
+    respuesta, espera, duracion, intento = _pedir(url, params, cabeceras, timeout, por_bloques, max_bytes, tipos)
+    # elapsed llega hasta recibir las cabeceras; el resto de la petición es la descarga del cuerpo
+    primera_respuesta = respuesta.elapsed.total_seconds()
+    medida.anotar(estado=respuesta.status_code, bytes=len(respuesta.content), espera=round(espera, 6),
+                  primer_byte=round(primera_respuesta, 6), descarga=round(max(0.0, duracion - primera_respuesta), 6),
+                  reintentos=intento)
+
+    if cache_http is not None:
+        if respuesta.status_code == 304 and entrada:
+            medida.anotar(cache='revalidada', bytes=len(entrada[1]))
+            cache_http.refrescar(url, entrada[0])
+            _comprobar_respuesta(url, entrada[0]['estado'], CaseInsensitiveDict(entrada[0]['cabeceras']), max_bytes, tipos, len(entrada[1]))
+            return _respuesta_desde_cache(url, *entrada)
+        if (respuesta.status_code == 200 and 'no-store' not in respuesta.headers.get('Cache-Control', '')
+                and (guardar(respuesta) if callable(guardar) else guardar)):
+            cache_http.guardar(url, respuesta.status_code, respuesta.headers, respuesta.content)
+    return respuesta
+
+
+class DescargaDemasiadoGrande(requests.RequestException):
+    '''
+    La respuesta supera el tamaño máximo permitido en la descarga.
+    '''
+
+
+class TipoNoPermitido(requests.RequestException):
+    '''
+    El Content-Type de la respuesta no es ninguno de los permitidos en la descarga.
+    '''
+
+
+def descargar(url, max_bytes, cabeceras=None, timeout=None, tamano_bloque=TAMANO_BLOQUE, tipos=None):
+    '''
+    Realiza una petición GET leyendo el cuerpo por bloques y la interrumpe en cuanto supera un tamaño
+    máximo, sin llegar a descargar el resto. Los 429/503 se reintentan como en obtener, pero no usa la
+    caché de respuestas.
+    :param url: str - La URL a pedir.
+    :param max_bytes: int - Tamaño máximo del cuerpo en bytes.
+    :param cabeceras: dict - Cabeceras adicionales de la petición.
+    :param timeout: float or tuple - Timeout de la petición. Por defecto (TIMEOUT_CONEXION, TIMEOUT_LECTURA).
+    :param tamano_bloque: int - Bytes leídos en cada lectura.
+    :param tipos: tuple - Content-Type permitidos en las respuestas 2xx (ver obtener). Por defecto cualquiera.
+    :return: requests.Response - La respuesta, con el cuerpo ya leído.
+    '''
+    if timeout is None:
+        timeout = (TIMEOUT_CONEXION, TIMEOUT_LECTURA)
+    with Metricas.tramo('http', host=urlsplit(url).netloc) as medida:
+        respuesta, espera, _, intento = _pedir(url, None, cabeceras, timeout, True, max_bytes, tipos, tamano_bloque)
+        medida.anotar(estado=respuesta.status_code, bytes=len(respuesta.content), espera=round(espera, 6),
+                      primer_byte=round(respuesta.elapsed.total_seconds(), 6), reintentos=intento)
+        return respuesta
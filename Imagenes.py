@@ -0,0 +1,359 @@
+'''
+Descarga, decodificación y caché de las imágenes de las páginas scrapeadas. Las imágenes se descargan en
+segundo plano con un tamaño máximo y se decodifican directamente a la resolución con la que se muestran
+(Image.draft y thumbnail), sin llegar a decodificar nunca la imagen completa si no hace falta. Cada imagen
+se guarda ya reducida en una caché LRU en memoria y en disco, de forma que volver a verla es inmediato.
+'''
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import requests
+import Http
+import Utils
+
+# Tamaño máximo de una imagen descargada
+MAX_BYTES = 10 * 1024 * 1024
+# Content-Type admitidos: cualquier otro se corta al llegar las cabeceras, sin descargar el cuerpo
+TIPOS_IMAGEN = ('image/',)
+# Tamaño máximo de las miniaturas de la galería y de la imagen mostrada en su ventana
+TAMANO_MINIATURA = (160, 160)
+TAMANO_VENTANA = (1024, 768)
+# Memoria máxima, en bytes de píxeles decodificados, de la caché LRU
+MAX_MEMORIA = 64 * 1024 * 1024
+# Tamaño máximo en disco de las imágenes reducidas
+MAX_DISCO = 200 * 1024 * 1024
+# Descargas simultáneas y número máximo de imágenes que se precargan de una página
+HILOS = 4
+MAX_PRECARGA = 100
+# Milisegundos entre dos comprobaciones de las descargas pendientes desde el hilo de Tk
+INTERVALO = 50
+
+
+def reducir(datos, tamano):
+    '''
+    Decodifica una imagen a un tamaño máximo. En JPEG, draft hace que el decodificador ya reduzca la
+    imagen a la escala más cercana, de forma que no se llega a decodificar a resolución completa.
+    :param datos: bytes - Contenido del fichero de imagen.
+    :param tamano: tuple - Ancho y alto máximos.
+    :return: PIL.Image.Image - Imagen reducida, conservando su proporción.
+    '''
+    from PIL import Image
+    imagen = Image.open(BytesIO(datos))
+    imagen.draft('RGB', tamano)
+    if imagen.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        imagen = imagen.convert('RGBA' if 'transparency' in imagen.info or imagen.mode in ('P', 'PA') else 'RGB')
+    imagen.thumbnail(tamano)
+    return imagen
+
+
+def _bytes_imagen(imagen):
+    return imagen.width * imagen.height * len(imagen.getbands())
+
+
+class CacheImagenes:
+    '''
+    Caché de imágenes reducidas en dos niveles: un LRU en memoria limitado por bytes de píxeles y un
+    directorio en disco. Las descargas se hacen en un pool de hilos y cada URL se descarga una sola vez
+    aunque se pida varias veces mientras está en curso; de cada descarga se guardan a la vez la imagen
+    para la ventana y la miniatura.
+    '''
+
+    def __init__(self, directorio=None, max_memoria=MAX_MEMORIA, max_disco=MAX_DISCO, max_bytes=MAX_BYTES, hilos=HILOS):
+        '''
+        :param directorio: str - Directorio de las imágenes reducidas. Por defecto 'imagenes' en el directorio de datos.
+        :param max_memoria: int - Bytes de píxeles máximos en memoria.
+        :param max_disco: int - Tamaño máximo en bytes del directorio.
+        :param max_bytes: int - Tamaño máximo de cada imagen descargada.
+        :param hilos: int - Descargas simultáneas.
+        '''
+        self.directorio = directorio or Utils.ruta_datos('imagenes')
+        os.makedirs(self.directorio, exist_ok=True)
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.max_bytes = max_bytes
+        self._memoria = OrderedDict()
+        self._ocupado = 0
+        self._candado = threading.Lock()
+        self._en_curso = {}
+        self._precargas = []
+        # Bytes ocupados por las imágenes del directorio, para podarlo solo cuando supera el máximo
+        self._candado_disco = threading.Lock()
+        self._disco = sum(tamano for _, tamano, _ in self._entradas_disco())
+        self._ejecutor = ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix='imagenes')
+
+    def _ruta(self, url, tamano):
+        clave = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f"{clave}_{tamano[0]}x{tamano[1]}")
+
+    def _recordar(self, clave, imagen):
+        with self._candado:
+            anterior = self._memoria.pop(clave, None)
+            if anterior is not None:
+                self._ocupado -= _bytes_imagen(anterior)
+            self._memoria[clave] = imagen
+            self._ocupado += _bytes_imagen(imagen)
+            while self._ocupado > self.max_memoria and len(self._memoria) > 1:
+                _, antigua = self._memoria.popitem(last=False)
+                self._ocupado -= _bytes_imagen(antigua)
+
+    def en_memoria(self, url, tamano=TAMANO_VENTANA):
+        '''
+        :param url: str - URL de la imagen.
+        :param tamano: tuple - Tamaño máximo pedido.
+        :return: PIL.Image.Image - La imagen si está en la caché en memoria, o None.
+        '''
+        with self._candado:
+            imagen = self._memoria.get((url, tamano))
+            if imagen is not None:
+                self._memoria.move_to_end((url, tamano))
+            return imagen
+
+    def _leer_disco(self, url, tamano):
+        from PIL import Image
+        ruta = self._ruta(url, tamano)
+        try:
+            with open(ruta, 'rb') as fichero:
+                imagen = Image.open(BytesIO(fichero.read()))
+                imagen.load()
+            # La fecha de modificación marca el último uso para podar el directorio
+            os.utime(ruta)
+        except (OSError, ValueError):
+            return None
+        return imagen
+
+    def _guardar_disco(self, url, tamano, imagen):
+        ruta = self._ruta(url, tamano)
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        try:
+            # JPEG para las fotos y PNG si hay transparencia; el formato se reconoce al leer
+            if imagen.mode in ('RGB', 'L'):
+                imagen.save(temporal, 'JPEG', quality=85)
+            else:
+                imagen.save(temporal, 'PNG')
+            with self._candado_disco:
+                anterior = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+                os.replace(temporal, ruta)
+                self._disco += os.path.getsize(ruta) - anterior
+                if self._disco > self.max_disco:
+                    self._podar_disco()
+        except (OSError, ValueError):
+            # Un fichero a medio escribir no se deja en el directorio
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+
+    def _entradas_disco(self):
+        # Fecha de último uso, tamaño y ruta de cada imagen guardada (sin los temporales en curso)
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.tmp'):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+        return entradas
+
+    def _podar_disco(self):
+        # Elimina las imágenes menos usadas hasta quedar por debajo del 90% del máximo
+        entradas = self._entradas_disco()
+        self._disco = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if self._disco <= self.max_disco * 0.9:
+                break
+            try:
+                os.remove(ruta)
+                self._disco -= tamano
+            except OSError:
+                pass
+
+    def _procesar(self, url, tamano):
+        # Se ejecuta en el pool: primero el disco y, si no está, descarga y reducción a los dos tamaños
+        imagen = self._leer_disco(url, tamano)
+        if imagen is None and tamano != TAMANO_VENTANA:
+            grande = self._leer_disco(url, TAMANO_VENTANA)
+            if grande is not None:
+                imagen = grande.copy()
+                imagen.thumbnail(tamano)
+                self._guardar_disco(url, tamano, imagen)
+        if imagen is None:
+            respuesta = Http.descargar(url, self.max_bytes, tipos=TIPOS_IMAGEN)
+            respuesta.raise_for_status()
+            grande = reducir(respuesta.content, TAMANO_VENTANA)
+            miniatura = grande.copy()
+            miniatura.thumbnail(TAMANO_MINIATURA)
+            for tamano_guardado, reducida in ((TAMANO_VENTANA, grande), (TAMANO_MINIATURA, miniatura)):
+                self._guardar_disco(url, tamano_guardado, reducida)
+                self._recordar((url, tamano_guardado), reducida)
+            if tamano == TAMANO_VENTANA:
+                imagen = grande
+            elif tamano == TAMANO_MINIATURA:
+                imagen = miniatura
+            else:
+                imagen = grande.copy()
+                imagen.thumbnail(tamano)
+        self._recordar((url, tamano), imagen)
+        return imagen
+
+    def pedir(self, url, tamano=TAMANO_VENTANA):
+        '''
+        Pide una imagen reducida en segundo plano.
+        :param url: str - URL de la imagen.
+        :param tamano: tuple - Tamaño máximo.
+        :return: concurrent.futures.Future - Futuro cuyo resultado es la imagen (PIL.Image.Image).
+        '''
+        with self._candado:
+            futuro = self._en_curso.get((url, tamano))
+            if futuro is None:
+                futuro = self._en_curso[(url, tamano)] = self._ejecutor.submit(self._procesar, url, tamano)
+                futuro.add_done_callback(lambda f, clave=(url, tamano): self._terminado(clave, f))
+            return futuro
+
+    def _terminado(self, clave, futuro):
+        with self._candado:
+            if self._en_curso.get(clave) is futuro:
+                del self._en_curso[clave]
+
+    def obtener(self, url, tamano=TAMANO_VENTANA):
+        '''
+        Devuelve una imagen reducida, esperando a que se descargue si no está en caché.
+        :param url: str - URL de la imagen.
+        :param tamano: tuple - Tamaño máximo.
+        :return: PIL.Image.Image - La imagen reducida.
+        '''
+        return self.en_memoria(url, tamano) or self.pedir(url, tamano).result()
+
+    def precargar(self, urls, tamano=TAMANO_MINIATURA, maximo=MAX_PRECARGA):
+        '''
+        Descarga en segundo plano las imágenes de una página para que al mostrarlas ya estén en caché.
+        Las precargas anteriores que aún no han empezado se cancelan.
+        :param urls: iterable - URLs de las imágenes.
+        :param tamano: tuple - Tamaño que se va a mostrar primero.
+        :param maximo: int - Número máximo de imágenes a precargar.
+        :return: list - Futuros de las descargas.
+        '''
+        for futuro in self._precargas:
+            futuro.cancel()
+        self._precargas = [self.pedir(url, tamano) for url in list(dict.fromkeys(urls))[:maximo]
+                           if self.en_memoria(url, tamano) is None]
+        return self._precargas
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+
+
+_candado = threading.Lock()
+_cache = None
+
+
+def obtener_cache():
+    '''
+    Devuelve la caché de imágenes compartida, creándola la primera vez.
+    :return: CacheImagenes - La caché compartida.
+    '''
+    global _cache
+    with _candado:
+        if _cache is None:
+            _cache = CacheImagenes()
+        return _cache
+
+
+def _cuando_termine(widget, url, tamano, al_terminar, al_error, futuro=None):
+    # Comprueba desde el hilo de Tk si la descarga ha terminado, sin bloquearlo
+    if not widget.winfo_exists():
+        return
+    if futuro is None or futuro.cancelled():
+        # Una precarga cancelada por otra página se vuelve a pedir
+        futuro = obtener_cache().pedir(url, tamano)
+    if not futuro.done():
+        widget.after(INTERVALO, _cuando_termine, widget, url, tamano, al_terminar, al_error, futuro)
+    elif futuro.exception() is not None:
+        al_error(futuro.exception())
+    else:
+        al_terminar(futuro.result())
+
+
+def mostrar_imagen(url):
+    '''
+    Muestra una imagen en una nueva ventana emergente. La ventana aparece al momento y la imagen se
+    descarga en segundo plano si no estaba ya en caché.
+    :param url: str - La URL de la imagen
+    :return: None
+    '''
+    import tkinter as tk
+    from PIL import ImageTk
+
+    ventana = tk.Toplevel()
+    ventana.title("Imagen")
+    etiqueta = tk.Label(ventana, text="Cargando imagen...", padx=20, pady=20)
+    etiqueta.pack()
+
+    def mostrar(imagen):
+        img_tk = ImageTk.PhotoImage(imagen)
+        etiqueta.config(image=img_tk, text='', padx=0, pady=0)
+        # Guarda una referencia a la imagen para evitar que sea recolectada por el recolector de basura
+        etiqueta.image = img_tk
+
+    def error(e):
+        if isinstance(e, requests.RequestException):
+            etiqueta.config(text=f"Error al buscar la imagen: {e}")
+        else:
+            etiqueta.config(text=f"Error al mostrar la imagen: {e}")
+
+    cache = obtener_cache()
+    imagen = cache.en_memoria(url, TAMANO_VENTANA)
+    if imagen is not None:
+        mostrar(imagen)
+    else:
+        _cuando_termine(etiqueta, url, TAMANO_VENTANA, mostrar, error)
+
+
+def mostrar_galeria(imagenes, columnas=5):
+    '''
+    Muestra en una ventana una galería de miniaturas que se van rellenando según se descargan. Al hacer
+    clic en una miniatura se abre la imagen en su propia ventana.
+    :param imagenes: tuple - Imágenes devueltas por scrapear_web, registros Imagen con 'src' y 'alt'.
+    :param columnas: int - Miniaturas por fila.
+    :return: None
+    '''
+    import tkinter as tk
+    from PIL import ImageTk
+
+    ventana = tk.Toplevel()
+    ventana.title(f"Galería ({len(imagenes)} imágenes)")
+    lienzo = tk.Canvas(ventana, width=columnas * (TAMANO_MINIATURA[0] + 10), height=600)
+    barra = tk.Scrollbar(ventana, orient='vertical', command=lienzo.yview)
+    marco = tk.Frame(lienzo)
+    marco.bind("<Configure>", lambda e: lienzo.configure(scrollregion=lienzo.bbox('all')))
+    lienzo.create_window((0, 0), window=marco, anchor='nw')
+    lienzo.configure(yscrollcommand=barra.set)
+    lienzo.pack(side='left', fill='both', expand=True)
+    barra.pack(side='right', fill='y')
+
+    cache = obtener_cache()
+    for posicion, imagen in enumerate(imagenes[:MAX_PRECARGA]):
+        url = imagen['src']
+        etiqueta = tk.Label(marco, text=(imagen.get('alt') or 'Cargando...')[:30], width=20, height=10,
+                            wraplength=TAMANO_MINIATURA[0], cursor='hand2')
+        etiqueta.grid(row=posicion // columnas, column=posicion % columnas, padx=5, pady=5)
+        etiqueta.bind("<Button-1>", lambda e, url=url: mostrar_imagen(url))
+
+        def mostrar(miniatura, etiqueta=etiqueta):
+            img_tk = ImageTk.PhotoImage(miniatura)
+            etiqueta.config(image=img_tk, text='', width=TAMANO_MINIATURA[0], height=TAMANO_MINIATURA[1])
+            etiqueta.image = img_tk
+
+        def error(e, etiqueta=etiqueta):
+            etiqueta.config(text="Imagen no disponible", cursor='')
+
+        miniatura = cache.en_memoria(url, TAMANO_MINIATURA)
+        if miniatura is not None:
+            mostrar(miniatura)
+        else:
+            _cuando_termine(etiqueta, url, TAMANO_MINIATURA, mostrar, error)
@@ -0,0 +1,282 @@
+'''
+Índice local persistente de los artículos descargados de arXiv y PubMed, con búsqueda de texto completo
+(SQLite FTS5). Cada resultado de scrapear_arxiv / scrapear_pubmed se guarda una sola vez, identificado por
+su ID de arXiv o su PMID, y se puede buscar después sin conexión y ordenado por relevancia.
+'''
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import Utils
+from Registros import serializar
+from Render import Bloque, mostrar_bloques
+
+# Peso de cada columna en la relevancia (bm25): título, autores, resumen y categorías
+PESOS = (10.0, 5.0, 1.0, 2.0)
+LIMITE = 50
+NOMBRES_FUENTES = {'arxiv': 'arXiv', 'pubmed': 'PubMed'}
+_log = logging.getLogger('sciencescraper.indice')
+
+ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS articulos (
+    id INTEGER PRIMARY KEY,
+    fuente TEXT NOT NULL,
+    identificador TEXT NOT NULL,
+    titulo TEXT, autores TEXT, resumen TEXT, categorias TEXT, fecha TEXT, link TEXT,
+    datos TEXT NOT NULL,
+    consulta TEXT,
+    actualizado REAL NOT NULL,
+    UNIQUE (fuente, identificador)
+);
+CREATE INDEX IF NOT EXISTS articulos_fecha ON articulos (fecha);
+CREATE VIRTUAL TABLE IF NOT EXISTS articulos_fts USING fts5(
+    titulo, autores, resumen, categorias,
+    content='articulos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS articulos_ai AFTER INSERT ON articulos BEGIN
+    INSERT INTO articulos_fts (rowid, titulo, autores, resumen, categorias)
+    VALUES (new.id, new.titulo, new.autores, new.resumen, new.categorias);
+END;
+CREATE TRIGGER IF NOT EXISTS articulos_ad AFTER DELETE ON articulos BEGIN
+    INSERT INTO articulos_fts (articulos_fts, rowid, titulo, autores, resumen, categorias)
+    VALUES ('delete', old.id, old.titulo, old.autores, old.resumen, old.categorias);
+END;
+CREATE TRIGGER IF NOT EXISTS articulos_au AFTER UPDATE ON articulos BEGIN
+    INSERT INTO articulos_fts (articulos_fts, rowid, titulo, autores, resumen, categorias)
+    VALUES ('delete', old.id, old.titulo, old.autores, old.resumen, old.categorias);
+    INSERT INTO articulos_fts (rowid, titulo, autores, resumen, categorias)
+    VALUES (new.id, new.titulo, new.autores, new.resumen, new.categorias);
+END;
+'''
+
+MESES = {m: i for i, m in enumerate(['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+
+def _valor(texto):
+    # Los scrapers dejan a None los campos que faltan; los resultados guardados por versiones anteriores
+    # los rellenaban con textos como 'No hay resumen disponible'
+    return '' if not texto or texto.startswith('No hay ') else texto
+
+
+def fecha_iso(texto):
+    '''
+    Normaliza las fechas de arXiv ('2021-01-05T18:00:00Z') y PubMed ('2021 Jan 5', '2020 Nov-Dec').
+    :param texto: str - Fecha tal y como la devuelve el scraper.
+    :return: str - Fecha ISO con la precisión disponible ('2021', '2021-01' o '2021-01-05'), o ''.
+    '''
+    texto = _valor(texto)
+    iso = re.match(r'(\d{4})-(\d{2})-(\d{2})', texto)
+    if iso:
+        return '-'.join(iso.groups())
+    partes = re.match(r'(\d{4})(?:\s+([A-Za-z]{3})[A-Za-z]*(?:\s+(\d{1,2}))?)?', texto)
+    if not partes:
+        return ''
+    anio, mes, dia = partes.groups()
+    if not mes or mes.lower() not in MESES:
+        return anio
+    fecha = f"{anio}-{MESES[mes.lower()]:02d}"
+    return f"{fecha}-{int(dia):02d}" if dia else fecha
+
+
+def identificador(fuente, resultado):
+    '''
+    :param fuente: str - 'arxiv' o 'pubmed'.
+    :param resultado: dict - Resultado del scraper.
+    :return: str - ID de arXiv sin versión (por ejemplo '2101.00001') o PMID, o el link si no se reconoce.
+    '''
+    if fuente == 'pubmed' and resultado.get('pmid'):
+        return resultado['pmid']
+    link = resultado.get('link', '')
+    arxiv = re.search(r'arxiv\.org/abs/(.+?)(?:v\d+)?$', link)
+    return arxiv.group(1) if arxiv else link
+
+
+def consulta_fts(texto):
+    '''
+    Convierte el texto escrito por el usuario en una consulta FTS5: todas las palabras, cada una también
+    como prefijo, de forma que los caracteres especiales de la sintaxis de FTS5 no provocan errores.
+    :param texto: str - Texto de búsqueda.
+    :return: str - Consulta FTS5, o '' si el texto no tiene palabras.
+    '''
+    return ' '.join(f'"{palabra}"*' for palabra in re.findall(r'\w+', texto))
+
+
+class IndiceArticulos:
+    '''
+    Índice SQLite FTS5 de artículos. Se puede usar desde varios hilos: las operaciones sobre la base de datos
+    se serializan con un candado.
+    '''
+
+    def __init__(self, ruta=None):
+        '''
+        :param ruta: str - Fichero de la base de datos. Por defecto indice.sqlite3 del directorio de datos.
+        '''
+        self.ruta = ruta or Utils.ruta_datos('indice.sqlite3')
+        self._candado = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.executescript(ESQUEMA)
+
+    def indexar(self, fuente, resultados, consulta=None):
+        '''
+        Añade o actualiza resultados en el índice. Un artículo ya indexado (mismo ID de arXiv o PMID) se
+        sustituye por la versión más reciente en lugar de duplicarse.
+        :param fuente: str - 'arxiv' o 'pubmed'.
+        :param resultados: iterable - Resultados de scrapear_arxiv o scrapear_pubmed.
+        :param consulta: str - Consulta con la que se obtuvieron.
+        :return: int - Número de resultados indexados.
+        '''
+        ahora = time.time()
+        filas = [(fuente, identificador(fuente, r), r.get('titulo', ''), _valor(r.get('autores')), _valor(r.get('resumen')),
+                  _valor(r.get('categorias')), fecha_iso(r.get('fecha_publicacion')), r.get('link', ''),
+                  json.dumps(r, ensure_ascii=False, default=serializar), consulta, ahora) for r in resultados]
+        with self._candado, self._conexion:
+            self._conexion.executemany('''
+                INSERT INTO articulos (fuente, identificador, titulo, autores, resumen, categorias, fecha, link, datos, consulta, actualizado)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (fuente, identificador) DO UPDATE SET
+                    titulo = excluded.titulo, autores = excluded.autores, resumen = excluded.resumen,
+                    categorias = excluded.categorias, fecha = excluded.fecha, link = excluded.link,
+                    datos = excluded.datos, consulta = excluded.consulta, actualizado = excluded.actualizado
+            ''', filas)
+        return len(filas)
+
+    def buscar(self, texto='', fuente=None, desde=None, hasta=None, categoria=None, limite=LIMITE):
+        '''
+        Busca artículos en el índice ordenados por relevancia (o por fecha si no hay texto).
+        :param texto: str - Palabras a buscar en título, autores, resumen y categorías.
+        :param fuente: str - 'arxiv' o 'pubmed' para buscar solo en una fuente.
+        :param desde: str - Fecha mínima ('2020', '2020-06' o '2020-06-15').
+        :param hasta: str - Fecha máxima, con el mismo formato.
+        :param categoria: str - Categoría de arXiv que debe tener el artículo (por ejemplo 'cs.LG').
+        :param limite: int - Número máximo de resultados.
+        :return: list - Diccionarios con los campos del resultado original más fuente, identificador y fecha.
+        '''
+        condiciones = []
+        parametros = []
+        consulta = consulta_fts(texto or '')
+        if consulta:
+            condiciones.append('articulos_fts MATCH ?')
+            parametros.append(consulta)
+        if fuente:
+            condiciones.append('a.fuente = ?')
+            parametros.append(fuente)
+        if desde:
+            condiciones.append("a.fecha != '' AND substr(a.fecha, 1, length(?)) >= ?")
+            parametros.extend((desde, desde))
+        if hasta:
+            condiciones.append("a.fecha != '' AND substr(a.fecha, 1, length(?)) <= ?")
+            parametros.extend((hasta, hasta))
+        if categoria:
+            condiciones.append("(', ' || a.categorias || ',') LIKE ?")
+            parametros.append(f"%, {categoria},%")
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        if consulta:
+            sql = (f"SELECT a.fuente, a.identificador, a.fecha, a.datos FROM articulos_fts JOIN articulos a ON a.id = articulos_fts.rowid "
+                   f"{donde} ORDER BY bm25(articulos_fts, {', '.join(map(str, PESOS))}) LIMIT ?")
+        else:
+            sql = f"SELECT a.fuente, a.identificador, a.fecha, a.datos FROM articulos a {donde} ORDER BY a.fecha DESC LIMIT ?"
+        with self._candado:
+            filas = self._conexion.execute(sql, (*parametros, limite)).fetchall()
+        return [{**json.loads(datos), 'fuente': f, 'identificador': i, 'fecha': fecha} for f, i, fecha, datos in filas]
+
+    def total(self):
+        '''
+        :return: dict - Número de artículos indexados por fuente.
+        '''
+        with self._candado:
+            return dict(self._conexion.execute('SELECT fuente, COUNT(*) FROM articulos GROUP BY fuente').fetchall())
+
+    def cerrar(self):
+        with self._candado:
+            self._conexion.close()
+
+
+_candado = threading.Lock()
+_indice = None
+activado = True
+
+
+def obtener_indice():
+    '''
+    Devuelve el índice compartido, creándolo la primera vez.
+    :return: IndiceArticulos - El índice compartido, o None si está desactivado.
+    '''
+    global _indice
+    if not activado:
+        return None
+    with _candado:
+        if _indice is None:
+            _indice = IndiceArticulos()
+        return _indice
+
+
+def configurar(activar=None, ruta=None):
+    '''
+    Cambia la configuración del índice compartido.
+    :param activar: bool - Activa o desactiva el indexado automático de los resultados.
+    :param ruta: str - Fichero de la base de datos.
+    :return: None
+    '''
+    global _indice, activado
+    with _candado:
+        if activar is not None:
+            activado = activar
+        if ruta is not None:
+            if _indice is not None:
+                _indice.cerrar()
+            _indice = IndiceArticulos(ruta)
+
+
+def indexar(fuente, resultados, consulta=None):
+    '''
+    Guarda en el índice compartido los resultados de un scraper. Un fallo del índice no interrumpe el
+    scrapeo: se avisa en el log y los resultados se devuelven igualmente.
+    :param fuente: str - 'arxiv' o 'pubmed'.
+    :param resultados: list - Resultados del scraper.
+    :param consulta: str - Consulta con la que se obtuvieron.
+    :return: list - Los mismos resultados.
+    '''
+    try:
+        indice = obtener_indice()
+        if indice is not None and resultados:
+            indice.indexar(fuente, resultados, consulta)
+    except sqlite3.Error as e:
+        _log.warning("No se pudieron indexar los resultados: %s", e)
+    return resultados
+
+
+def bloques_indice(resultados):
+    '''
+    Genera los bloques de texto con los que se muestran los artículos encontrados en el índice local.
+    :param resultados: list - Lista de resultados devuelta por buscar.
+    :return: generator - Un Bloque por resultado.
+    '''
+    for resultado in resultados:
+        # Los artículos fusionados por Deduplicar tienen varias fuentes, identificadores y links
+        fuentes = ', '.join(NOMBRES_FUENTES.get(f, f) for f in resultado['fuente'].split(', '))
+        bloque = (Bloque()
+                  .texto(f"Titulo: {resultado.get('titulo') or ''}\n\n"
+                         f"Autores: {_valor(resultado.get('autores'))}\n\n"
+                         f"Resumen: {_valor(resultado.get('resumen'))}\n\n"
+                         f"Fuente: {fuentes} ({resultado['identificador']})\n\n"
+                         f"Fecha de publicacion: {resultado['fecha'] or 'Desconocida'}\n\n"
+                         + (f"Categorias: {resultado['categorias']}\n\n" if resultado.get('categorias') else '')))
+        for link in filter(None, (resultado.get('link') or '').split(', ')):
+            bloque.link(link, link).texto("\n")
+        yield bloque.texto("\n")
+
+
+def pintar_indice(widget, resultados):
+    '''
+    Muestra en un widget de texto los artículos encontrados en el índice local.
+    :param widget: tk.Text - El widget de texto donde se muestran los resultados.
+    :param resultados: list - Lista de resultados devuelta por buscar.
+    :return: None
+    '''
+    if not resultados:
+        mostrar_bloques(widget, [Bloque().texto("No hay artículos guardados que coincidan con la búsqueda.")])
+    else:
+        mostrar_bloques(widget, bloques_indice(resultados))
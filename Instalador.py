@@ -10,6 +10,8 @@ paquetes = [
     "tk",
     "pillow",
     "feedparser",
+    "brotli",
+    "lxml",
     "csv",
 ]
 
@@ -0,0 +1,285 @@
+'''
+Instantáneas de los editorial boards en una base de datos SQLite, para refrescarlos periódicamente y obtener
+solo los cambios respecto a la vez anterior: miembros que entran, que salen o cuyo rol o afiliación cambia.
+Si el contenido de una página no ha cambiado desde la última instantánea no se vuelve a parsear ni a escribir.
+'''
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+import requests
+import Http
+import Metricas
+import Planificador
+import Utils
+
+# Campos de un miembro que se guardan y se comparan entre instantáneas
+CAMPOS = ['rol', 'nombre', 'afiliacion', 'pais', 'email', 'web']
+# Columnas de cada cambio devuelto
+COLUMNAS_CAMBIO = ['url', 'revista', 'tipo', 'rol', 'nombre', 'afiliacion', 'pais', 'email', 'web', 'cambios']
+MAX_HILOS = 8
+
+ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS paginas (
+    url TEXT PRIMARY KEY,
+    revista TEXT,
+    hash TEXT NOT NULL,
+    actualizada REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS miembros (
+    url TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    rol TEXT, nombre TEXT, afiliacion TEXT, pais TEXT, email TEXT, web TEXT,
+    PRIMARY KEY (url, clave)
+);
+CREATE TABLE IF NOT EXISTS cambios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    fecha REAL NOT NULL,
+    tipo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    datos TEXT NOT NULL
+);
+'''
+
+
+def clave_miembro(nombre):
+    '''
+    Clave con la que se reconoce a un miembro entre instantáneas: el nombre sin tildes, en minúsculas y
+    con los espacios normalizados, de forma que un cambio de rol o de afiliación no lo convierte en otro.
+    :param nombre: str - Nombre del miembro.
+    :return: str - Clave normalizada.
+    '''
+    sin_tildes = ''.join(c for c in unicodedata.normalize('NFKD', nombre) if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.casefold().split())
+
+
+def huella(contenido):
+    '''
+    :param contenido: bytes - Contenido de la página.
+    :return: str - Hash SHA-256 del contenido.
+    '''
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def _claves_persona(persona, entradas):
+    '''
+    Claves con las que se guardan las entradas de una persona: su clave si solo tiene una y, si aparece con
+    varios roles en el mismo board, su clave junto con el rol normalizado.
+    :param persona: str - Clave de la persona (clave_miembro).
+    :param entradas: list - Entradas de la persona, como diccionarios con CAMPOS.
+    :return: list - Pares (clave, entrada).
+    '''
+    if len(entradas) == 1:
+        return [(persona, entradas[0])]
+    claves = []
+    usadas = set()
+    for entrada in entradas:
+        clave = base = f"{persona}#{clave_miembro(entrada['rol'])}"
+        repeticion = 2
+        while clave in usadas:
+            clave = f"{base}#{repeticion}"
+            repeticion += 1
+        usadas.add(clave)
+        claves.append((clave, entrada))
+    return claves
+
+
+def _cambios_persona(persona, nuevas, anteriores):
+    '''
+    Compara las entradas de una persona con las de la última instantánea. Las entradas se emparejan por rol;
+    las que quedan sin pareja se emparejan entre sí como cambios de rol y el resto son altas o bajas.
+    :param persona: str - Clave de la persona (clave_miembro).
+    :param nuevas: list - Entradas extraídas, como diccionarios con CAMPOS.
+    :param anteriores: list - Pares (clave, entrada) de la última instantánea.
+    :return: list - Cambios como tuplas (clave, tipo, miembro, diferencias).
+    '''
+    sin_pareja = [anterior for _, anterior in anteriores]
+    parejas = []
+    nuevas_sin_pareja = []
+    for clave, nueva in _claves_persona(persona, nuevas):
+        rol = clave_miembro(nueva['rol'])
+        anterior = next((a for a in sin_pareja if clave_miembro(a['rol'] or '') == rol), None)
+        if anterior is None:
+            nuevas_sin_pareja.append((clave, nueva))
+        else:
+            sin_pareja.remove(anterior)
+            parejas.append((clave, nueva, anterior))
+    # Los roles que han cambiado: cada rol nuevo sustituye a uno de los anteriores en el orden de la página
+    while nuevas_sin_pareja and sin_pareja:
+        clave, nueva = nuevas_sin_pareja.pop(0)
+        parejas.append((clave, nueva, sin_pareja.pop(0)))
+
+    cambios = []
+    for clave, nueva, anterior in parejas:
+        diferencias = {campo: [anterior[campo], nueva[campo]] for campo in CAMPOS if (anterior[campo] or '') != nueva[campo]}
+        if diferencias:
+            cambios.append((clave, 'cambio', nueva, diferencias))
+    cambios.extend((clave, 'alta', nueva, None) for clave, nueva in nuevas_sin_pareja)
+    claves_anteriores = {id(anterior): clave for clave, anterior in anteriores}
+    cambios.extend((claves_anteriores[id(anterior)], 'baja', anterior, None) for anterior in sin_pareja)
+    return cambios
+
+
+class AlmacenInstantaneas:
+    '''
+    Almacén SQLite con la última instantánea de cada editorial board y el historial de cambios.
+    Se puede usar desde varios hilos: las operaciones sobre la base de datos se serializan con un candado.
+    '''
+
+    def __init__(self, ruta=None):
+        '''
+        :param ruta: str - Fichero de la base de datos. Por defecto instantaneas.sqlite3 del directorio de datos.
+        '''
+        self.ruta = ruta or Utils.ruta_datos('instantaneas.sqlite3')
+        self._candado = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conexion.executescript(ESQUEMA)
+
+    def hash_pagina(self, url):
+        '''
+        :param url: str - URL del editorial board.
+        :return: str - Hash del contenido de la última instantánea, o None si no hay ninguna.
+        '''
+        with self._candado:
+            fila = self._conexion.execute('SELECT hash FROM paginas WHERE url = ?', (url,)).fetchone()
+        return fila[0] if fila else None
+
+    def miembros(self, url):
+        '''
+        :param url: str - URL del editorial board.
+        :return: dict - Miembros de la última instantánea indexados por su clave.
+        '''
+        with self._candado:
+            filas = self._conexion.execute(f"SELECT clave, {', '.join(CAMPOS)} FROM miembros WHERE url = ?", (url,)).fetchall()
+        return {fila[0]: dict(zip(CAMPOS, fila[1:])) for fila in filas}
+
+    def tocar(self, url):
+        '''
+        Anota que la página se ha comprobado sin encontrar cambios en su contenido.
+        :param url: str - URL del editorial board.
+        :return: None
+        '''
+        with self._candado, self._conexion:
+            self._conexion.execute('UPDATE paginas SET actualizada = ? WHERE url = ?', (time.time(), url))
+
+    def aplicar(self, url, revista, hash_contenido, miembros):
+        '''
+        Compara los miembros extraídos con la última instantánea, guarda la nueva y registra los cambios.
+        Las entradas de una persona se emparejan por su rol, de forma que una persona con varios roles solo
+        tiene un cambio de rol si cambia su conjunto de roles, y no si la página reordena sus secciones.
+        Solo se escriben las filas de las personas que han cambiado.
+        :param url: str - URL del editorial board.
+        :param revista: str - Nombre de la revista.
+        :param hash_contenido: str - Hash del contenido de la página.
+        :param miembros: list - Miembros extraídos, como diccionarios con CAMPOS.
+        :return: list - Cambios, como diccionarios con COLUMNAS_CAMBIO.
+        '''
+        # Entradas de cada persona, nuevas y de la última instantánea (con la clave con la que se guardaron)
+        nuevos = {}
+        for miembro in miembros:
+            persona = clave_miembro(miembro.get('nombre') or '')
+            if persona:
+                nuevos.setdefault(persona, []).append({campo: miembro.get(campo) or '' for campo in CAMPOS})
+        anteriores = {}
+        for clave, anterior in self.miembros(url).items():
+            anteriores.setdefault(clave_miembro(anterior['nombre'] or ''), []).append((clave, anterior))
+
+        cambios = []
+        reescritas = []
+        for persona in dict.fromkeys([*nuevos, *anteriores]):
+            cambios_persona = _cambios_persona(persona, nuevos.get(persona, []), anteriores.get(persona, []))
+            if cambios_persona:
+                cambios.extend(cambios_persona)
+                reescritas.append(persona)
+
+        ahora = time.time()
+        columnas = ', '.join(CAMPOS)
+        with self._candado, self._conexion:
+            self._conexion.execute('INSERT OR REPLACE INTO paginas (url, revista, hash, actualizada) VALUES (?, ?, ?, ?)',
+                                   (url, revista, hash_contenido, ahora))
+            # Las filas de cada persona que ha cambiado se sustituyen por las nuevas, con sus claves actuales
+            for persona in reescritas:
+                self._conexion.executemany('DELETE FROM miembros WHERE url = ? AND clave = ?',
+                                           ((url, clave) for clave, _ in anteriores.get(persona, [])))
+                self._conexion.executemany(f"INSERT OR REPLACE INTO miembros (url, clave, {columnas}) VALUES (?, ?, {', '.join('?' * len(CAMPOS))})",
+                                           ((url, clave, *(miembro[campo] for campo in CAMPOS))
+                                            for clave, miembro in _claves_persona(persona, nuevos.get(persona, []))))
+            for clave, tipo, miembro, diferencias in cambios:
+                datos = dict(miembro, cambios=diferencias) if diferencias else miembro
+                self._conexion.execute('INSERT INTO cambios (url, fecha, tipo, clave, datos) VALUES (?, ?, ?, ?, ?)',
+                                       (url, ahora, tipo, clave, json.dumps(datos, ensure_ascii=False)))
+        return [{'url': url, 'revista': revista, 'tipo': tipo, **miembro, 'cambios': diferencias or {}}
+                for _, tipo, miembro, diferencias in cambios]
+
+    def historial(self, url=None, desde=None):
+        '''
+        :param url: str - URL del editorial board. Por defecto todas.
+        :param desde: float - Marca de tiempo a partir de la que devolver cambios. Por defecto todos.
+        :return: list - Cambios registrados, del más antiguo al más reciente.
+        '''
+        consulta = 'SELECT url, fecha, tipo, datos FROM cambios WHERE (? IS NULL OR url = ?) AND (? IS NULL OR fecha >= ?) ORDER BY id'
+        with self._candado:
+            filas = self._conexion.execute(consulta, (url, url, desde, desde)).fetchall()
+        return [{'url': u, 'fecha': fecha, 'tipo': tipo, **json.loads(datos)} for u, fecha, tipo, datos in filas]
+
+    def cerrar(self):
+        with self._candado:
+            self._conexion.close()
+
+
+@Metricas.medido()
+def refrescar_tablero(url, almacen, perfiles=None):
+    '''
+    Descarga un editorial board y devuelve sus cambios desde la última instantánea. Si el contenido de la
+    página es idéntico al de la última instantánea no se parsea y no hay cambios.
+    :param url: str - URL del editorial board.
+    :param almacen: AlmacenInstantaneas - Almacén de instantáneas.
+    :param perfiles: dict - Perfiles de Tableros. Por defecto los de cargar_perfiles().
+    :return: list - Cambios, como diccionarios con COLUMNAS_CAMBIO.
+    '''
+    from Tableros import extraer_tablero, perfil_para
+    _, perfil = perfil_para(url, perfiles)
+    try:
+        respuesta = Http.obtener(url)
+        respuesta.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Fallo al scrapear los datos del editorial board. Error: {e}")
+
+    hash_contenido = huella(respuesta.content)
+    if hash_contenido == almacen.hash_pagina(url):
+        almacen.tocar(url)
+        return []
+    revista, miembros = extraer_tablero(respuesta.content, perfil)
+    return almacen.aplicar(url, revista, hash_contenido, miembros)
+
+
+@Metricas.medido(contar=lambda resultado: len(resultado[0]))
+def refrescar_tableros(urls, almacen=None, max_hilos=MAX_HILOS, perfiles=None):
+    '''
+    Refresca en paralelo varios editorial boards y devuelve solo sus cambios.
+    :param urls: iterable - URLs de los editorial boards.
+    :param almacen: AlmacenInstantaneas - Almacén de instantáneas. Por defecto el del directorio de datos.
+    :param max_hilos: int - Número de boards refrescados a la vez.
+    :param perfiles: dict - Perfiles de Tableros. Por defecto los de cargar_perfiles().
+    :return: tuple - Lista de cambios y diccionario con el error de cada URL que ha fallado.
+    '''
+    from Tableros import cargar_perfiles
+    propio = almacen is None
+    almacen = almacen or AlmacenInstantaneas()
+    perfiles = perfiles if perfiles is not None else cargar_perfiles()
+    cambios = []
+    errores = {}
+    try:
+        trabajos = ((url, refrescar_tablero, url, almacen, perfiles) for url in dict.fromkeys(urls))
+        for url, futuro in Planificador.repartir(trabajos, max_hilos):
+            try:
+                cambios.extend(futuro.result())
+            except Exception as e:
+                errores[url] = str(e)
+    finally:
+        if propio:
+            almacen.cerrar()
+    return cambios, errores
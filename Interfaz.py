@@ -1,13 +1,14 @@
+import os
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
-from PIL import Image, ImageTk
-from Arxiv import *
-from Pubmed import *
-from Scraper import *
-from Scraper_ACM import *
-from Scraper_TNNLS import *
 from Utils import *
+from Tareas import EjecutorTareas, PanelTarea
+
+# Número máximo de resultados que se descargan al exportar una búsqueda de arXiv o PubMed
+MAX_EXPORTAR = 1000
+# Datos de la última página scrapeada, para la galería de imágenes
+datos_web = None
 
 
 def scraper_handler():
@@ -15,45 +16,298 @@ def scraper_handler():
     Esta función se encarga de manejar la presentación de los datos del scrapeo web
     : return: None
     '''
-    mostrar_datos(entrada_url, widget, insertar_link, insertar_imagen)
+    url = entrada_url.get()
+    if not url:
+        messagebox.showwarning("Input Error", "Por favor, inserte una URL valida")
+        return
+
+    # Los módulos de scrapeo se importan en el hilo de trabajo la primera vez que se usan
+    def trabajo(tarea):
+        from Scraper import scrapear_web
+        return scrapear_web(url)
+
+    def mostrar(data):
+        global datos_web
+        from Scraper import pintar_datos
+        pintar_datos(widget, data)
+        # scrapear_web devuelve el mensaje de error como texto
+        if not isinstance(data, str):
+            datos_web = data
+            from Imagenes import obtener_cache
+            obtener_cache().precargar(imagen['src'] for imagen in data['imagenes'])
+
+    panel_web.lanzar(trabajo, mostrar)
+
+def galeria_handler():
+    '''
+    Esta función muestra las miniaturas de las imágenes de la última página scrapeada
+    : return: None
+    '''
+    if not datos_web or not datos_web['imagenes']:
+        messagebox.showinfo("Galería", "La última página scrapeada no tiene imágenes")
+        return
+    from Imagenes import mostrar_galeria
+    mostrar_galeria(datos_web['imagenes'])
 
 def arxiv_handler():
     '''
     Esta función se encarga de manejar la presentación de los datos de arxiv
     : return: None
     '''
-    mostrar_arxiv(query_arxiv, widget_arxiv, insertar_link)
+    query = query_arxiv.get()
+    if not query:
+        messagebox.showwarning("Input Error", "Por favor, introduzca una consulta valida")
+        return
+
+    solo_nuevos = nuevos_arxiv.get()
+
+    def trabajo(tarea):
+        if solo_nuevos:
+            # Guarda la consulta y pide solo los artículos enviados desde la última vez
+            from Suscripciones import novedades
+            return novedades('arxiv', query)
+        from Arxiv import scrapear_arxiv
+        return scrapear_arxiv(query)
+
+    def mostrar(resultados):
+        from Arxiv import pintar_arxiv
+        if solo_nuevos:
+            pintar_arxiv(widget_arxiv, resultados, "No hay artículos nuevos desde la última consulta.")
+        else:
+            pintar_arxiv(widget_arxiv, resultados)
+
+    panel_arxiv.lanzar(trabajo, mostrar)
+
+def buscar_pubmed(tarea, query):
+    '''
+    Descarga los resultados de pubmed en segundo plano, informando del progreso y parando si se cancela
+    :param tarea: Tarea - Tarea en la que se ejecuta la búsqueda
+    :param query: str - Consulta del usuario
+    :return: list - Resultados de la búsqueda
+    '''
+    from Pubmed import harvestear_pubmed
+    resultados = []
+    for resultado in harvestear_pubmed(query, 100):
+        tarea.comprobar()
+        resultados.append(resultado)
+        tarea.progreso(len(resultados), 100)
+    return resultados
         
 def pubmed_handler():
     '''
     Esta función se encarga de manejar la presentación de los datos de pubmed
     : return: None
     '''
-    mostrar_pubmed(query_pubmed, widget_pubmed, insertar_link)
+    query = query_pubmed.get()
+    if not query:
+        messagebox.showwarning("Input Error", "Por favor, introduzca una consulta valida")
+        return
+
+    if nuevos_pubmed.get():
+        # Guarda la consulta y pide solo los artículos que han entrado en PubMed desde la última vez
+        def trabajo(tarea):
+            from Suscripciones import novedades
+            return novedades('pubmed', query)
+
+        def mostrar(resultados):
+            from Pubmed import pintar_pubmed
+            pintar_pubmed(widget_pubmed, resultados, "No hay artículos nuevos desde la última consulta.")
+
+        panel_pubmed.lanzar(trabajo, mostrar)
+        return
+
+    def mostrar(resultados):
+        from Pubmed import pintar_pubmed
+        pintar_pubmed(widget_pubmed, resultados)
+
+    panel_pubmed.lanzar(lambda tarea: buscar_pubmed(tarea, query), mostrar)
+
+def pedir_destino_exportacion():
+    '''
+    Pide al usuario el fichero al que exportar y, si ya existe, si se añaden los resultados o se sobrescribe
+    :return: tuple - Ruta del fichero y si se añade al final, o None si el usuario cancela
+    '''
+    from tkinter import filedialog
+    path = filedialog.asksaveasfilename(defaultextension=".csv", confirmoverwrite=False,
+                                        filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")])
+    if not path:
+        return None
+    anadir = False
+    if os.path.exists(path):
+        anadir = messagebox.askyesnocancel("Exportar", f"'{os.path.basename(path)}' ya existe. ¿Añadir los resultados al final?\n(No: sobrescribir el fichero)")
+        if anadir is None:
+            return None
+    return path, anadir
+
+def exportar_resultados(panel, fuente, consulta, generar_filas, total=None):
+    '''
+    Exporta en segundo plano los resultados de una consulta, escribiéndolos en el fichero según llegan
+    :param panel: PanelTarea - Panel de la pestaña, que muestra el progreso y permite cancelar
+    :param fuente: str - Fuente de los resultados, que determina las columnas del fichero
+    :param consulta: str - Consulta o URL del usuario
+    :param generar_filas: function - Devuelve un iterable con los resultados. Se llama en el hilo de trabajo
+    :param total: int - Número de resultados esperado, para la barra de progreso
+    :return: None
+    '''
+    destino = pedir_destino_exportacion()
+    if destino is None:
+        return
+    path, anadir = destino
+
+    def trabajo(tarea):
+        from Exportar import abrir_exportador
+        with abrir_exportador(path, fuente, anadir=anadir) as exportador:
+            for fila in generar_filas():
+                tarea.comprobar()
+                exportador.escribir({'consulta': consulta, **fila})
+                tarea.progreso(exportador.filas, total)
+            return exportador.filas
+
+    panel.lanzar(trabajo, lambda filas: messagebox.showinfo("Éxito", f"Se han exportado {filas} resultados a '{os.path.basename(path)}'."))
+
+def web_exportar_handler():
+    '''
+    Esta función se encarga de exportar a un fichero los datos del scrapeo web
+    : return: None
+    '''
+    url = entrada_url.get()
+    if not url:
+        messagebox.showwarning("Input Error", "Por favor, inserte una URL valida")
+        return
+
+    def generar_filas():
+        from Scraper import scrapear_web
+        data = scrapear_web(url)
+        # scrapear_web devuelve el mensaje de error como texto
+        if isinstance(data, str):
+            raise RuntimeError(data)
+        return [data]
+
+    exportar_resultados(panel_web, 'web', url, generar_filas)
+
+def arxiv_exportar_handler():
+    '''
+    Esta función se encarga de exportar a un fichero los resultados de arxiv
+    : return: None
+    '''
+    query = query_arxiv.get()
+    if not query:
+        messagebox.showwarning("Input Error", "Por favor, introduzca una consulta valida")
+        return
+
+    def generar_filas():
+        from Arxiv import harvestear_arxiv
+        return harvestear_arxiv(query, MAX_EXPORTAR)
+
+    exportar_resultados(panel_arxiv, 'arxiv', query, generar_filas, MAX_EXPORTAR)
+
+def pubmed_exportar_handler():
+    '''
+    Esta función se encarga de exportar a un fichero los resultados de pubmed
+    : return: None
+    '''
+    query = query_pubmed.get()
+    if not query:
+        messagebox.showwarning("Input Error", "Por favor, introduzca una consulta valida")
+        return
+
+    def generar_filas():
+        from Pubmed import harvestear_pubmed
+        return harvestear_pubmed(query, MAX_EXPORTAR)
+
+    exportar_resultados(panel_pubmed, 'pubmed', query, generar_filas, MAX_EXPORTAR)
+
+def trabajo_ACM(tarea):
+    '''
+    Scrapea el editorial board de ACM en segundo plano
+    :param tarea: Tarea - Tarea en la que se ejecuta el scrapeo
+    :return: tuple - Nombre de la revista y lista de miembros
+    '''
+    from Scraper_ACM import scrapear_ACM, URL_ACM
+    return scrapear_ACM(URL_ACM)
             
 def ACM_handler():
     '''
     Esta función se encarga de manejar la presentación de los datos de ACM
     : return: None
     '''
-    mostrar_ACM(widget_ACM)
+    from Scraper_ACM import pintar_ACM
+    panel_ACM.lanzar(trabajo_ACM, lambda resultado: pintar_ACM(widget_ACM, *resultado))
+
+def ACM_CSV_handler():
+    '''
+    Esta función se encarga de scrapear ACM en segundo plano y guardar los datos en un CSV
+    : return: None
+    '''
+    from Scraper_ACM import escribir_ACM_en_CSV
+    panel_ACM.lanzar(trabajo_ACM, lambda resultado: escribir_ACM_en_CSV(*resultado))
+
+def trabajo_TNNLS(tarea):
+    '''
+    Scrapea el editorial board de TNNLS en segundo plano
+    :param tarea: Tarea - Tarea en la que se ejecuta el scrapeo
+    :return: tuple - Nombre de la revista y lista de miembros
+    '''
+    from Scraper_TNNLS import scrapear_TNNLS, URL_TNNLS
+    return scrapear_TNNLS(URL_TNNLS)
 
 def TNNLS_handler():
     '''
     Esta función se encarga de manejar la presentación de los datos de TNNLS
     : return: None
     '''
-    mostrar_TNNLS(widget_TNNLS)
+    from Scraper_TNNLS import pintar_TNNLS
+    panel_TNNLS.lanzar(trabajo_TNNLS, lambda resultado: pintar_TNNLS(widget_TNNLS, *resultado))
+
+def TNNLS_CSV_handler():
+    '''
+    Esta función se encarga de scrapear TNNLS en segundo plano y guardar los datos en un CSV
+    : return: None
+    '''
+    from Scraper_TNNLS import escribir_TNNLS_en_CSV
+    panel_TNNLS.lanzar(trabajo_TNNLS, lambda resultado: escribir_TNNLS_en_CSV(*resultado))
+
+def biblioteca_handler(evento=None):
+    '''
+    Esta función busca en el índice local los artículos ya descargados de arXiv y PubMed, sin conexión
+    : return: None
+    '''
+    import Indice
+    fuentes = {"Todas": None, "arXiv": 'arxiv', "PubMed": 'pubmed'}
+    indice = Indice.obtener_indice()
+    if indice is None:
+        messagebox.showwarning("Biblioteca", "El índice local está desactivado")
+        return
+    # Los valores de los widgets se leen aquí: el trabajo se ejecuta fuera del hilo de Tk
+    consulta = query_biblioteca.get()
+    fuente = fuentes[fuente_biblioteca.get()]
+    desde = desde_biblioteca.get().strip() or None
+    hasta = hasta_biblioteca.get().strip() or None
+    fusionar = fusionar_biblioteca.get()
+
+    def trabajo_biblioteca(tarea):
+        resultados = indice.buscar(consulta, fuente=fuente, desde=desde, hasta=hasta)
+        tarea.comprobar()
+        if fusionar:
+            from Deduplicar import deduplicar
+            resultados = deduplicar(resultados)
+        return resultados
+
+    panel_biblioteca.lanzar(trabajo_biblioteca, lambda resultados: Indice.pintar_indice(widget_biblioteca, resultados))
     
         
 #Interfaz de la aplicación
-def mostrar_frame(frame):
+def mostrar_frame(nombre_frame):
     '''
-    Esta función muestra el frame que queramos, al elevarlo al primer plano
-    :param frame: tk.Frame - Marco a mostrar
+    Esta función muestra el frame que queramos, al elevarlo al primer plano. El contenido de cada frame
+    se construye la primera vez que se muestra, de modo que los módulos de cada pestaña se cargan al usarla.
+    :param nombre_frame: str - Nombre del frame a mostrar
     :return: None
     '''
-    frame.tkraise()
+    constructor = constructores.pop(nombre_frame, None)
+    if constructor:
+        constructor(frames[nombre_frame])
+    frames[nombre_frame].tkraise()
 
 
 def iniciar_aplicacion():
@@ -65,24 +319,40 @@ def iniciar_aplicacion():
     raiz.deiconify()
     raiz.state('zoomed')
 
+
+_logo_original = None
+
+def cargar_logo(tamano):
+    '''
+    Carga el logo con el tamaño indicado. Usa el PNG ya escalado que se distribuye con la aplicación
+    y solo si no existe decodifica logo.png, una única vez, con PIL.
+    :param tamano: int - Lado en píxeles del logo
+    :return: tk.PhotoImage - Imagen lista para usar en un widget
+    '''
+    global _logo_original
+    path_escalado = resource_path(f"logo_{tamano}.png")
+    if os.path.exists(path_escalado):
+        return tk.PhotoImage(file=path_escalado)
+    from PIL import Image, ImageTk
+    if _logo_original is None:
+        _logo_original = Image.open(resource_path("logo.png"))
+        _logo_original.load()
+    return ImageTk.PhotoImage(_logo_original.resize((tamano, tamano)))
+
 # Crear ventanas principal y secundaria        
 raiz = tk.Tk()
 raiz.title("Web Scraper")
 raiz.geometry("1000x600")
 raiz.withdraw()
 
+# Ejecutor de los trabajos de scrapeo en segundo plano, compartido por todas las pestañas
+ejecutor = EjecutorTareas(raiz)
+
 secundaria = tk.Toplevel()
 secundaria.title("Welcome")
 secundaria.geometry("500x300")
 secundaria.attributes("-fullscreen", True)
 
-# Cargar el logo
-try:
-    path_logo = resource_path("logo.png")
-    logo_img = Image.open(path_logo)
-except Exception as e:
-    print(f"No se pudo cargar el logo: {e}")
-
 # Establecer el color de fondo para la pantalla de inicio
 color_fondo = "#87CEFA"
 secundaria.configure(bg=color_fondo)
@@ -91,15 +361,14 @@ secundaria.configure(bg=color_fondo)
 frame_central = tk.Frame(secundaria, bg=color_fondo)
 frame_central.place(relx=0.5, rely=0.5, anchor="center")
 
-# Cargar la imagen para la pantalla de inicio
-logo_inicio = Image.open(path_logo)
-logo_inicio = logo_inicio.resize((300, 300))
-foto_inicio = ImageTk.PhotoImage(logo_inicio)
-
-# Crear la pantalla de inicio
-label_imagen_inicio = tk.Label(frame_central, image=foto_inicio, bg=color_fondo)
-label_imagen_inicio.image = foto_inicio
-label_imagen_inicio.pack(pady=(0, 10))
+# Crear la pantalla de inicio con el logo
+try:
+    foto_inicio = cargar_logo(300)
+    label_imagen_inicio = tk.Label(frame_central, image=foto_inicio, bg=color_fondo)
+    label_imagen_inicio.image = foto_inicio
+    label_imagen_inicio.pack(pady=(0, 10))
+except Exception as e:
+    print(f"No se pudo cargar el logo: {e}")
 
 titulo_secundaria = tk.Label(frame_central, text="ScienceScraper", font=("Times New Roman", 30, "bold", "italic"),  bg=color_fondo)
 titulo_secundaria.pack(pady=(10, 50))
@@ -117,7 +386,7 @@ principal.pack(expand=True, fill="both", side="right")
 
 # Crear frames para cada sección
 frames = {}
-for opcion in ["Web Scraper", "Arxiv", "PubMed", "Editorial Board ACM", "Editorial Board TNNLS"]:
+for opcion in ["Web Scraper", "Arxiv", "PubMed", "Editorial Board ACM", "Editorial Board TNNLS", "Biblioteca"]:
     frame = tk.Frame(principal, bg="white")
     frame.place(relwidth=1, relheight=1)
     frames[opcion] = frame
@@ -130,7 +399,7 @@ def añadir_a_barra_lateral(texto, nombre_frame):
     :return: None
     '''
     boton = tk.Button(barra_lateral, text=texto, bg="#2980B9", fg="white", font=("Helvetica", 14), relief="flat",
-                       command=lambda: mostrar_frame(frames[nombre_frame]))
+                       command=lambda: mostrar_frame(nombre_frame))
     boton.pack(fill="x")
 
 # Añadir botones a la barra lateral
@@ -139,75 +408,169 @@ añadir_a_barra_lateral("Arxiv", "Arxiv")
 añadir_a_barra_lateral("PubMed", "PubMed")
 añadir_a_barra_lateral("Editorial Board ACM", "Editorial Board ACM")
 añadir_a_barra_lateral("Editorial Board TNNLS", "Editorial Board TNNLS")
+añadir_a_barra_lateral("Biblioteca", "Biblioteca")
 
-# Añadir contenido al frame de Web Scraper
-frame_url = ttk.Frame(frames["Web Scraper"], padding="10")
-frame_url.pack(side=tk.TOP, fill=tk.X)
-ttk.Label(frame_url, text="Inserte URL:", font=("Times New Roman", 10)).pack(side=tk.LEFT)
-entrada_url = ttk.Entry(frame_url, width=50)
-entrada_url.pack(side=tk.LEFT, fill=tk.X, expand=True)
-tk.Button(frame_url, text="Scrapear", command=scraper_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
-
-widget = ScrolledText(frames["Web Scraper"], wrap=tk.WORD, width=100, height=30)
-widget.pack(fill=tk.BOTH, expand=True)
-
-# Añadir contenido al frame de Arxiv
-arxiv_frame = ttk.Frame(frames["Arxiv"], padding="10")
-arxiv_frame.pack(side=tk.TOP, fill=tk.X)
-ttk.Label(arxiv_frame, text="Inserte Consulta Arxiv:").pack(side=tk.LEFT)
-query_arxiv = ttk.Entry(arxiv_frame, width=50)
-query_arxiv.pack(side=tk.LEFT, fill=tk.X, expand=True)
-tk.Button(arxiv_frame, text="Scrapear", command=arxiv_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
-
-widget_arxiv = ScrolledText(frames["Arxiv"], wrap=tk.WORD, width=100, height=30)
-widget_arxiv.pack(fill=tk.BOTH, expand=True)
-
-# Añadir contenido al frame de Pubmed
-pubmed_frame = ttk.Frame(frames["PubMed"], padding="10")
-pubmed_frame.pack(side=tk.TOP, fill=tk.X)
-ttk.Label(pubmed_frame, text="Inserte Consulta Pubmed:").pack(side=tk.LEFT)
-query_pubmed = ttk.Entry(pubmed_frame, width=50)
-query_pubmed.pack(side=tk.LEFT, fill=tk.X, expand=True)
-tk.Button(pubmed_frame, text="Scrapear", command=pubmed_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
-
-widget_pubmed = ScrolledText(frames["PubMed"], wrap=tk.WORD, width=100, height=30)
-widget_pubmed.pack(fill=tk.BOTH, expand=True)
-
-# Añadir contenido al frame de ACM
-frame_ACM = ttk.Frame(frames["Editorial Board ACM"], padding="10")
-frame_ACM.pack(side=tk.TOP, fill=tk.X)
-tk.Button(frame_ACM, text="Descargar Editorial Board CSV", command=guardar_ACM_en_CSV, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
-tk.Button(frame_ACM, text="Ver Editorial Board", command=ACM_handler, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
-link_ACM = tk.Label(frame_ACM, text="https://dl.acm.org/journal/jetc/editorial-board", fg="blue", cursor="hand2")
-link_ACM.pack(side=tk.LEFT)
-link_ACM.bind("<Button-1>", lambda e: abrir_link("https://dl.acm.org/journal/jetc/editorial-board"))
-
-widget_ACM = ScrolledText(frames["Editorial Board ACM"], wrap=tk.WORD, width=100, height=30)
-widget_ACM.pack(fill=tk.BOTH, expand=True)
-
-# Añadir contenido al frame de TNNLS
-frame_TNNLS = ttk.Frame(frames["Editorial Board TNNLS"], padding="10")
-frame_TNNLS.pack(side=tk.TOP, fill=tk.X)
-
-tk.Button(frame_TNNLS, text="Descargar Editorial Board CSV", command=guardar_TNNLS_en_CSV, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
-tk.Button(frame_TNNLS, text="Ver Editorial Board", command=TNNLS_handler, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
-link_TNNLS = tk.Label(frame_TNNLS, text="https://cis.ieee.org/publications/t-neural-networks-and-learning-systems/tnnls-editor-and-associate-editors", fg="blue", cursor="hand2")
-link_TNNLS.pack(side=tk.LEFT, padx=10)
-link_TNNLS.bind("<Button-1>", lambda e: abrir_link("https://cis.ieee.org/publications/t-neural-networks-and-learning-systems/tnnls-editor-and-associate-editors"))
-
-widget_TNNLS = ScrolledText(frames["Editorial Board TNNLS"], wrap=tk.WORD, width=100, height=30)
-widget_TNNLS.pack(fill=tk.BOTH, expand=True)
+def construir_web(frame):
+    '''
+    Añade el contenido al frame de Web Scraper
+    :param frame: tk.Frame - Frame de la pestaña
+    :return: None
+    '''
+    global entrada_url, panel_web, widget
+    frame_url = ttk.Frame(frame, padding="10")
+    frame_url.pack(side=tk.TOP, fill=tk.X)
+    ttk.Label(frame_url, text="Inserte URL:", font=("Times New Roman", 10)).pack(side=tk.LEFT)
+    entrada_url = ttk.Entry(frame_url, width=50)
+    entrada_url.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    tk.Button(frame_url, text="Scrapear", command=scraper_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
+    tk.Button(frame_url, text="Exportar", command=web_exportar_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT, padx=5)
+    tk.Button(frame_url, text="Galería", command=galeria_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
+    panel_web = PanelTarea(frame_url, ejecutor, "Web Scraper")
+
+    widget = ScrolledText(frame, wrap=tk.WORD, width=100, height=30)
+    widget.pack(fill=tk.BOTH, expand=True)
+
+def construir_arxiv(frame):
+    '''
+    Añade el contenido al frame de Arxiv
+    :param frame: tk.Frame - Frame de la pestaña
+    :return: None
+    '''
+    global query_arxiv, panel_arxiv, widget_arxiv, nuevos_arxiv
+    arxiv_frame = ttk.Frame(frame, padding="10")
+    arxiv_frame.pack(side=tk.TOP, fill=tk.X)
+    ttk.Label(arxiv_frame, text="Inserte Consulta Arxiv:").pack(side=tk.LEFT)
+    query_arxiv = ttk.Entry(arxiv_frame, width=50)
+    query_arxiv.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    nuevos_arxiv = tk.BooleanVar(value=False)
+    ttk.Checkbutton(arxiv_frame, text="Solo nuevos", variable=nuevos_arxiv).pack(side=tk.LEFT, padx=5)
+    tk.Button(arxiv_frame, text="Scrapear", command=arxiv_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
+    tk.Button(arxiv_frame, text="Exportar", command=arxiv_exportar_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT, padx=5)
+    panel_arxiv = PanelTarea(arxiv_frame, ejecutor, "Arxiv")
+
+    widget_arxiv = ScrolledText(frame, wrap=tk.WORD, width=100, height=30)
+    widget_arxiv.pack(fill=tk.BOTH, expand=True)
+
+def construir_pubmed(frame):
+    '''
+    Añade el contenido al frame de Pubmed
+    :param frame: tk.Frame - Frame de la pestaña
+    :return: None
+    '''
+    global query_pubmed, panel_pubmed, widget_pubmed, nuevos_pubmed
+    pubmed_frame = ttk.Frame(frame, padding="10")
+    pubmed_frame.pack(side=tk.TOP, fill=tk.X)
+    ttk.Label(pubmed_frame, text="Inserte Consulta Pubmed:").pack(side=tk.LEFT)
+    query_pubmed = ttk.Entry(pubmed_frame, width=50)
+    query_pubmed.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    nuevos_pubmed = tk.BooleanVar(value=False)
+    ttk.Checkbutton(pubmed_frame, text="Solo nuevos", variable=nuevos_pubmed).pack(side=tk.LEFT, padx=5)
+    tk.Button(pubmed_frame, text="Scrapear", command=pubmed_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT)
+    tk.Button(pubmed_frame, text="Exportar", command=pubmed_exportar_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT, padx=5)
+    panel_pubmed = PanelTarea(pubmed_frame, ejecutor, "PubMed")
+
+    widget_pubmed = ScrolledText(frame, wrap=tk.WORD, width=100, height=30)
+    widget_pubmed.pack(fill=tk.BOTH, expand=True)
+
+def construir_ACM(frame):
+    '''
+    Añade el contenido al frame de ACM
+    :param frame: tk.Frame - Frame de la pestaña
+    :return: None
+    '''
+    global panel_ACM, widget_ACM
+    from Scraper_ACM import URL_ACM
+    frame_ACM = ttk.Frame(frame, padding="10")
+    frame_ACM.pack(side=tk.TOP, fill=tk.X)
+    tk.Button(frame_ACM, text="Descargar Editorial Board CSV", command=ACM_CSV_handler, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
+    tk.Button(frame_ACM, text="Ver Editorial Board", command=ACM_handler, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
+    link_ACM = tk.Label(frame_ACM, text=URL_ACM, fg="blue", cursor="hand2")
+    link_ACM.pack(side=tk.LEFT)
+    link_ACM.bind("<Button-1>", lambda e: abrir_link(URL_ACM))
+    panel_ACM = PanelTarea(frame_ACM, ejecutor, "Editorial Board ACM")
+
+    widget_ACM = ScrolledText(frame, wrap=tk.WORD, width=100, height=30)
+    widget_ACM.pack(fill=tk.BOTH, expand=True)
+
+def construir_TNNLS(frame):
+    '''
+    Añade el contenido al frame de TNNLS
+    :param frame: tk.Frame - Frame de la pestaña
+    :return: None
+    '''
+    global panel_TNNLS, widget_TNNLS
+    from Scraper_TNNLS import URL_TNNLS
+    frame_TNNLS = ttk.Frame(frame, padding="10")
+    frame_TNNLS.pack(side=tk.TOP, fill=tk.X)
+
+    tk.Button(frame_TNNLS, text="Descargar Editorial Board CSV", command=TNNLS_CSV_handler, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
+    tk.Button(frame_TNNLS, text="Ver Editorial Board", command=TNNLS_handler, bg='#121DB8', fg='white', font=("Times New Roman", 14)).pack(side=tk.LEFT, padx=10)
+    link_TNNLS = tk.Label(frame_TNNLS, text=URL_TNNLS, fg="blue", cursor="hand2")
+    link_TNNLS.pack(side=tk.LEFT, padx=10)
+    link_TNNLS.bind("<Button-1>", lambda e: abrir_link(URL_TNNLS))
+    panel_TNNLS = PanelTarea(frame_TNNLS, ejecutor, "Editorial Board TNNLS")
+
+    widget_TNNLS = ScrolledText(frame, wrap=tk.WORD, width=100, height=30)
+    widget_TNNLS.pack(fill=tk.BOTH, expand=True)
+
+def construir_biblioteca(frame):
+    '''
+    Añade el contenido al frame de Biblioteca, que busca en los artículos guardados de búsquedas anteriores
+    :param frame: tk.Frame - Frame de la pestaña
+    :return: None
+    '''
+    global query_biblioteca, fuente_biblioteca, desde_biblioteca, hasta_biblioteca, fusionar_biblioteca, panel_biblioteca, widget_biblioteca
+    biblioteca_frame = ttk.Frame(frame, padding="10")
+    biblioteca_frame.pack(side=tk.TOP, fill=tk.X)
+    ttk.Label(biblioteca_frame, text="Buscar en artículos guardados:").pack(side=tk.LEFT)
+    query_biblioteca = ttk.Entry(biblioteca_frame, width=40)
+    query_biblioteca.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    query_biblioteca.bind("<Return>", biblioteca_handler)
+    fuente_biblioteca = ttk.Combobox(biblioteca_frame, values=["Todas", "arXiv", "PubMed"], state="readonly", width=8)
+    fuente_biblioteca.current(0)
+    fuente_biblioteca.pack(side=tk.LEFT, padx=5)
+    ttk.Label(biblioteca_frame, text="Desde:").pack(side=tk.LEFT)
+    desde_biblioteca = ttk.Entry(biblioteca_frame, width=10)
+    desde_biblioteca.pack(side=tk.LEFT)
+    ttk.Label(biblioteca_frame, text="Hasta:").pack(side=tk.LEFT, padx=(5, 0))
+    hasta_biblioteca = ttk.Entry(biblioteca_frame, width=10)
+    hasta_biblioteca.pack(side=tk.LEFT)
+    fusionar_biblioteca = tk.BooleanVar(value=True)
+    ttk.Checkbutton(biblioteca_frame, text="Fusionar duplicados", variable=fusionar_biblioteca).pack(side=tk.LEFT, padx=5)
+    tk.Button(biblioteca_frame, text="Buscar", command=biblioteca_handler, bg='#121DB8', fg='white', font=("Times New Roman", 10)).pack(side=tk.LEFT, padx=5)
+    panel_biblioteca = PanelTarea(biblioteca_frame, ejecutor, "Biblioteca")
+
+    widget_biblioteca = ScrolledText(frame, wrap=tk.WORD, width=100, height=30)
+    widget_biblioteca.pack(fill=tk.BOTH, expand=True)
+
+# Constructores pendientes del contenido de cada frame
+constructores = {
+    "Web Scraper": construir_web,
+    "Arxiv": construir_arxiv,
+    "PubMed": construir_pubmed,
+    "Editorial Board ACM": construir_ACM,
+    "Editorial Board TNNLS": construir_TNNLS,
+    "Biblioteca": construir_biblioteca,
+}
 
 # Mostrar el frame de Web Scraper al iniciar
-mostrar_frame(frames["Web Scraper"])
+mostrar_frame("Web Scraper")
 
 # Cargar y añadir el logo a la barra lateral
-logo = Image.open(path_logo)
-logo = logo.resize((100, 100))
-photo = ImageTk.PhotoImage(logo)
+try:
+    photo = cargar_logo(100)
+    label_logo = tk.Label(barra_lateral, image=photo, bg="#87CEFA")
+    label_logo.image = photo
+    label_logo.pack(side="bottom", pady=20)
+except Exception as e:
+    print(f"No se pudo cargar el logo: {e}")
 
-label_logo = tk.Label(barra_lateral, image=photo, bg="#87CEFA")
-label_logo.image = photo
-label_logo.pack(side="bottom", pady=20)
+# Con SCIENCESCRAPER_MEDIR_ARRANQUE se avisa al benchmark de arranque en cuanto se dibuja la primera ventana y se cierra
+if os.environ.get('SCIENCESCRAPER_MEDIR_ARRANQUE'):
+    def avisar_arranque():
+        secundaria.update_idletasks()
+        print("ARRANQUE_LISTO", flush=True)
+        raiz.destroy()
+    secundaria.after_idle(avisar_arranque)
 
 raiz.mainloop()
\ No newline at end of file
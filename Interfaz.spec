@@ -6,12 +6,29 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('logo.png', '.'),
+	('logo_300.png', '.'),
+	('logo_100.png', '.'),
 	('Arxiv.py', '.'),
 ('Pubmed.py', '.'),
 ('Scraper.py', '.'),
 ('Scraper_ACM.py', '.'),
 ('Scraper_TNNLS.py', '.'),
 ('Utils.py', '.'),
+('Http.py', '.'),
+('Cache.py', '.'),
+('Tareas.py', '.'),
+('Render.py', '.'),
+('Parseo.py', '.'),
+('Tableros.py', '.'),
+('Exportar.py', '.'),
+('Indice.py', '.'),
+('Deduplicar.py', '.'),
+('Imagenes.py', '.'),
+('Planificador.py', '.'),
+('Metricas.py', '.'),
+('Registros.py', '.'),
+('Tuberia.py', '.'),
+('Suscripciones.py', '.'),
 ],
     hiddenimports=[],
     hookspath=[],
@@ -0,0 +1,404 @@
+'''
+Métricas y trazas de los scrapeos. Cada operación medida es un tramo con su duración, sus datos (bytes,
+código de estado, número de resultados...) y el tiempo que han ocupado dentro de él sus subtramos: la
+conexión TCP y TLS, la petición HTTP, el parseo con BeautifulSoup o el pintado en Tk. Se miden
+las funciones scrapear_*, harvestear_* y mostrar_*, la capa Http, Parseo.parsear y Render.
+
+Cada tramo terminado se escribe como una línea del fichero metricas.jsonl del directorio de datos, que rota
+al alcanzar TAMANO_MAXIMO, y se acumula en memoria para resumen() (una tabla) y texto_prometheus() (formato
+de texto de Prometheus, que servir() publica por HTTP).
+
+Las métricas están desactivadas por defecto y entonces cada punto de medida solo comprueba una variable.
+Se activan con configurar(activar=True), con la opción --metricas de Consola o con la variable de entorno
+SCIENCESCRAPER_METRICAS=1.
+'''
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+import Utils
+
+# Tamaño máximo del fichero de métricas antes de rotarlo y número de ficheros antiguos que se conservan
+TAMANO_MAXIMO = 10 * 1024 * 1024
+COPIAS = 3
+# Límites superiores en segundos de las cubetas del histograma de duraciones
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Prefijo de los nombres de las métricas de Prometheus
+PREFIJO = 'sciencescraper'
+
+activadas = os.environ.get('SCIENCESCRAPER_METRICAS', '') not in ('', '0')
+RUTA = None
+
+_candado = threading.Lock()
+_local = threading.local()
+_ids = itertools.count(1)
+_agregados = {}
+_respuestas = {}
+_registro = None
+
+
+class _TramoNulo:
+    '''
+    Tramo que no mide nada, devuelto por tramo() cuando las métricas están desactivadas.
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        return False
+
+    def anotar(self, **datos):
+        pass
+
+
+_NULO = _TramoNulo()
+
+
+class _Agregado:
+    '''
+    Estadísticas acumuladas de todos los tramos con un mismo nombre.
+    '''
+
+    def __init__(self):
+        self.cantidad = 0
+        self.errores = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.bytes = 0
+        self.resultados = 0
+        self.cubetas = [0] * len(CUBETAS)
+
+    def anadir(self, duracion, datos):
+        self.cantidad += 1
+        self.total += duracion
+        self.maximo = max(self.maximo, duracion)
+        self.errores += 'error' in datos
+        self.bytes += datos.get('bytes') or 0
+        self.resultados += datos.get('resultados') or 0
+        for i, limite in enumerate(CUBETAS):
+            if duracion <= limite:
+                self.cubetas[i] += 1
+                break
+
+
+def _pila():
+    pila = getattr(_local, 'pila', None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+
+class Tramo:
+    '''
+    Operación medida. Los tramos abiertos en el mismo hilo (o en hilos lanzados con propagar()) mientras
+    está activo son sus subtramos, y su duración se suma en las fases de este y de todos sus antecesores.
+    '''
+
+    def __init__(self, nombre, datos=None):
+        '''
+        :param nombre: str - Nombre de la operación, por ejemplo 'http' o 'scrapear_arxiv'.
+        :param datos: dict - Datos iniciales del tramo.
+        '''
+        pila = _pila()
+        self.nombre = nombre
+        self.datos = datos or {}
+        self.padre = pila[-1] if pila else None
+        self.id = next(_ids)
+        self.traza = self.padre.traza if self.padre else self.id
+        self.fases = {}
+        self.inicio = time.perf_counter()
+
+    def anotar(self, **datos):
+        '''
+        Añade datos al tramo, por ejemplo los bytes descargados o el código de estado.
+        :return: None
+        '''
+        self.datos.update(datos)
+
+    def _entrar(self):
+        _pila().append(self)
+
+    def _salir(self):
+        pila = _pila()
+        if pila and pila[-1] is self:
+            pila.pop()
+
+    def __enter__(self):
+        self._entrar()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._salir()
+        self.terminar(tipo)
+        return False
+
+    def terminar(self, error=None):
+        '''
+        Cierra el tramo, lo acumula y lo escribe en el fichero de métricas.
+        :param error: type - Tipo de la excepción con la que ha terminado, si ha fallado.
+        :return: None
+        '''
+        duracion = time.perf_counter() - self.inicio
+        if error is not None:
+            self.datos['error'] = error.__name__
+        with _candado:
+            agregado = _agregados.get(self.nombre)
+            if agregado is None:
+                agregado = _agregados[self.nombre] = _Agregado()
+            agregado.anadir(duracion, self.datos)
+            ancestro = self.padre
+            while ancestro is not None:
+                ancestro.fases[self.nombre] = ancestro.fases.get(self.nombre, 0.0) + duracion
+                ancestro = ancestro.padre
+            if 'estado' in self.datos:
+                clave = (self.datos.get('host', ''), self.datos['estado'])
+                _respuestas[clave] = _respuestas.get(clave, 0) + 1
+            fases = {nombre: round(valor, 6) for nombre, valor in self.fases.items()}
+        _escribir({
+            'ts': round(time.time(), 3), 'traza': self.traza, 'id': self.id,
+            'padre': self.padre.id if self.padre else None, 'nombre': self.nombre,
+            'duracion': round(duracion, 6), **self.datos, 'fases': fases,
+        })
+
+
+def tramo(nombre, **datos):
+    '''
+    Abre un tramo para usarlo con with:
+
+        with Metricas.tramo('parseo', bytes=len(html)) as t:
+            ...
+            t.anotar(resultados=len(filas))
+
+    :param nombre: str - Nombre de la operación.
+    :param datos: Datos iniciales del tramo.
+    :return: Tramo - El tramo, o uno que no mide nada si las métricas están desactivadas.
+    '''
+    if not activadas:
+        return _NULO
+    return Tramo(nombre, datos)
+
+
+def _contar(resultado):
+    return len(resultado) if isinstance(resultado, list) else None
+
+
+def medido(nombre=None, contar=_contar):
+    '''
+    Decorador que mide cada llamada a una función como un tramo. Si la función es un generador, el tramo
+    dura hasta que se agota o se cierra y cuenta los elementos generados.
+    :param nombre: str - Nombre del tramo. Por defecto el de la función.
+    :param contar: function - Recibe el resultado y devuelve el número de resultados, o None.
+    :return: function - El decorador.
+    '''
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        if inspect.isgeneratorfunction(funcion):
+            @functools.wraps(funcion)
+            def envoltura_generador(*args, **kwargs):
+                if not activadas:
+                    return (yield from funcion(*args, **kwargs))
+                actual = Tramo(etiqueta)
+                generador = funcion(*args, **kwargs)
+                cantidad = 0
+                error = None
+                try:
+                    while True:
+                        # El tramo solo está activo mientras se ejecuta el generador, no mientras se consume
+                        actual._entrar()
+                        try:
+                            elemento = next(generador)
+                        except StopIteration:
+                            break
+                        finally:
+                            actual._salir()
+                        cantidad += 1
+                        yield elemento
+                except BaseException as e:
+                    if not isinstance(e, GeneratorExit):
+                        error = type(e)
+                    raise
+                finally:
+                    generador.close()
+                    actual.anotar(resultados=cantidad)
+                    actual.terminar(error)
+            return envoltura_generador
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not activadas:
+                return funcion(*args, **kwargs)
+            with Tramo(etiqueta) as actual:
+                resultado = funcion(*args, **kwargs)
+                cantidad = contar(resultado) if contar else None
+                if cantidad is not None:
+                    actual.anotar(resultados=cantidad)
+                return resultado
+        return envoltura
+    return decorador
+
+
+def propagar(funcion):
+    '''
+    Prepara una función que se va a ejecutar en otro hilo para que sus tramos cuelguen del tramo actual.
+    :param funcion: function - Función enviada a un ThreadPoolExecutor.
+    :return: function - La función envuelta, o la misma función si no hay tramo activo.
+    '''
+    if not activadas:
+        return funcion
+    pila = _pila()
+    if not pila:
+        return funcion
+    padre = pila[-1]
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        propia = _pila()
+        propia.append(padre)
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            propia.remove(padre)
+    return envoltura
+
+
+def _escribir(registro):
+    global _registro
+    if _registro is None:
+        with _candado:
+            if _registro is None:
+                ruta = RUTA or Utils.ruta_datos('metricas.jsonl')
+                manejador = RotatingFileHandler(ruta, maxBytes=TAMANO_MAXIMO, backupCount=COPIAS, encoding='utf-8', delay=True)
+                manejador.setFormatter(logging.Formatter('%(message)s'))
+                registro_log = logging.getLogger('sciencescraper.metricas')
+                registro_log.propagate = False
+                registro_log.setLevel(logging.INFO)
+                registro_log.handlers[:] = [manejador]
+                _registro = registro_log
+    _registro.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+def configurar(activar=None, ruta=None, tamano_maximo=None, copias=None):
+    '''
+    Cambia la configuración de las métricas.
+    :param activar: bool - Activa o desactiva las métricas.
+    :param ruta: str - Fichero JSONL en el que se escriben los tramos. Por defecto metricas.jsonl del directorio de datos.
+    :param tamano_maximo: int - Tamaño en bytes a partir del cual se rota el fichero.
+    :param copias: int - Ficheros rotados que se conservan.
+    :return: None
+    '''
+    global activadas, RUTA, TAMANO_MAXIMO, COPIAS, _registro
+    with _candado:
+        if activar is not None:
+            activadas = activar
+        if ruta is not None:
+            RUTA = ruta
+        if tamano_maximo is not None:
+            TAMANO_MAXIMO = tamano_maximo
+        if copias is not None:
+            COPIAS = copias
+        if _registro is not None:
+            for manejador in _registro.handlers:
+                manejador.close()
+            _registro = None
+
+
+def reiniciar():
+    '''
+    Descarta las estadísticas acumuladas en memoria. El fichero de métricas no se modifica.
+    :return: None
+    '''
+    with _candado:
+        _agregados.clear()
+        _respuestas.clear()
+
+
+def resumen():
+    '''
+    :return: str - Tabla con el número de llamadas, errores, tiempos, bytes y resultados de cada operación.
+    '''
+    with _candado:
+        filas = sorted(_agregados.items(), key=lambda item: item[1].total, reverse=True)
+        lineas = [f"{'operación':<28} {'llamadas':>9} {'errores':>8} {'total s':>9} {'media ms':>9} {'máx ms':>9} {'bytes':>12} {'resultados':>10}"]
+        for nombre, agregado in filas:
+            media = agregado.total / agregado.cantidad * 1000 if agregado.cantidad else 0
+            lineas.append(f"{nombre:<28} {agregado.cantidad:>9} {agregado.errores:>8} {agregado.total:>9.2f} {media:>9.1f} "
+                          f"{agregado.maximo * 1000:>9.1f} {agregado.bytes:>12} {agregado.resultados:>10}")
+        if _respuestas:
+            lineas.append('')
+            lineas.append(f"{'host':<40} {'estado':>6} {'respuestas':>10}")
+            for (host, estado), cantidad in sorted(_respuestas.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+                lineas.append(f"{host:<40} {estado!s:>6} {cantidad:>10}")
+    return '\n'.join(lineas)
+
+
+def _etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def texto_prometheus():
+    '''
+    :return: str - Las estadísticas acumuladas en el formato de texto de Prometheus.
+    '''
+    lineas = []
+    with _candado:
+        agregados = sorted(_agregados.items())
+        lineas.append(f"# HELP {PREFIJO}_operacion_segundos Duración de cada operación medida.")
+        lineas.append(f"# TYPE {PREFIJO}_operacion_segundos histogram")
+        for nombre, agregado in agregados:
+            etiqueta = f'operacion="{_etiqueta(nombre)}"'
+            acumulado = 0
+            for limite, cantidad in zip(CUBETAS, agregado.cubetas):
+                acumulado += cantidad
+                lineas.append(f'{PREFIJO}_operacion_segundos_bucket{{{etiqueta},le="{limite}"}} {acumulado}')
+            lineas.append(f'{PREFIJO}_operacion_segundos_bucket{{{etiqueta},le="+Inf"}} {agregado.cantidad}')
+            lineas.append(f'{PREFIJO}_operacion_segundos_sum{{{etiqueta}}} {agregado.total:.6f}')
+            lineas.append(f'{PREFIJO}_operacion_segundos_count{{{etiqueta}}} {agregado.cantidad}')
+        for metrica, atributo, ayuda in (('errores', 'errores', 'Operaciones terminadas con una excepción.'),
+                                         ('bytes', 'bytes', 'Bytes descargados o parseados.'),
+                                         ('resultados', 'resultados', 'Resultados devueltos.')):
+            lineas.append(f"# HELP {PREFIJO}_{metrica}_total {ayuda}")
+            lineas.append(f"# TYPE {PREFIJO}_{metrica}_total counter")
+            for nombre, agregado in agregados:
+                lineas.append(f'{PREFIJO}_{metrica}_total{{operacion="{_etiqueta(nombre)}"}} {getattr(agregado, atributo)}')
+        lineas.append(f"# HELP {PREFIJO}_respuestas_http_total Respuestas HTTP por host y código de estado.")
+        lineas.append(f"# TYPE {PREFIJO}_respuestas_http_total counter")
+        for (host, estado), cantidad in sorted(_respuestas.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            lineas.append(f'{PREFIJO}_respuestas_http_total{{host="{_etiqueta(host)}",estado="{_etiqueta(estado)}"}} {cantidad}')
+    return '\n'.join(lineas) + '\n'
+
+
+def servir(puerto, direccion='127.0.0.1'):
+    '''
+    Publica texto_prometheus() en http://direccion:puerto/metrics desde un hilo en segundo plano.
+    :param puerto: int - Puerto en el que se escucha.
+    :param direccion: str - Dirección en la que se escucha. Por defecto solo la local.
+    :return: http.server.ThreadingHTTPServer - El servidor, que se detiene con shutdown().
+    '''
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            cuerpo = texto_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((direccion, puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, name='metricas', daemon=True).start()
+    return servidor
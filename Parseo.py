@@ -0,0 +1,147 @@
+import codecs
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+import Metricas
+
+# Detector de codificación rápido para las páginas que no la declaran (dependencia de requests)
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+# Parser de HTML: lxml (en C) si está instalado, si no el de la librería estándar
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# Si es False se construye el árbol completo aunque el extractor indique sus zonas
+FILTRAR = True
+
+# Bytes del principio del documento en los que se busca la etiqueta <meta> con la codificación
+PREFIJO_META = 4096
+# Bytes que analiza el detector cuando la página no declara su codificación
+PREFIJO_DETECCION = 64 * 1024
+_CHARSET_CABECERA = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_CHARSET_META = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+_decodificador_utf8 = codecs.getincrementaldecoder('utf-8')
+
+
+class Zonas(SoupStrainer):
+    '''
+    Filtro de parseo que solo construye las etiquetas con alguno de los nombres o clases indicados, junto con
+    todo su contenido. El resto del documento se descarta mientras se parsea, sin llegar a crear sus objetos.
+    '''
+
+    def __init__(self, nombres=(), clases=()):
+        '''
+        :param nombres: iterable - Nombres de las etiquetas a conservar (por ejemplo 'h3').
+        :param clases: iterable - Clases CSS de las etiquetas a conservar.
+        '''
+        super().__init__()
+        self.nombres = frozenset(nombres)
+        self.clases = frozenset(clases)
+
+    def conservar(self, nombre, atributos):
+        '''
+        :param nombre: str - Nombre de la etiqueta.
+        :param atributos: dict - Atributos de la etiqueta tal y como los entrega el parser.
+        :return: bool - True si la etiqueta debe conservarse.
+        '''
+        if nombre in self.nombres:
+            return True
+        clase = (atributos or {}).get('class')
+        if not clase or not self.clases:
+            return False
+        clases = clase.split() if isinstance(clase, str) else clase
+        return not self.clases.isdisjoint(clases)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.conservar(name, attrs)
+
+    def allow_string_creation(self, string):
+        # El texto fuera de las etiquetas conservadas no se necesita
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        # Versiones de BeautifulSoup anteriores a la 4.13 filtran con search_tag durante el parseo
+        if isinstance(markup_name, str):
+            return markup_name if self.conservar(markup_name, markup_attrs) else None
+        return super().search_tag(markup_name, markup_attrs)
+
+
+def configurar(parser=None, filtrar=None):
+    '''
+    Cambia el parser y el filtrado por zonas usados por todos los scrapers.
+    :param parser: str - 'lxml' o 'html.parser'.
+    :param filtrar: bool - Si es False se parsea siempre el documento completo.
+    :return: None
+    '''
+    global PARSER, FILTRAR
+    if parser is not None:
+        PARSER = parser
+    if filtrar is not None:
+        FILTRAR = filtrar
+
+
+def _nombre_codec(nombre):
+    # Nombre normalizado de la codificación, o None si Python no la conoce
+    try:
+        nombre = codecs.lookup(nombre.decode('ascii') if isinstance(nombre, bytes) else nombre).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+    # Como en los navegadores, las páginas declaradas en latin-1 o ASCII se leen como windows-1252
+    return 'cp1252' if nombre in ('iso8859-1', 'ascii') else nombre
+
+
+def detectar_codificacion(contenido, content_type=None):
+    '''
+    Detecta la codificación de una página sin decodificarla entera: primero la marca BOM, después el charset
+    del Content-Type y la etiqueta <meta> del principio del documento y, si no declara ninguna, se comprueba
+    si los primeros PREFIJO_DETECCION bytes son UTF-8 válido y, si no lo son, se usa un detector rápido sobre
+    ellos. Una página sin declarar que solo deja de ser UTF-8 después de ese prefijo se toma como UTF-8 y
+    esos caracteres no se leen bien.
+    :param contenido: bytes - El cuerpo de la respuesta.
+    :param content_type: str - Cabecera Content-Type de la respuesta.
+    :return: str - Nombre de la codificación, o None si no se ha podido determinar.
+    '''
+    for bom, nombre in _BOMS:
+        if contenido.startswith(bom):
+            return nombre
+    declarada = _CHARSET_CABECERA.search(content_type or '')
+    if declarada and _nombre_codec(declarada.group(1)):
+        return _nombre_codec(declarada.group(1))
+    declarada = _CHARSET_META.search(contenido[:PREFIJO_META])
+    if declarada and _nombre_codec(declarada.group(1)):
+        return _nombre_codec(declarada.group(1))
+    # Validar UTF-8 es mucho más rápido que cualquier detector, y es la codificación de casi todas las páginas.
+    # Con final=False no falla si el prefijo corta un carácter de varios bytes
+    try:
+        _decodificador_utf8().decode(contenido[:PREFIJO_DETECCION], final=len(contenido) <= PREFIJO_DETECCION)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if from_bytes is not None:
+        candidatas = from_bytes(contenido[:PREFIJO_DETECCION])
+        mejor = candidatas.best()
+        if mejor is not None:
+            # En caso de empate se prefiere windows-1252, la que suponen los navegadores en las páginas sin declarar
+            empatadas = [c.encoding for c in candidatas if (c.chaos, c.coherence) == (mejor.chaos, mejor.coherence)]
+            return 'cp1252' if 'cp1252' in empatadas else mejor.encoding
+    return None
+
+
+def parsear(html, zonas=None, codificacion=None):
+    '''
+    Parsea un documento HTML con el parser configurado.
+    :param html: str or bytes - El contenido HTML.
+    :param zonas: Zonas - Partes del documento que necesita el extractor. Por defecto el documento completo.
+    :param codificacion: str - Codificación del contenido en bytes (ver detectar_codificacion), que se prueba
+                               antes que las que deduce BeautifulSoup.
+    :return: BeautifulSoup - El árbol del documento (o de las zonas indicadas).
+    '''
+    with Metricas.tramo('parseo', bytes=len(html)):
+        return BeautifulSoup(html, PARSER, parse_only=zonas if FILTRAR else None,
+                             from_encoding=codificacion if isinstance(html, bytes) else None)
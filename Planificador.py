@@ -0,0 +1,273 @@
+'''
+Planificador de peticiones por host. Cada host con un límite de uso conocido (arXiv, NCBI, ACM, IEEE) tiene
+un cubo de tokens que espacia las peticiones de todos los hilos, de forma que ninguna función de descarga
+necesita esperar por su cuenta. El ritmo se adapta a las respuestas del servidor: un 429 o un 503 con
+Retry-After bloquean el host el tiempo indicado y reducen su tasa a la mitad, los errores la reducen algo
+menos y cada respuesta correcta la recupera poco a poco hasta el límite configurado.
+
+Http.obtener llama a esperar_turno y registrar en cada petición. Para repartir muchos trabajos entre
+varios hosts sin que los hilos se queden esperando en el host más lento se usa repartir().
+'''
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import Metricas
+
+# Límites de uso publicados por cada servicio: peticiones por segundo y ráfaga máxima
+LIMITES = {
+    # arXiv pide no hacer más de una petición cada 3 segundos
+    'export.arxiv.org': (1 / 3, 1),
+    # La interfaz OAI-PMH de arXiv regula el ritmo con 503 y Retry-After; se usa el mismo ritmo que la API
+    'oaipmh.arxiv.org': (1 / 3, 1),
+    # NCBI permite 3 peticiones por segundo, o 10 con clave de API (NCBI_API_KEY)
+    'eutils.ncbi.nlm.nih.gov': (10, 10) if os.environ.get('NCBI_API_KEY') else (3, 3),
+    'dl.acm.org': (1, 2),
+    'ieeexplore.ieee.org': (1, 2),
+    'cis.ieee.org': (1, 2),
+}
+# Respuestas con las que el servidor indica que se le está pidiendo demasiado
+ESTADOS_LIMITE = (429, 503)
+# Tasa con la que empieza a limitarse un host sin límite conocido que responde 429, y su máximo
+TASA_ADAPTATIVA = 1.0
+TASA_MAXIMA_ADAPTATIVA = 10.0
+# Tasa mínima a la que se puede reducir un host, en peticiones por segundo
+TASA_MINIMA = 1 / 60
+# Factores de reducción de la tasa ante un 429/503 y ante otros errores, y recuperación por cada acierto
+REDUCCION_LIMITE = 0.5
+REDUCCION_ERROR = 0.8
+RECUPERACION = 0.05
+# Espera máxima que se acepta de un Retry-After
+MAX_RETRY_AFTER = 600
+# Trabajos simultáneos por host en repartir() para los hosts sin límite
+MAX_EN_VUELO_SIN_LIMITE = 4
+
+
+def retry_after(cabeceras):
+    '''
+    :param cabeceras: Mapping - Cabeceras de la respuesta.
+    :return: float - Segundos indicados por Retry-After (en segundos o como fecha HTTP), o None.
+    '''
+    valor = (cabeceras or {}).get('Retry-After')
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return min(float(valor), MAX_RETRY_AFTER)
+    try:
+        return min(max(0.0, parsedate_to_datetime(valor).timestamp() - time.time()), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return None
+
+
+class CuboHost:
+    '''
+    Cubo de tokens de un host. Cada petición reserva un token; si no hay, la reserva queda en deuda y la
+    petición espera hasta que le toque, de forma que los hilos se atienden en orden de llegada.
+    '''
+
+    def __init__(self, tasa=None, rafaga=1, tasa_maxima=None):
+        '''
+        :param tasa: float - Peticiones por segundo, o None si el host no tiene límite.
+        :param rafaga: int - Peticiones que se pueden hacer seguidas tras un periodo sin uso.
+        :param tasa_maxima: float - Tasa hasta la que se recupera tras reducirse. Por defecto la tasa inicial.
+        '''
+        self.tasa = tasa
+        self.tasa_maxima = tasa_maxima or tasa
+        self.rafaga = rafaga
+        self.tokens = float(rafaga)
+        self.ultimo = time.monotonic()
+        self.bloqueado_hasta = 0.0
+        self.peticiones = 0
+        self.errores = 0
+        self._candado = threading.Lock()
+
+    def _rellenar(self, ahora):
+        if self.tasa:
+            self.tokens = min(self.rafaga, self.tokens + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+
+    def reservar(self):
+        '''
+        Reserva el turno de una petición.
+        :return: float - Segundos que hay que esperar antes de hacerla.
+        '''
+        with self._candado:
+            ahora = time.monotonic()
+            espera = max(0.0, self.bloqueado_hasta - ahora)
+            if self.tasa:
+                self._rellenar(ahora)
+                self.tokens -= 1
+                if self.tokens < 0:
+                    espera = max(espera, -self.tokens / self.tasa)
+            return espera
+
+    def disponible_en(self):
+        '''
+        :return: float - Segundos hasta que una petición nueva podría hacerse sin esperar.
+        '''
+        with self._candado:
+            ahora = time.monotonic()
+            espera = max(0.0, self.bloqueado_hasta - ahora)
+            if self.tasa:
+                self._rellenar(ahora)
+                if self.tokens < 1:
+                    espera = max(espera, (1 - self.tokens) / self.tasa)
+            return espera
+
+    def registrar(self, estado=None, cabeceras=None, error=False):
+        '''
+        Adapta la tasa del host al resultado de una petición.
+        :param estado: int - Código de estado de la respuesta.
+        :param cabeceras: Mapping - Cabeceras de la respuesta.
+        :param error: bool - True si la petición falló sin respuesta (conexión, timeout...).
+        :return: None
+        '''
+        with self._candado:
+            ahora = time.monotonic()
+            self.peticiones += 1
+            if estado in ESTADOS_LIMITE:
+                self.errores += 1
+                if not self.tasa:
+                    self.tasa, self.tasa_maxima = TASA_ADAPTATIVA, TASA_MAXIMA_ADAPTATIVA
+                    self.tokens = 0.0
+                else:
+                    self.tasa = max(TASA_MINIMA, self.tasa * REDUCCION_LIMITE)
+                espera = retry_after(cabeceras)
+                self.bloqueado_hasta = max(self.bloqueado_hasta, ahora + (espera if espera is not None else 1 / self.tasa))
+            elif error or (estado is not None and estado >= 500):
+                self.errores += 1
+                if self.tasa:
+                    self.tasa = max(TASA_MINIMA, self.tasa * REDUCCION_ERROR)
+            elif self.tasa and self.tasa < self.tasa_maxima:
+                self.tasa = min(self.tasa_maxima, self.tasa + self.tasa_maxima * RECUPERACION)
+
+
+_candado = threading.Lock()
+_cubos = {}
+
+
+def clave_host(url):
+    '''
+    :param url: str - URL de la petición.
+    :return: str - Host al que se aplican los límites: el de LIMITES que corresponde a la URL (o a un
+                   dominio suyo), o el host de la URL si no tiene límite conocido.
+    '''
+    host = (urlsplit(url).hostname or '').lower()
+    for limitado in LIMITES:
+        if host == limitado or host.endswith('.' + limitado):
+            return limitado
+    return host
+
+
+def obtener_cubo(url):
+    '''
+    :param url: str - URL de la petición.
+    :return: CuboHost - El cubo del host de la URL, creándolo la primera vez.
+    '''
+    clave = clave_host(url)
+    with _candado:
+        cubo = _cubos.get(clave)
+        if cubo is None:
+            tasa, rafaga = LIMITES.get(clave, (None, 1))
+            cubo = _cubos[clave] = CuboHost(tasa, rafaga)
+        return cubo
+
+
+def configurar_limite(host, tasa, rafaga=1):
+    '''
+    Cambia el límite de un host. Con tasa None el host deja de estar limitado.
+    :param host: str - Host, por ejemplo 'export.arxiv.org'.
+    :param tasa: float - Peticiones por segundo.
+    :param rafaga: int - Peticiones seguidas permitidas tras un periodo sin uso.
+    :return: None
+    '''
+    with _candado:
+        if tasa is None:
+            LIMITES.pop(host, None)
+        else:
+            LIMITES[host] = (tasa, rafaga)
+        _cubos.pop(host, None)
+
+
+def esperar_turno(url):
+    '''
+    Bloquea el hilo hasta que el host de la URL admita una petición más.
+    :param url: str - URL de la petición.
+    :return: float - Segundos esperados.
+    '''
+    cubo = obtener_cubo(url)
+    total = 0.0
+    espera = cubo.reservar()
+    while espera > 0:
+        time.sleep(espera)
+        total += espera
+        # Un 429 recibido mientras se esperaba puede haber bloqueado el host durante más tiempo
+        espera = cubo.bloqueado_hasta - time.monotonic()
+    return total
+
+
+def registrar(url, estado=None, cabeceras=None, error=False):
+    '''
+    Informa al planificador del resultado de una petición.
+    :param url: str - URL de la petición.
+    :param estado: int - Código de estado de la respuesta.
+    :param cabeceras: Mapping - Cabeceras de la respuesta.
+    :param error: bool - True si la petición falló sin respuesta.
+    :return: None
+    '''
+    obtener_cubo(url).registrar(estado, cabeceras, error)
+
+
+def estado():
+    '''
+    :return: dict - Tasa actual, peticiones y errores de cada host usado.
+    '''
+    with _candado:
+        cubos = dict(_cubos)
+    return {host: {'tasa': cubo.tasa, 'peticiones': cubo.peticiones, 'errores': cubo.errores} for host, cubo in cubos.items()}
+
+
+def repartir(trabajos, max_hilos=8):
+    '''
+    Ejecuta trabajos que piden URLs de varios hosts. En lugar de lanzarlos en orden, cada vez que queda un
+    hilo libre se lanza el siguiente trabajo del host que antes admite una petición, y de cada host
+    limitado solo hay en vuelo tantos trabajos como su ráfaga, de forma que los hilos no se quedan
+    esperando en un host lento mientras otros podrían avanzar.
+    :param trabajos: iterable - Tuplas (url, funcion, *argumentos). La función se llama con los argumentos.
+    :param max_hilos: int - Trabajos simultáneos en total.
+    :return: generator - Pares (url, futuro) según va terminando cada trabajo.
+    '''
+    colas = OrderedDict()
+    for url, funcion, *argumentos in trabajos:
+        colas.setdefault(clave_host(url), deque()).append((url, funcion, argumentos))
+    en_vuelo = Counter()
+    pendientes = {}
+
+    def capacidad(host):
+        tasa, rafaga = LIMITES.get(host, (None, 1))
+        return max(1, int(rafaga)) if tasa else MAX_EN_VUELO_SIN_LIMITE
+
+    ejecutor = ThreadPoolExecutor(max_workers=max(1, max_hilos))
+    try:
+        while colas or pendientes:
+            while colas and len(pendientes) < max_hilos:
+                candidatos = [host for host in colas if en_vuelo[host] < capacidad(host)]
+                if not candidatos:
+                    break
+                host = min(candidatos, key=lambda h: (obtener_cubo(colas[h][0][0]).disponible_en(), en_vuelo[h]))
+                url, funcion, argumentos = colas[host].popleft()
+                if not colas[host]:
+                    del colas[host]
+                pendientes[ejecutor.submit(Metricas.propagar(funcion), *argumentos)] = (url, host)
+                en_vuelo[host] += 1
+            terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                url, host = pendientes.pop(futuro)
+                en_vuelo[host] -= 1
+                yield url, futuro
+    finally:
+        ejecutor.shutdown(wait=False, cancel_futures=True)
@@ -1,56 +1,243 @@
+import json
+import os
+import re
 import requests
-from bs4 import BeautifulSoup
-from tkinter import messagebox
-from urllib.parse import urljoin
-import tkinter as tk
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+import Http
+import Indice
+import Metricas
+from Registros import Articulo
+from Render import Bloque, mostrar_bloques
 
-def scrapear_pubmed(query):
+# URLs de PubMed y de sus E-utilities
+URL_PUBMED = "https://pubmed.ncbi.nlm.nih.gov/"
+URL_EUTILS = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+# Número de PMIDs que se piden en cada llamada a efetch
+TAMANO_LOTE_PUBMED = 500
+_ARTICULO_EFETCH = re.compile(rb'<Pubmed(?:Book)?Article>')
+
+def _parametros_eutils(**parametros):
+    '''
+    Añade a los parámetros de una llamada a las E-utilities la identificación recomendada por NCBI.
+    La clave de API y el email se leen de las variables de entorno NCBI_API_KEY y NCBI_EMAIL.
+    :param parametros: dict - Parámetros propios de la llamada.
+    :return: dict - Parámetros completos de la llamada.
+    '''
+    parametros['db'] = 'pubmed'
+    parametros['tool'] = 'ScienceScraper'
+    if os.environ.get('NCBI_API_KEY'):
+        parametros['api_key'] = os.environ['NCBI_API_KEY']
+    if os.environ.get('NCBI_EMAIL'):
+        parametros['email'] = os.environ['NCBI_EMAIL']
+    return parametros
+
+def parsear_esearch(contenido):
+    '''
+    Analiza la respuesta JSON de esearch con usehistory=y.
+    :param contenido: bytes - Cuerpo de la respuesta de esearch.
+    :return: tuple - (número total de resultados, WebEnv, query_key).
+    '''
+    resultado = json.loads(contenido)['esearchresult']
+    if 'ERROR' in resultado:
+        raise ValueError(f"Error de esearch: {resultado['ERROR']}")
+    return int(resultado.get('count', 0)), resultado.get('webenv'), resultado.get('querykey')
+
+def _texto(elemento):
+    # Texto completo de un elemento, incluidas etiquetas internas como <i> o <sup>
+    return ''.join(elemento.itertext()).strip() if elemento is not None else ''
+
+def _articulo_a_resultado(articulo):
+    '''
+    Convierte un elemento PubmedArticle del XML de efetch en el registro de resultado.
+    :param articulo: xml.etree.ElementTree.Element - Elemento PubmedArticle.
+    :return: Articulo - Registro con los datos del artículo. Los campos que no vienen en el XML valen None.
+    '''
+    citacion = articulo.find('MedlineCitation')
+    datos = citacion.find('Article')
+    pmid = citacion.findtext('PMID', '').strip()
+
+    autores = []
+    for autor in datos.iterfind('AuthorList/Author'):
+        apellido = autor.findtext('LastName')
+        if apellido:
+            iniciales = autor.findtext('Initials')
+            autores.append(f"{apellido} {iniciales}" if iniciales else apellido)
+        elif autor.findtext('CollectiveName'):
+            autores.append(_texto(autor.find('CollectiveName')))
+
+    partes_resumen = []
+    for parte in datos.iterfind('Abstract/AbstractText'):
+        etiqueta = parte.get('Label')
+        texto = _texto(parte)
+        partes_resumen.append(f"{etiqueta}: {texto}" if etiqueta else texto)
+
+    fecha = datos.find('Journal/JournalIssue/PubDate')
+    if fecha is not None and fecha.findtext('MedlineDate'):
+        fecha_publicacion = fecha.findtext('MedlineDate')
+    elif fecha is not None:
+        fecha_publicacion = ' '.join(filter(None, (fecha.findtext('Year'), fecha.findtext('Month'), fecha.findtext('Day'))))
+    else:
+        fecha_publicacion = ''
+
+    doi = ''
+    for identificador in articulo.iterfind('PubmedData/ArticleIdList/ArticleId'):
+        if identificador.get('IdType') == 'doi':
+            doi = (identificador.text or '').strip()
+
+    return Articulo(
+        titulo=_texto(datos.find('ArticleTitle')),
+        autores=', '.join(autores) or None,
+        resumen='\n'.join(partes_resumen) or None,
+        link=f"{URL_PUBMED}{pmid}/",
+        pmid=pmid,
+        revista=datos.findtext('Journal/Title') or None,
+        fecha_publicacion=fecha_publicacion or None,
+        doi=doi or None,
+    )
+
+def parsear_efetch(flujo):
+    '''
+    Analiza de forma incremental el XML de efetch, liberando cada artículo después de convertirlo.
+    :param flujo: file - Fichero o flujo binario con el XML de efetch.
+    :return: generator - Genera un registro Articulo por cada PubmedArticle.
+    '''
+    for _, elemento in iterparse(flujo, events=('end',)):
+        if elemento.tag == 'PubmedArticle':
+            yield _articulo_a_resultado(elemento)
+            elemento.clear()
+
+def _filtro_fechas(desde=None, dias=None):
+    '''
+    :param desde: str - Fecha mínima de entrada en PubMed (AAAA/MM/DD).
+    :param dias: int - Número de días hacia atrás desde hoy, si no se indica desde.
+    :return: dict - Parámetros de esearch que limitan la búsqueda por fecha de entrada en PubMed (edat).
+    '''
+    if desde:
+        return {'datetype': 'edat', 'mindate': desde, 'maxdate': '3000'}
+    if dias:
+        return {'datetype': 'edat', 'reldate': dias}
+    return {}
+
+def _buscar_pubmed(query, cache=True, **filtros):
+    parametros = _parametros_eutils(term=query, usehistory='y', retmax=0, retmode='json', **filtros)
+    respuesta = Http.obtener(f"{URL_EUTILS}esearch.fcgi", params=parametros, cache=cache)
+    respuesta.raise_for_status()
+    return parsear_esearch(respuesta.content)
+
+def _pedir_lote_pubmed(webenv, query_key, inicio, cantidad):
+    parametros = _parametros_eutils(WebEnv=webenv, query_key=query_key, retstart=inicio, retmax=cantidad, retmode='xml')
+    # efetch devuelve a veces lotes vacíos o cortados de forma transitoria: solo se guardan en la caché los completos
+    respuesta = Http.obtener(f"{URL_EUTILS}efetch.fcgi", params=parametros, timeout=(Http.TIMEOUT_CONEXION, 120),
+                             guardar=lambda r: len(_ARTICULO_EFETCH.findall(r.content)) >= cantidad)
+    respuesta.raise_for_status()
+    return respuesta.content
+
+def extraer_pubmed(contenido):
+    '''
+    Analiza un lote de artículos de efetch.
+    :param contenido: bytes - XML devuelto por efetch.
+    :return: list - Un registro Articulo por cada PubmedArticle.
+    '''
+    return list(parsear_efetch(BytesIO(contenido)))
+
+def descargar_lotes_pubmed(query, max_resultados=1000, tamano_lote=TAMANO_LOTE_PUBMED, desde=None, dias=None):
+    '''
+    Busca con esearch y descarga con efetch los lotes de artículos de una consulta sin analizarlos, para
+    separar la descarga del análisis (Tuberia).
+    :param query: str - La consulta de búsqueda.
+    :param max_resultados: int - Número máximo de artículos a descargar.
+    :param tamano_lote: int - Número de artículos pedidos en cada llamada a efetch.
+    :param desde: str - Solo los artículos que entraron en PubMed desde esa fecha (AAAA/MM/DD).
+    :param dias: int - Solo los artículos que entraron en PubMed en los últimos días, si no se indica desde.
+    :return: generator - Genera el XML de cada lote en bytes.
+    '''
+    filtros = _filtro_fechas(desde, dias)
+    # Una búsqueda por fechas cambia cada día: no se guarda en caché
+    total, webenv, query_key = _buscar_pubmed(query, not filtros, **filtros)
+    total = min(total, max_resultados)
+    inicio = 0
+    while inicio < total:
+        cantidad = min(tamano_lote, total - inicio)
+        try:
+            contenido = _pedir_lote_pubmed(webenv, query_key, inicio, cantidad)
+        except requests.HTTPError:
+            # El WebEnv guardado en caché puede haber caducado en el history server
+            if inicio:
+                raise
+            _, webenv, query_key = _buscar_pubmed(query, cache=False, **filtros)
+            contenido = _pedir_lote_pubmed(webenv, query_key, inicio, cantidad)
+        yield contenido
+        inicio += cantidad
+
+@Metricas.medido()
+def harvestear_pubmed(query, max_resultados=1000, tamano_lote=TAMANO_LOTE_PUBMED, desde=None, dias=None):
+    '''
+    Busca artículos en PubMed con esearch guardando la búsqueda en el history server de NCBI y
+    los descarga por lotes con efetch, de modo que miles de artículos cuestan unas pocas peticiones.
+    :param query: str - La consulta de búsqueda.
+    :param max_resultados: int - Número máximo de artículos a descargar.
+    :param tamano_lote: int - Número de artículos pedidos en cada llamada a efetch.
+    :param desde: str - Solo los artículos que entraron en PubMed desde esa fecha (AAAA/MM/DD).
+    :param dias: int - Solo los artículos que entraron en PubMed en los últimos días, si no se indica desde.
+    :return: generator - Genera registros Articulo con título, autores, resumen completo, enlace, PMID, revista, fecha y DOI.
+    '''
+    for contenido in descargar_lotes_pubmed(query, max_resultados, tamano_lote, desde, dias):
+        # Cada lote se guarda en el índice local antes de entregarlo
+        yield from Indice.indexar('pubmed', extraer_pubmed(contenido), query)
+
+@Metricas.medido()
+def scrapear_pubmed(query, max_resultados=100):
     '''
     Busca artículos en pubmed utilizando una consulta y devuelve una lista de resultados.
     :param query: str - La consulta de búsqueda para encontrar artículos en pubmed.
-    :return: list - Una lista de diccionarios, cada uno representando un artículo con su título, resumen y enlace.
-    '''
-    
-    #URLs de pubmed y la de consulta del usuario
-    url_pubmed = "https://pubmed.ncbi.nlm.nih.gov/"
-    url_busqueda = f"{url_pubmed}?term={query}"
-    #Solicitud HTTP y análisis de respuesta con BeautifulSoup
-    respuesta = requests.get(url_busqueda)
-    soup = BeautifulSoup(respuesta.text, 'html.parser')
-    articulos = soup.find_all('article', class_='full-docsum')
-    #Iteración sobre los artículos encontrados y creación de diccionario
-    resultados = []
-    for articulo in articulos:
-        titulo = articulo.find('a', class_='docsum-title').text.strip()
-        autores = articulo.find('span', class_='docsum-authors full-authors').text.strip() if articulo.find('span', class_='docsum-authors full-authors') else "No hay autores disponibles"
-        link = urljoin(url_pubmed, articulo.find('a', class_='docsum-title')['href'])
-        resumen = articulo.find('div', class_='full-view-snippet').text.strip() if articulo.find('div', class_='full-view-snippet') else "No hay resumen disponible"
-        resultados.append({'titulo': titulo, 'autores': autores, 'resumen': resumen, 'link': link})
-    return resultados
-
-def mostrar_pubmed(query_pubmed,widget_pubmed,insertar_link):
+    :param max_resultados: int - Número máximo de artículos a devolver.
+    :return: list - Una lista de registros Articulo, con el título, autores, resumen completo y enlace de cada artículo.
+    '''
+    return list(harvestear_pubmed(query, max_resultados))
+
+@Metricas.medido()
+def mostrar_pubmed(query_pubmed,widget_pubmed):
     '''
     Esta función recoge la query insertada por el usuario y scrapea sobre ella en pubmed, mostrando los resultados en un widget de texto
     :param: None
     :return: None
     '''
-    
+    from tkinter import messagebox
+
     # Obtiene la query insertada por el usuario y verifica que no está vacía
     query = query_pubmed.get()
     if not query:
         messagebox.showwarning("Input Error", "Por favor, introduzca una consulta valida")
         return
 
-    # Scrapea en pubmed con la query insertada y verifica que haya resultados
-    results = scrapear_pubmed(query)
-    widget_pubmed.delete('1.0', tk.END)
+    # Scrapea en pubmed con la query insertada y muestra los resultados
+    pintar_pubmed(widget_pubmed, scrapear_pubmed(query))
+
+def bloques_pubmed(results):
+    '''
+    Genera los bloques de texto con los que se muestran los resultados de pubmed.
+    :param results: list - Lista de resultados devuelta por scrapear_pubmed.
+    :return: generator - Un Bloque por resultado.
+    '''
+    for result in results:
+        yield (Bloque()
+               .texto(f"Titulo: {result['titulo']}\n\n"
+                      f"Autores: {result.texto('autores')}\n\n"
+                      f"Resumen: {result.texto('resumen')}\n\n")
+               .link(result['link'], result['link'])
+               .texto("\n\n"))
+
+def pintar_pubmed(widget_pubmed, results, vacio="No se han encontrado resultados para esta consulta."):
+    '''
+    Muestra en un widget de texto los resultados de una búsqueda en pubmed.
+    :param widget_pubmed: tk.Text - El widget de texto donde se muestran los resultados.
+    :param results: list - Lista de resultados devuelta por scrapear_pubmed.
+    :param vacio: str - Texto que se muestra si no hay resultados.
+    :return: None
+    '''
+    # Verifica que haya resultados e introduce los datos obtenidos en el widget de texto
     if not results:
-        widget_pubmed.insert(tk.END, "No se han encontrado resultados para esta consulta.")
-    # Introduce los datos obtenidos en el widget de texto
+        mostrar_bloques(widget_pubmed, [Bloque().texto(vacio)])
     else:
-        for result in results:
-            widget_pubmed.insert(tk.END, f"Titulo: {result['titulo']}\n\n")
-            widget_pubmed.insert(tk.END, f"Autores: {result['autores']}\n\n")
-            widget_pubmed.insert(tk.END, f"Resumen: {result['resumen']}\n\n")
-            insertar_link(widget_pubmed, result['link'], result['link'], results.index(result))
-            widget_pubmed.insert(tk.END, "\n\n")
+        mostrar_bloques(widget_pubmed, bloques_pubmed(results))
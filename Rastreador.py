@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import posixpath
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+import requests
+import Http
+import Metricas
+from Parseo import detectar_codificacion
+from Scraper import MAX_BYTES_WEB, TIPOS_WEB, extraer_web
+
+# Configuración por defecto del rastreo
+PROFUNDIDAD = 1
+MAX_PAGINAS = 1000
+CONCURRENCIA = 8
+CONEXIONES_POR_HOST = 2
+RETARDO_HOST = 0.5
+AGENTE = 'ScienceScraper'
+
+# Extensiones que nunca contienen HTML y no merece la pena pedir
+EXTENSIONES_IGNORADAS = {
+    '.pdf', '.zip', '.gz', '.tar', '.rar', '.7z', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico',
+    '.mp3', '.mp4', '.avi', '.mov', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.css', '.js', '.xml',
+}
+
+_log = logging.getLogger('sciencescraper.rastreador')
+
+
+def _extraer_respuesta(respuesta):
+    # La detección de la codificación y el parseo se hacen en un hilo, fuera del bucle de eventos
+    codificacion = detectar_codificacion(respuesta.content, respuesta.headers.get('Content-Type'))
+    return extraer_web(respuesta.url, respuesta.content, codificacion)
+
+
+def normalizar_url(url):
+    '''
+    Normaliza una URL para que las variantes de una misma página se detecten como repetidas: esquema y host
+    en minúsculas, sin puerto por defecto, sin fragmento, sin segmentos '.' y '..', y con los parámetros
+    ordenados y sin los de seguimiento (utm_*).
+    :param url: str - URL absoluta.
+    :return: str - URL normalizada, o None si no es http/https o está mal formada.
+    '''
+    # urlsplit y port lanzan ValueError con hosts IPv6 sin cerrar o puertos no numéricos o fuera de rango
+    try:
+        partes = urlsplit(url.strip())
+        puerto = partes.port
+    except ValueError:
+        return None
+    esquema = partes.scheme.lower()
+    if esquema not in ('http', 'https'):
+        return None
+    host = (partes.hostname or '').lower()
+    if not host:
+        return None
+    if puerto and not (esquema == 'http' and puerto == 80 or esquema == 'https' and puerto == 443):
+        host = f"{host}:{puerto}"
+    ruta = partes.path or '/'
+    if '.' in ruta:
+        final = '/' if ruta.endswith('/') else ''
+        ruta = posixpath.normpath(ruta) + final
+        ruta = '/' + ruta.lstrip('/') if ruta != '//' else '/'
+    parametros = sorted((k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True) if not k.startswith('utm_'))
+    return urlunsplit((esquema, host, ruta, urlencode(parametros), ''))
+
+
+def _dominio_base(host):
+    return host[4:] if host.startswith('www.') else host
+
+
+def en_ambito(url, url_inicial, ambito):
+    '''
+    Indica si una URL está dentro del ámbito del rastreo.
+    :param url: str - URL normalizada.
+    :param url_inicial: str - URL normalizada desde la que empezó el rastreo.
+    :param ambito: str - 'host' (mismo host), 'dominio' (mismo dominio y subdominios) o 'todo'.
+    :return: bool - True si la URL debe rastrearse.
+    '''
+    if posixpath.splitext(urlsplit(url).path)[1].lower() in EXTENSIONES_IGNORADAS:
+        return False
+    if ambito == 'todo':
+        return True
+    host = urlsplit(url).netloc
+    host_inicial = urlsplit(url_inicial).netloc
+    if ambito == 'host':
+        return host == host_inicial
+    base = _dominio_base(host_inicial)
+    return host == base or host.endswith('.' + base)
+
+
+class _Host:
+    '''
+    Estado de cortesía de un host: robots.txt, conexiones simultáneas y momento de la siguiente petición.
+    '''
+
+    def __init__(self, conexiones):
+        self.semaforo = asyncio.Semaphore(conexiones)
+        self.candado = asyncio.Lock()
+        self.siguiente = 0.0
+        self.robots = None
+        self.retardo = None
+
+
+class Rastreador:
+    '''
+    Rastreador asíncrono de páginas web. Sigue los enlaces extraídos de cada página hasta una profundidad y un
+    ámbito dados, respetando robots.txt y un retardo mínimo entre peticiones a un mismo host.
+    La frontera de URLs es una cola asyncio y las URLs normalizadas ya vistas se guardan en un conjunto.
+    Los fallos de red y los errores inesperados de una página se anotan en errores y el rastreo sigue con el resto.
+    '''
+
+    def __init__(self, url_inicial, profundidad=PROFUNDIDAD, ambito='dominio', max_paginas=MAX_PAGINAS, concurrencia=CONCURRENCIA,
+                 conexiones_por_host=CONEXIONES_POR_HOST, retardo_host=RETARDO_HOST, respetar_robots=True):
+        '''
+        :param url_inicial: str - URL desde la que empieza el rastreo.
+        :param profundidad: int - Número de saltos de enlace a seguir desde la página inicial.
+        :param ambito: str - 'host', 'dominio' o 'todo'.
+        :param max_paginas: int - Número máximo de páginas a descargar.
+        :param concurrencia: int - Número de descargas simultáneas en total.
+        :param conexiones_por_host: int - Número de descargas simultáneas contra un mismo host.
+        :param retardo_host: float - Segundos mínimos entre dos peticiones a un mismo host.
+        :param respetar_robots: bool - Si es True no se piden las URLs prohibidas en robots.txt.
+        '''
+        self.url_inicial = normalizar_url(url_inicial)
+        if self.url_inicial is None:
+            raise ValueError(f"URL no válida para rastrear: {url_inicial}")
+        self.profundidad = profundidad
+        self.ambito = ambito
+        self.max_paginas = max_paginas
+        self.concurrencia = concurrencia
+        self.conexiones_por_host = conexiones_por_host
+        self.retardo_host = retardo_host
+        self.respetar_robots = respetar_robots
+        self.vistas = set()
+        self.errores = {}
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _Host(self.conexiones_por_host)
+        return self._hosts[host]
+
+    async def _cargar_robots(self, url, estado):
+        # Se descarga una sola vez por host; los errores de red o 404 permiten todo, 401/403 lo prohíben
+        async with estado.candado:
+            if estado.robots is not None:
+                return
+            partes = urlsplit(url)
+            robots = RobotFileParser()
+            try:
+                respuesta = await asyncio.to_thread(Http.obtener, f"{partes.scheme}://{partes.netloc}/robots.txt")
+                if respuesta.status_code in (401, 403):
+                    robots.disallow_all = True
+                elif respuesta.status_code == 200:
+                    robots.parse(respuesta.text.splitlines())
+                else:
+                    robots.allow_all = True
+            except requests.RequestException:
+                robots.allow_all = True
+            estado.retardo = robots.crawl_delay(AGENTE)
+            estado.robots = robots
+
+    async def _descargar(self, url):
+        estado = self._host(url)
+        if self.respetar_robots:
+            await self._cargar_robots(url, estado)
+            if not estado.robots.can_fetch(AGENTE, url):
+                return None
+        retardo = max(self.retardo_host, estado.retardo or 0)
+        async with estado.semaforo:
+            # Reserva el siguiente hueco libre del host y espera hasta él
+            ahora = time.monotonic()
+            inicio = max(ahora, estado.siguiente)
+            estado.siguiente = inicio + retardo
+            if inicio > ahora:
+                await asyncio.sleep(inicio - ahora)
+            # Las páginas demasiado grandes o que no son texto se cortan sin terminar de descargarlas
+            return await asyncio.to_thread(Metricas.propagar(Http.obtener), url, max_bytes=MAX_BYTES_WEB, tipos=TIPOS_WEB)
+
+    async def _trabajador(self, frontera, emitir):
+        while True:
+            url, nivel = await frontera.get()
+            try:
+                respuesta = await self._descargar(url)
+                if respuesta is None or respuesta.status_code != 200 or 'html' not in respuesta.headers.get('Content-Type', 'text/html'):
+                    continue
+                pagina = await asyncio.to_thread(Metricas.propagar(_extraer_respuesta), respuesta)
+                # Si el consumidor va lento solo espera este trabajador, no el bucle entero
+                await emitir(replace(pagina, url=url, profundidad=nivel))
+                if nivel < self.profundidad:
+                    for link in pagina['links']:
+                        siguiente = normalizar_url(link['url'])
+                        if (siguiente and siguiente not in self.vistas and len(self.vistas) < self.max_paginas
+                                and en_ambito(siguiente, self.url_inicial, self.ambito)):
+                            self.vistas.add(siguiente)
+                            frontera.put_nowait((siguiente, nivel + 1))
+            except requests.RequestException as e:
+                self.errores[url] = f"{type(e).__name__}: {e}"
+                _log.warning("Error de red al rastrear %s: %s", url, e)
+            except Exception as e:
+                # Un fallo en una página no debe terminar el trabajador: la frontera no se vaciaría nunca
+                self.errores[url] = f"{type(e).__name__}: {e}"
+                _log.warning("Error al rastrear %s", url, exc_info=True)
+            finally:
+                frontera.task_done()
+
+    async def rastrear(self, emitir):
+        '''
+        Rastrea desde la URL inicial y espera a emitir con el registro de cada página descargada.
+        :param emitir: function - Función asíncrona que recibe un registro PaginaWeb con url, profundidad, titulo,
+                                  parrafos, links e imagenes. No debe bloquear el bucle: si tiene que esperar al
+                                  consumidor, lo hace en un hilo (run_in_executor).
+        :return: None
+        '''
+        frontera = asyncio.Queue()
+        self.vistas.add(self.url_inicial)
+        frontera.put_nowait((self.url_inicial, 0))
+        trabajadores = [asyncio.create_task(self._trabajador(frontera, emitir)) for _ in range(self.concurrencia)]
+        try:
+            await frontera.join()
+        finally:
+            for trabajador in trabajadores:
+                trabajador.cancel()
+            await asyncio.gather(*trabajadores, return_exceptions=True)
+
+
+@Metricas.medido()
+def rastrear_web(url, profundidad=PROFUNDIDAD, ambito='dominio', max_paginas=MAX_PAGINAS, **opciones):
+    '''
+    Modo rastreo de scrapear_web: sigue los enlaces de la página hasta la profundidad indicada y devuelve el
+    registro de cada página según se descarga. El rastreo se ejecuta en un bucle asyncio en otro hilo.
+    :param url: str - URL desde la que empieza el rastreo.
+    :param profundidad: int - Número de saltos de enlace a seguir desde la página inicial.
+    :param ambito: str - 'host', 'dominio' o 'todo'.
+    :param max_paginas: int - Número máximo de páginas a descargar.
+    :param opciones: dict - Resto de parámetros de Rastreador.
+    :return: generator - Genera registros PaginaWeb con url, profundidad, titulo, parrafos, links e imagenes.
+    '''
+    rastreador = Rastreador(url, profundidad, ambito, max_paginas, **opciones)
+    # Cola acotada: si el consumidor es lento el rastreo se frena en lugar de acumular páginas
+    salida = queue.Queue(maxsize=100)
+    fin = object()
+    parar = threading.Event()
+    bucle = asyncio.new_event_loop()
+
+    def entregar(elemento):
+        # Si el consumidor ha cerrado el generador el elemento se descarta en lugar de bloquear el hilo
+        while not parar.is_set():
+            try:
+                salida.put(elemento, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    # Las páginas se entregan desde un hilo propio, en orden: mientras la cola está llena solo esperan los
+    # trabajadores que tienen una página que entregar, y el bucle sigue con robots.txt y las descargas
+    entregas = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rastreo-entrega')
+
+    async def emitir(pagina):
+        await bucle.run_in_executor(entregas, entregar, pagina)
+
+    tarea = bucle.create_task(rastreador.rastrear(emitir))
+
+    def ejecutar():
+        try:
+            bucle.run_until_complete(tarea)
+        except BaseException as e:
+            if not parar.is_set():
+                entregar(e)
+        finally:
+            # Espera a las descargas que estuvieran en curso en los hilos de to_thread
+            bucle.run_until_complete(bucle.shutdown_default_executor())
+            bucle.close()
+            entregas.shutdown(wait=True, cancel_futures=True)
+            entregar(fin)
+
+    hilo = threading.Thread(target=Metricas.propagar(ejecutar), daemon=True)
+    hilo.start()
+    try:
+        while True:
+            elemento = salida.get()
+            if elemento is fin:
+                break
+            if isinstance(elemento, BaseException):
+                raise elemento
+            yield elemento
+    finally:
+        parar.set()
+        # Al cerrar el generador antes de tiempo se cancela el rastreo entero desde el hilo del bucle
+        try:
+            bucle.call_soon_threadsafe(tarea.cancel)
+        except RuntimeError:
+            # El bucle ya se ha cerrado: el rastreo había terminado
+            pass
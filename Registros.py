@@ -0,0 +1,173 @@
+'''
+Tipos de registro de los resultados de los scrapers: Articulo (arXiv y PubMed), MiembroTablero (editorial
+boards) y PaginaWeb (scrapeo y rastreo web, con sus Enlace e Imagen). Son dataclasses inmutables con
+__slots__, mucho más pequeñas que un diccionario por resultado, y los campos categóricos que se repiten
+entre registros (roles, países, afiliaciones, categorías, revistas) se internan para que todos los
+registros compartan la misma cadena. Los campos que faltan valen None; el texto que se muestra en su lugar
+lo da texto().
+
+Para no cambiar el código que trata los resultados como diccionarios (exportadores, índice local,
+deduplicación), los registros admiten también la lectura como mapping: registro['titulo'],
+registro.get('pmid'), dict(registro) o {**registro}.
+'''
+import sys
+from dataclasses import dataclass
+
+
+class Registro:
+    '''
+    Base de los registros: lectura como mapping y texto para mostrar los campos vacíos.
+    '''
+    __slots__ = ()
+    # Campos que se internan al crear el registro
+    CATEGORICOS = ()
+    # Texto que se muestra en lugar de cada campo vacío
+    TEXTOS_VACIOS = {}
+
+    def __post_init__(self):
+        for campo in self.CATEGORICOS:
+            valor = getattr(self, campo)
+            if valor.__class__ is str:
+                object.__setattr__(self, campo, sys.intern(valor))
+
+    def __reduce__(self):
+        # Al deserializar (por ejemplo los resultados que llegan de los procesos de Tuberia) el registro se
+        # vuelve a crear con __init__, de forma que los campos categóricos se internan en este proceso
+        return self.__class__, self.values()
+
+    def keys(self):
+        return self.__match_args__
+
+    def values(self):
+        return tuple(getattr(self, campo) for campo in self.__match_args__)
+
+    def items(self):
+        return tuple((campo, getattr(self, campo)) for campo in self.__match_args__)
+
+    def __getitem__(self, campo):
+        if campo not in self.__match_args__:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def __contains__(self, campo):
+        return campo in self.__match_args__
+
+    def get(self, campo, defecto=None):
+        '''
+        :param campo: str - Nombre del campo.
+        :param defecto: Valor si el registro no tiene ese campo.
+        :return: El valor del campo (None si está vacío), o defecto si el registro no tiene ese campo.
+        '''
+        return getattr(self, campo) if campo in self.__match_args__ else defecto
+
+    def valores(self, campos):
+        '''
+        :param campos: iterable - Nombres de los campos.
+        :return: tuple - Valores de los campos en ese orden, por ejemplo para escribir una fila de CSV.
+        '''
+        return tuple(getattr(self, campo) for campo in campos)
+
+    def como_dict(self):
+        '''
+        :return: dict - Los campos del registro.
+        '''
+        return {campo: getattr(self, campo) for campo in self.__match_args__}
+
+    def texto(self, campo):
+        '''
+        :param campo: str - Nombre del campo.
+        :return: str - El valor del campo, o el texto que se muestra cuando está vacío.
+        '''
+        valor = getattr(self, campo)
+        return self.TEXTOS_VACIOS.get(campo, '') if valor is None else valor
+
+
+@dataclass(frozen=True, slots=True)
+class Articulo(Registro):
+    '''
+    Artículo de arXiv o de PubMed. Los campos propios de una sola fuente quedan a None en la otra.
+    '''
+    titulo: str
+    autores: str = None
+    resumen: str = None
+    link: str = None
+    fecha_publicacion: str = None
+    categorias: str = None
+    comentarios: str = None
+    referencia_journal: str = None
+    pmid: str = None
+    revista: str = None
+    doi: str = None
+
+    CATEGORICOS = ('categorias', 'revista')
+    TEXTOS_VACIOS = {
+        'autores': 'No hay autores disponibles',
+        'resumen': 'No hay resumen disponible',
+        'fecha_publicacion': 'No hay fecha de publicación disponible',
+        'categorias': 'No hay categorías disponibles',
+        'comentarios': 'No hay comentarios disponibles',
+        'referencia_journal': 'No hay referencia a journal disponible',
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class MiembroTablero(Registro):
+    '''
+    Miembro de un editorial board. revista, url y perfil solo se rellenan en las filas del conjunto de
+    datos de Tableros.scrapear_tableros.
+    '''
+    rol: str = None
+    nombre: str = None
+    afiliacion: str = None
+    pais: str = None
+    email: str = None
+    web: str = None
+    revista: str = None
+    url: str = None
+    perfil: str = None
+
+    CATEGORICOS = ('rol', 'afiliacion', 'pais', 'revista', 'url', 'perfil')
+
+
+@dataclass(frozen=True, slots=True)
+class Enlace(Registro):
+    '''
+    Enlace de una página web, con su texto y su URL completa.
+    '''
+    text: str
+    url: str
+
+
+@dataclass(frozen=True, slots=True)
+class Imagen(Registro):
+    '''
+    Imagen de una página web, con su texto alternativo y su URL completa.
+    '''
+    alt: str
+    src: str
+
+
+@dataclass(frozen=True, slots=True)
+class PaginaWeb(Registro):
+    '''
+    Datos extraídos de una página web. url y profundidad solo se rellenan al rastrear un sitio.
+    '''
+    titulo: str
+    parrafos: tuple = ()
+    links: tuple = ()
+    imagenes: tuple = ()
+    url: str = None
+    profundidad: int = None
+
+    TEXTOS_VACIOS = {'titulo': 'No se ha encontrado titulo'}
+
+
+def serializar(objeto):
+    '''
+    Función default de json.dumps para los registros.
+    :param objeto: object - Objeto que json no sabe convertir.
+    :return: dict - Los campos del registro.
+    '''
+    if isinstance(objeto, Registro):
+        return objeto.como_dict()
+    raise TypeError(f"{type(objeto).__name__} no se puede convertir a JSON")
@@ -0,0 +1,194 @@
+from bisect import bisect_right
+from itertools import islice
+import Metricas
+from Utils import abrir_link, mostrar_imagen
+
+# Número de bloques que se insertan de una vez al mostrar o al hacer scroll
+TAMANO_LOTE = 200
+# Fracción del contenido visible a partir de la cual se insertan más bloques
+UMBRAL_SCROLL = 0.9
+
+
+class Bloque:
+    '''
+    Bloque de texto de un resultado, formado por trozos de texto plano y de links. Cada link ocupa
+    sus propias líneas, de forma que la línea pulsada basta para identificarlo.
+    '''
+
+    def __init__(self):
+        self.partes = []
+
+    def texto(self, texto):
+        '''
+        Añade texto plano al bloque.
+        :param texto: str - Texto a añadir.
+        :return: Bloque - El propio bloque, para encadenar llamadas.
+        '''
+        self.partes.append((texto, None, None))
+        return self
+
+    def link(self, url, texto=None):
+        '''
+        Añade un link que se abre en el navegador al hacer clic.
+        :param url: str - La URL del link.
+        :param texto: str - Texto a mostrar antes de la URL.
+        :return: Bloque - El propio bloque, para encadenar llamadas.
+        '''
+        self.partes.append((f"{texto} - {url}\n\n" if texto is not None else f"{url}\n\n", 'link', url))
+        return self
+
+    def imagen(self, url, texto):
+        '''
+        Añade un link a una imagen que se muestra en una ventana al hacer clic.
+        :param url: str - La URL de la imagen.
+        :param texto: str - Texto alternativo de la imagen.
+        :return: Bloque - El propio bloque, para encadenar llamadas.
+        '''
+        self.partes.append((f"{texto} - {url}\n\n", 'imagen', url))
+        return self
+
+
+class Destinos:
+    '''
+    Destino de cada link mostrado y líneas que ocupa, por etiqueta. Los links se añaden en el orden en el que
+    se insertan, así que las líneas quedan ordenadas y el link de la línea pulsada se busca con bisect. Los
+    links seguidos forman un único rango de su etiqueta en el widget, por lo que no basta con el rango.
+    '''
+
+    def __init__(self):
+        self._lineas = {}
+
+    def limpiar(self):
+        self._lineas.clear()
+
+    def anadir(self, etiqueta, inicio, fin, destino):
+        '''
+        :param etiqueta: str - 'link' o 'imagen'.
+        :param inicio: int - Primera línea del link.
+        :param fin: int - Línea siguiente a la última del link.
+        :param destino: str - URL del link.
+        :return: None
+        '''
+        inicios, fines, destinos = self._lineas.setdefault(etiqueta, ([], [], []))
+        inicios.append(inicio)
+        fines.append(fin)
+        destinos.append(destino)
+
+    def buscar(self, etiqueta, linea):
+        '''
+        :param etiqueta: str - 'link' o 'imagen'.
+        :param linea: int - Línea del widget.
+        :return: str - URL del link de esa etiqueta que ocupa la línea, o None si no hay ninguno.
+        '''
+        inicios, fines, destinos = self._lineas.get(etiqueta, ((), (), ()))
+        posicion = bisect_right(inicios, linea) - 1
+        if posicion >= 0 and linea < fines[posicion]:
+            return destinos[posicion]
+        return None
+
+
+def preparar_lote(lote, linea, destinos):
+    '''
+    Convierte un lote de bloques en los argumentos de una única llamada a insert y anota en destinos las
+    líneas de cada link.
+    :param lote: list - Bloques a insertar.
+    :param linea: int - Línea en la que empieza el lote.
+    :param destinos: Destinos - Destinos de los links mostrados.
+    :return: list - Textos y etiquetas alternados, para widget.insert('end', *argumentos).
+    '''
+    argumentos = []
+    for bloque in lote:
+        for texto, etiqueta, destino in bloque.partes:
+            saltos = texto.count('\n')
+            if etiqueta:
+                destinos.anadir(etiqueta, linea, linea + max(1, saltos), destino)
+                argumentos.extend((texto, etiqueta))
+            else:
+                argumentos.extend((texto, ()))
+            linea += saltos
+    return argumentos
+
+
+class VistaResultados:
+    '''
+    Muestra bloques de resultados en un widget de texto. Los bloques se insertan por lotes con una única
+    llamada a insert, los links comparten una sola etiqueta por tipo y la URL se busca a partir de la línea
+    pulsada (ver Destinos), y los lotes siguientes solo se insertan cuando el usuario se acerca al final con el scroll.
+    '''
+
+    def __init__(self, widget):
+        '''
+        :param widget: ScrolledText - Widget de texto en el que se muestran los resultados.
+        '''
+        self.widget = widget
+        self._destinos = Destinos()
+        self._pendientes = None
+        self._programado = False
+        for etiqueta, color, accion in (('link', 'blue', abrir_link), ('imagen', 'green', mostrar_imagen)):
+            widget.tag_config(etiqueta, foreground=color, underline=True)
+            widget.tag_bind(etiqueta, "<Button-1>", lambda e, etiqueta=etiqueta, accion=accion: self._clic(e, etiqueta, accion))
+            widget.tag_bind(etiqueta, "<Enter>", lambda e: widget.config(cursor="hand2"))
+            widget.tag_bind(etiqueta, "<Leave>", lambda e: widget.config(cursor=""))
+        widget.configure(yscrollcommand=self._scroll)
+
+    def mostrar(self, bloques):
+        '''
+        Sustituye el contenido del widget por los bloques indicados.
+        :param bloques: iterable - Bloques a mostrar. Puede ser un generador, que se consume según se hace scroll.
+        :return: None
+        '''
+        self.widget.delete('1.0', 'end')
+        self._destinos.limpiar()
+        self._pendientes = iter(bloques)
+        self._renderizar_lote()
+
+    def _renderizar_lote(self):
+        self._programado = False
+        if self._pendientes is None:
+            return
+        lote = list(islice(self._pendientes, TAMANO_LOTE))
+        if len(lote) < TAMANO_LOTE:
+            self._pendientes = None
+        if not lote:
+            return
+        with Metricas.tramo('render', resultados=len(lote)):
+            # Línea en la que empieza el lote; se actualiza contando saltos de línea
+            linea = int(self.widget.index('end-1c').split('.')[0])
+            self.widget.insert('end', *preparar_lote(lote, linea, self._destinos))
+
+    def _scroll(self, primero, ultimo):
+        barra = getattr(self.widget, 'vbar', None)
+        if barra is not None:
+            barra.set(primero, ultimo)
+        if self._pendientes is not None and not self._programado and float(ultimo) >= UMBRAL_SCROLL:
+            self._programado = True
+            self.widget.after_idle(self._renderizar_lote)
+
+    def _clic(self, evento, etiqueta, accion):
+        # El link se identifica por la línea pulsada
+        linea = int(self.widget.index(f"@{evento.x},{evento.y}").split('.')[0])
+        destino = self._destinos.buscar(etiqueta, linea)
+        if destino:
+            accion(destino)
+
+
+def obtener_vista(widget):
+    '''
+    Devuelve la vista de resultados asociada a un widget, creándola la primera vez.
+    :param widget: ScrolledText - Widget de texto.
+    :return: VistaResultados - La vista del widget.
+    '''
+    vista = getattr(widget, '_vista_resultados', None)
+    if vista is None:
+        vista = widget._vista_resultados = VistaResultados(widget)
+    return vista
+
+
+def mostrar_bloques(widget, bloques):
+    '''
+    Muestra bloques de resultados en un widget de texto.
+    :param widget: ScrolledText - Widget de texto.
+    :param bloques: iterable - Bloques a mostrar.
+    :return: None
+    '''
+    obtener_vista(widget).mostrar(bloques)
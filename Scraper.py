@@ -1,41 +1,76 @@
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-import tkinter as tk
-from tkinter import messagebox
+import Http
+import Metricas
+from Parseo import Zonas, detectar_codificacion, parsear
+from Registros import Enlace, Imagen, PaginaWeb
+from Render import Bloque, mostrar_bloques
 
-def scrapear_web(url):
+# Partes de la página que se extraen: título, párrafos, enlaces e imágenes
+ZONAS_WEB = Zonas(['title', 'p', 'a', 'img'])
+# Tamaño máximo de una página y tipos de contenido que se aceptan (los que acaban en '/' son prefijos)
+MAX_BYTES_WEB = 10 * 1024 * 1024
+TIPOS_WEB = ('text/', 'application/xhtml+xml', 'application/xml')
+
+def descargar_web(url, max_bytes=MAX_BYTES_WEB, tipos=TIPOS_WEB):
     '''
-    Esta funcion toma una URL de cualquier web y devuelve un diccionario con el titulo,los parrafos, los enlaces y las imagenes encontrados en la web.
-    :param url: str - La URL de la página web a scrapear.
-    :return: dict - Un diccionario con los datos scrapeados.
+    Descarga una página por bloques, parando en cuanto supera el tamaño máximo o si no es de un tipo
+    permitido, y detecta su codificación sin decodificarla.
+    :param url: str - La URL de la página.
+    :param max_bytes: int - Tamaño máximo de la página en bytes.
+    :param tipos: tuple - Content-Type permitidos.
+    :return: tuple - El contenido en bytes y su codificación (None si no se ha podido determinar).
     '''
+    respuesta = Http.obtener(url, max_bytes=max_bytes, tipos=tipos)
+    respuesta.raise_for_status()  # Lanza una excepción si la respuesta no es exitosa
+    return respuesta.content, detectar_codificacion(respuesta.content, respuesta.headers.get('Content-Type'))
+
+def _url_completa(url, relativa):
+    # urljoin lanza ValueError con hrefs mal formados, como un host IPv6 sin cerrar; esos se descartan
     try:
-        # Realizar la solicitud HTTP con un tiempo de espera
-        respuesta = requests.get(url, timeout=10)
-        respuesta.raise_for_status()  # Lanza una excepción si la respuesta no es exitosa
+        return urljoin(url, relativa)
+    except ValueError:
+        return None
+
+def extraer_web(url, html, codificacion=None):
+    '''
+    Extrae el titulo, los parrafos, los enlaces y las imagenes del HTML de una página.
+    :param url: str - La URL de la página, usada para completar los enlaces relativos.
+    :param html: str or bytes - El contenido HTML de la página.
+    :param codificacion: str - Codificación del contenido si se pasa en bytes.
+    :return: PaginaWeb - Registro con los datos scrapeados.
+    '''
+    # Analizar solo las partes del HTML que se extraen
+    soup = parsear(html, ZONAS_WEB, codificacion)
 
-        # Analizar el contenido HTML de la respuesta
-        soup = BeautifulSoup(respuesta.text, 'html.parser')
+    # Extraer el título de la página (como str, para no mantener vivo el árbol del documento)
+    titulo = str(soup.title.string) if soup.title and soup.title.string is not None else None
 
-        # Extraer el título de la página
-        titulo = soup.title.string if soup.title else 'No se ha encontrado titulo'
+    # Extraer todos los párrafos
+    parrafos = tuple(p.text for p in soup.find_all('p'))
 
-        # Extraer todos los párrafos
-        parrafos = [p.text for p in soup.find_all('p')]
+    # Extraer todos los enlaces con texto y URL completa
+    links = tuple(Enlace(a.get_text(), destino) for a in soup.find_all('a', href=True)
+                  if (destino := _url_completa(url, a['href'])) is not None)
 
-        # Extraer todos los enlaces con texto y URL completa
-        links = [{'text': a.get_text(), 'url': urljoin(url, a['href'])} for a in soup.find_all('a', href=True)]
+    # Extraer todas las imágenes con alt y URL completa
+    imagenes = tuple(Imagen(img.get('alt', ''), destino) for img in soup.find_all('img', src=True)
+                     if (destino := _url_completa(url, img['src'])) is not None)
 
-        # Extraer todas las imágenes con alt y URL completa
-        imagenes = [{'alt': img.get('alt', ''), 'src': urljoin(url, img['src'])} for img in soup.find_all('img', src=True)]
+    return PaginaWeb(titulo, parrafos, links, imagenes)
 
-        return {
-            'titulo': titulo,
-            'parrafos': parrafos,
-            'links': links,
-            'imagenes': imagenes
-        }
+@Metricas.medido()
+def scrapear_web(url, max_bytes=MAX_BYTES_WEB, tipos=TIPOS_WEB):
+    '''
+    Esta funcion toma una URL de cualquier web y devuelve un registro con el titulo,los parrafos, los enlaces y las imagenes encontrados en la web.
+    :param url: str - La URL de la página web a scrapear.
+    :param max_bytes: int - Tamaño máximo de la página en bytes.
+    :param tipos: tuple - Content-Type permitidos.
+    :return: PaginaWeb or str - Un registro con los datos scrapeados, o el mensaje de error.
+    '''
+    try:
+        # Descargar la página a través de la sesión compartida y pasar los bytes directamente al parser
+        return extraer_web(url, *descargar_web(url, max_bytes, tipos))
     
     except requests.ConnectionError:
         return "Error: No se pudo conectar con el servidor."
@@ -44,12 +79,14 @@ def scrapear_web(url):
     except requests.RequestException as e:
         return f"Error: {e}"
     
-def mostrar_datos(entrada_url,widget,insertar_link,insertar_imagen):
+@Metricas.medido()
+def mostrar_datos(entrada_url,widget):
     '''  
     Esta función obtiene la URL del usuario, verifica que no esté vacía y realiza un scraping de la página web. Muestra los datos extraídos en un widget de texto.
     :param: None
     :return: None
     '''
+    from tkinter import messagebox
     
     # Obtener la URL desde el campo de entrada
     url = entrada_url.get()
@@ -60,32 +97,39 @@ def mostrar_datos(entrada_url,widget,insertar_link,insertar_imagen):
         messagebox.showwarning("Input Error", "Por favor, inserte una URL valida")
         return
     
-    # Llamar a la función scrapear_web para obtener los datos de la URL
-    data = scrapear_web(url)
-    
+    # Llamar a la función scrapear_web para obtener los datos de la URL y mostrarlos
+    pintar_datos(widget, scrapear_web(url))
+
+def bloques_web(data):
+    '''
+    Genera los bloques de texto con los que se muestran los datos de una página web.
+    :param data: PaginaWeb - Datos devueltos por scrapear_web.
+    :return: generator - Bloques con el título, cada párrafo, cada link y cada imagen.
+    '''
+    # Título de la página y párrafos
+    yield Bloque().texto(f"Titulo: {data.texto('titulo')}\n\nParrafos:\n")
+    for p in data['parrafos']:
+        yield Bloque().texto(f"{p}\n\n")
+
+    # Enlaces de la página
+    yield Bloque().texto("Links:\n")
+    for link in data['links']:
+        yield Bloque().link(link['url'], link['text'])
+
+    # Imágenes de la página
+    yield Bloque().texto("Imagenes:\n")
+    for image in data['imagenes']:
+        yield Bloque().imagen(image['src'], image['alt'])
+
+def pintar_datos(widget, data):
+    '''
+    Muestra en un widget de texto los datos extraídos de una página web, o el mensaje de error si el scrapeo falló.
+    :param widget: tk.Text - El widget de texto donde se muestran los datos.
+    :param data: PaginaWeb or str - Resultado de scrapear_web.
+    :return: None
+    '''
     # Verificar si el resultado de scrapear_web es un mensaje de error, es decir, un string
     if isinstance(data, str):
-        # Borrar el contenido del widget de texto
-        widget.delete('1.0', tk.END)
-        # Insertar el mensaje de error en el widget de texto
-        widget.insert(tk.END, data)
+        mostrar_bloques(widget, [Bloque().texto(data)])
     else:
-        # Borrar el contenido del widget de texto
-        widget.delete('1.0', tk.END)
-        # Insertar el título de la página en el widget de texto
-        widget.insert(tk.END, f"Titulo: {data['titulo']}\n\n")
-        
-        # Insertar los párrafos de la página en el widget de texto
-        widget.insert(tk.END, "Parrafos:\n")
-        for p in data['parrafos']:
-            widget.insert(tk.END, f"{p}\n\n")
-        
-        # Insertar los enlaces de la página en el widget de texto
-        widget.insert(tk.END, "Links:\n")
-        for index, link in enumerate(data['links']):
-            insertar_link(widget, link['url'], link['text'], index)
-        
-        # Insertar las imágenes de la página en el widget de texto
-        widget.insert(tk.END, "Imagenes:\n")
-        for index, image in enumerate(data['imagenes']):
-            insertar_imagen(widget, image['src'], image['alt'], index)
\ No newline at end of file
+        mostrar_bloques(widget, bloques_web(data))
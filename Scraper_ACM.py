@@ -1,38 +1,39 @@
 import requests
-from bs4 import BeautifulSoup
-from tkinter import messagebox, filedialog
-import tkinter as tk
 import csv
 import os
+from itertools import chain
+import Http
+import Metricas
+from Tableros import PERFILES, extraer_tablero
+from Render import Bloque, mostrar_bloques
 
+# URL del editorial board de ACM JETC
+URL_ACM = 'https://dl.acm.org/journal/jetc/editorial-board'
+# Campos de cada miembro que se escriben en el CSV
+CAMPOS_CSV = ('rol', 'nombre', 'afiliacion', 'pais')
+
+def extraer_ACM(html):
+    '''
+    Esta función extrae la lista de miembros del editorial board del HTML de la página de ACM, con el perfil
+    'acm' del motor de editorial boards.
+    :param html: str or bytes - El contenido HTML de la página.
+    :return: tuple - Contiene el nombre de la revista y una lista de registros MiembroTablero del editorial board.
+    '''
+    return extraer_tablero(html, PERFILES['acm'])
+
+@Metricas.medido(contar=lambda resultado: len(resultado[1]))
 def scrapear_ACM(url):
     '''
     Esta función scrapea la página web de ACM para obtener la lista de miembros del editorial board.
     :param url: str - La URL de la página web de ACM.
-    :return:
+    :return: tuple - Contiene el nombre de la revista y una lista de registros MiembroTablero del editorial board.
     '''
     
-    #Solicitud HTTP y análisis de respuesta con BeautifulSoup
+    #Solicitud HTTP y extracción de los datos de la respuesta
     try:
-        respuesta = requests.get(url)
+        respuesta = Http.obtener(url)
         respuesta.raise_for_status()
-        soup = BeautifulSoup(respuesta.content, 'html.parser')
-        
-        # Extracción de la información de los miembros del editorial board
-        journal_name = soup.find('h1', class_='title').text.strip() if soup.find('h1', class_='title') else 'Nombre de la revista no encontrado'
-        datos = []
-        roles = soup.find_all('h3', class_='section__title')
-        for rol in roles:
-            texto_rol = rol.text.strip()
-            siguiente_hijo = rol.find_next()
-            while siguiente_hijo and siguiente_hijo.name != 'h3':
-                if 'item-meta__info' in siguiente_hijo.get('class', []):
-                    nombre = siguiente_hijo.find('h4').text.strip() if siguiente_hijo.find('h4') else ''
-                    afiliacion = siguiente_hijo.find('p').text.strip() if siguiente_hijo.find('p') else ''
-                    pais = siguiente_hijo.find('span').text.strip() if siguiente_hijo.find('span') else ''
-                    datos.append([texto_rol, nombre, afiliacion, pais])
-                siguiente_hijo = siguiente_hijo.find_next()
-        return journal_name, datos
+        return extraer_ACM(respuesta.content)
     except requests.exceptions.RequestException as e:
         raise Exception(f"Fallo al scrapear los datos del editorial board. Error: {e}")
 
@@ -40,14 +41,28 @@ def guardar_ACM_en_CSV():
     '''
     Esta función scrapea la página web de ACM y guarda sus datos en un CSV.
     :param: None
-    :return: tuple - Contiene el nombre de la revista y una lista de miembros del editorial board.
+    :return: None
     '''
+    from tkinter import messagebox
+
+    # Scrapeo de datos de ACM
+    try:
+        journal_name, datos = scrapear_ACM(URL_ACM)
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+        return
+    escribir_ACM_en_CSV(journal_name, datos)
+
+def escribir_ACM_en_CSV(journal_name, datos):
+    '''
+    Esta función guarda en un CSV, cuyo PATH se pide al usuario, los datos ya scrapeados de ACM.
+    :param journal_name: str - Nombre de la revista.
+    :param datos: list - Lista de miembros del editorial board devuelta por scrapear_ACM.
+    :return: None
+    '''
+    from tkinter import messagebox, filedialog
 
-    # URL de ACM y scrapeo de datos
-    url = 'https://dl.acm.org/journal/jetc/editorial-board'
     try:
-        journal_name, datos = scrapear_ACM(url)
-        
         # Guarda los datos scrapeados en un CSV, cuyo PATH se pide al usuario
         path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if path:
@@ -56,34 +71,39 @@ def guardar_ACM_en_CSV():
                 writer.writerow(['Journal Name'])
                 writer.writerow([journal_name])
                 writer.writerow(['Rol', 'Nombre', 'Afiliación', 'País'])
-                writer.writerows(datos)
+                writer.writerows(miembro.valores(CAMPOS_CSV) for miembro in datos)
 
             messagebox.showinfo("Éxito", f"Los datos del editorial board han sido guardados en: '{os.path.basename(path)}'.")
 
     except Exception as e:
         messagebox.showerror("Error", str(e))
         
+@Metricas.medido()
 def mostrar_ACM(widget_ACM):
     '''
     Esta función muestra los resultados del scrapeo de ACM en un widget de texto.
     :param: None
     :return: None
     '''
+    from tkinter import messagebox
     
     # Scrapea la página web de ACM y muestra los resultados en el widget de texto
-    url = 'https://dl.acm.org/journal/jetc/editorial-board'
     try:
-        journal_name, datos = scrapear_ACM(url)
-
-        # Insertar los datos en el widget de texto
-        widget_ACM.delete('1.0', tk.END)
-        widget_ACM.insert(tk.END, f"Journal Name: {journal_name}\n\n")
-        for data in datos:
-            widget_ACM.insert(tk.END, f"Rol: {data[0]}\n")
-            widget_ACM.insert(tk.END, f"Nombre: {data[1]}\n")
-            widget_ACM.insert(tk.END, f"Afiliación: {data[2]}\n")
-            widget_ACM.insert(tk.END, f"País: {data[3]}\n")
-            widget_ACM.insert(tk.END, "\n")
-
+        journal_name, datos = scrapear_ACM(URL_ACM)
     except Exception as e:
-        messagebox.showerror("Error", str(e))
\ No newline at end of file
+        messagebox.showerror("Error", str(e))
+        return
+    pintar_ACM(widget_ACM, journal_name, datos)
+
+def pintar_ACM(widget_ACM, journal_name, datos):
+    '''
+    Esta función muestra en un widget de texto los datos ya scrapeados de ACM.
+    :param widget_ACM: tk.Text - El widget de texto donde se muestran los datos.
+    :param journal_name: str - Nombre de la revista.
+    :param datos: list - Lista de miembros del editorial board devuelta por scrapear_ACM.
+    :return: None
+    '''
+    # Insertar los datos en el widget de texto, un bloque por miembro
+    bloques = (Bloque().texto(f"Rol: {data.texto('rol')}\nNombre: {data.texto('nombre')}\nAfiliación: {data.texto('afiliacion')}\n"
+                              f"País: {data.texto('pais')}\n\n") for data in datos)
+    mostrar_bloques(widget_ACM, chain([Bloque().texto(f"Journal Name: {journal_name}\n\n")], bloques))
\ No newline at end of file
@@ -1,102 +1,144 @@
 import requests
-from bs4 import BeautifulSoup
-from tkinter import messagebox, filedialog
-import tkinter as tk
 import csv
-import os    
+import os
+from itertools import chain
+import Http
+import Metricas
+from Parseo import Zonas, parsear
+from Registros import MiembroTablero
+from Render import Bloque, mostrar_bloques
 
+# URL del editorial board de IEEE TNNLS
+URL_TNNLS = 'https://cis.ieee.org/publications/t-neural-networks-and-learning-systems/tnnls-editor-and-associate-editors'
+# Partes de la página que usa el extractor: encabezados, párrafos y tablas de miembros y las fichas de la lista final
+ZONAS_TNNLS = Zonas(['h1', 'h2', 'h3', 'p', 'table'],
+                    ['indvlistname', 'indvlistaffil', 'indvfulllistaddr', 'indvlistemail', 'indvlistwebsite'])
+
+# Campos de cada miembro que se escriben en el CSV
+CAMPOS_CSV = ('rol', 'nombre', 'afiliacion', 'pais', 'email', 'web')
+
+# Clases de los campos de cada ficha de la lista final, en el orden de las columnas
+CAMPOS_INDVLIST = ('indvlistaffil', 'indvfulllistaddr', 'indvlistemail', 'indvlistwebsite')
+
+def _miembro(*campos):
+    # Registro con los campos en el orden de las columnas; los que no aparecen en la página quedan a None
+    return MiembroTablero(*(campo or None for campo in campos))
+
+def _cerrar_seccion_h2(texto_rol, parrafos, datos):
+    # El último párrafo de cada sección h2 no es un miembro
+    if texto_rol is None:
+        return
+    for elemento in parrafos[:-1]:
+        spans = elemento.find_all('span')
+        if len(spans) >= 4:
+            nombre = spans[0].text.strip()
+            afiliacion1 = spans[1].text.strip()
+            afiliacion2 = spans[2].text.strip()
+            pais = spans[3].text.strip()
+            afiliacion = f"{afiliacion1}, {afiliacion2}"
+            datos.append(_miembro(texto_rol, nombre, afiliacion, pais))
+
+def _cerrar_miembro(texto_rol, miembro, datos):
+    # Añade el miembro de la lista final con los campos encontrados; los que faltan quedan a None
+    if texto_rol is None or miembro is None:
+        return
+    nombre, campos = miembro
+    afiliacion = ', '.join(parte.strip() for parte in campos['indvlistaffil'].split(',')) if 'indvlistaffil' in campos else None
+    datos.append(_miembro(texto_rol, nombre, afiliacion, campos.get('indvfulllistaddr'), campos.get('indvlistemail'), campos.get('indvlistwebsite')))
+
+def extraer_TNNLS(html):
+    '''
+    Esta función extrae la lista de miembros del editorial board del HTML de la página de TNNLS.
+    :param html: str or bytes - El contenido HTML de la página.
+    :return: tuple - Contiene el nombre de la revista y una lista de registros MiembroTablero del editorial board.
+    '''
+    soup = parsear(html, ZONAS_TNNLS)
+
+    # Extracción de título y primer miembro
+    journal_name = soup.find('h1').text.strip() if soup.find('h1') else 'Journal Name no encontrado'
+    datos = []
+
+    primer_miembro = soup.find('h2', style=True)
+    if primer_miembro:
+        texto_rol = primer_miembro.text.strip()
+        tag = primer_miembro.find_next('p', style=True)
+        if tag:
+            strong_tag = tag.find('strong')
+            nombre = strong_tag.text.strip() if strong_tag else ''
+            br_tags = tag.find_all('br')
+            if len(br_tags) >= 4:
+                afiliacion1 = br_tags[0].next_sibling.strip() if br_tags[0].next_sibling else ''
+                afiliacion2 = br_tags[1].next_sibling.strip() if br_tags[1].next_sibling else ''
+                pais = br_tags[2].next_sibling.strip() if br_tags[2].next_sibling else ''
+                email = br_tags[3].next_sibling.strip() if br_tags[3].next_sibling else ''
+                afiliacion = f"{afiliacion1}, {afiliacion2}"
+                datos.append(_miembro(texto_rol, nombre, afiliacion, pais, email))
+    
+    # Extracción del resto de miembros en una sola pasada en orden de documento. Cada h2 abre una sección
+    # que llega hasta el siguiente h2, con miembros en tablas y en párrafos, y cada h3 con clase roletitle
+    # abre una sección de la lista final que llega hasta el siguiente h3. Las filas de cada parte se
+    # guardan por separado para mantener el orden: primero las secciones h2 y después la lista final.
+    datos_h2 = []
+    datos_h3 = []
+    rol_h2 = None
+    parrafos = []
+    rol_h3 = None
+    miembro = None
+    for tag in soup.find_all(True):
+        if tag.name == 'h2':
+            _cerrar_seccion_h2(rol_h2, parrafos, datos_h2)
+            rol_h2 = None
+            parrafos = []
+            if tag != primer_miembro:
+                rol_h2 = tag.find('strong').text.strip() if tag.find('strong') else ''
+        elif rol_h2 is not None and tag.name == 'p':
+            parrafos.append(tag)
+        elif rol_h2 is not None and tag.name == 'table':
+            tbody = tag.find('tbody')
+            if tbody:
+                for tr in tbody.find_all('tr')[1:]:
+                    elementos_td = tr.find_all('td')
+                    if len(elementos_td) >= 3:
+                        nombre = elementos_td[0].text.strip()
+                        afiliacion = elementos_td[1].text.strip()
+                        pais = elementos_td[2].text.strip()
+                        datos_h2.append(_miembro(rol_h2, nombre, afiliacion, pais))
+
+        if tag.name == 'h3':
+            _cerrar_miembro(rol_h3, miembro, datos_h3)
+            miembro = None
+            rol_h3 = tag.text.strip() if 'roletitle' in tag.get('class', []) else None
+        elif rol_h3 is not None and tag.name == 'div':
+            clases = tag.get('class', [])
+            if 'indvlistname' in clases:
+                # Los campos de un miembro son los que aparecen entre su nombre y el siguiente
+                _cerrar_miembro(rol_h3, miembro, datos_h3)
+                miembro = (tag.text.strip(), {})
+            elif miembro is not None:
+                for campo in CAMPOS_INDVLIST:
+                    if campo in clases:
+                        miembro[1].setdefault(campo, tag.text.strip())
+
+    _cerrar_seccion_h2(rol_h2, parrafos, datos_h2)
+    _cerrar_miembro(rol_h3, miembro, datos_h3)
+    datos.extend(datos_h2)
+    datos.extend(datos_h3)
+
+    return journal_name, datos
+
+@Metricas.medido(contar=lambda resultado: len(resultado[1]))
 def scrapear_TNNLS(url):
     '''
     Esta función scrapea la página web de TNNLS para obtener la lista de miembros del editorial board.
     :param url: str - La URL de la página web de TNNLS.
-    :return: tuple - Contiene el nombre de la revista y una lista de miembros del editorial board.
+    :return: tuple - Contiene el nombre de la revista y una lista de registros MiembroTablero del editorial board.
     '''
     
-    #Solicitud HTTP y análisis de respuesta con BeautifulSoup
+    #Solicitud HTTP y extracción de los datos de la respuesta
     try:
-        respuesta = requests.get(url)
+        respuesta = Http.obtener(url)
         respuesta.raise_for_status()
-        soup = BeautifulSoup(respuesta.content, 'html.parser')
-
-    # Extracción de título y primer miembro  
-        journal_name = soup.find('h1').text.strip() if soup.find('h1') else 'Journal Name no encontrado'
-        datos = []
-
-        primer_miembro = soup.find('h2', style=True)
-        if primer_miembro:
-            texto_rol = primer_miembro.text.strip()
-            tag = primer_miembro.find_next('p', style=True)
-            if tag:
-                strong_tag = tag.find('strong')
-                nombre = strong_tag.text.strip() if strong_tag else ''
-                br_tags = tag.find_all('br')
-                if len(br_tags) >= 4:
-                    afiliacion1 = br_tags[0].next_sibling.strip() if br_tags[0].next_sibling else ''
-                    afiliacion2 = br_tags[1].next_sibling.strip() if br_tags[1].next_sibling else ''
-                    pais = br_tags[2].next_sibling.strip() if br_tags[2].next_sibling else ''
-                    email = br_tags[3].next_sibling.strip() if br_tags[3].next_sibling else ''
-                    afiliacion = f"{afiliacion1}, {afiliacion2}"
-                    datos.append([texto_rol, nombre, afiliacion, pais, email, ''])
-        
-        # Extracción de siguientes miembros            
-        roles = soup.find_all('h2')
-        for rol in roles:
-            if rol == primer_miembro:
-                continue
-            texto_rol = rol.find('strong').text.strip() if rol.find('strong') else ''
-            siguiente_hijo = rol.find_next()
-            elementos = []
-            while siguiente_hijo and siguiente_hijo.name != 'h2':
-                if siguiente_hijo.name == 'p':
-                    elementos.append(siguiente_hijo)
-                elif siguiente_hijo.name == 'table':
-                    tbody = siguiente_hijo.find('tbody')
-                    if tbody:
-                        elementos_tr = tbody.find_all('tr')[1:]
-                        for tr in elementos_tr:
-                            elementos_td = tr.find_all('td')
-                            if len(elementos_td) >= 3:
-                                nombre = elementos_td[0].text.strip()
-                                afiliacion = elementos_td[1].text.strip()
-                                pais = elementos_td[2].text.strip()
-                                datos.append([texto_rol, nombre, afiliacion, pais, '', ''])
-                siguiente_hijo = siguiente_hijo.find_next()
-
-            if elementos:
-                for elemento in elementos[:-1]:
-                    spans = elemento.find_all('span')
-                    if len(spans) >= 4:
-                        nombre = spans[0].text.strip()
-                        afiliacion1 = spans[1].text.strip()
-                        afiliacion2 = spans[2].text.strip()
-                        pais = spans[3].text.strip()
-                        afiliacion = f"{afiliacion1}, {afiliacion2}"
-                        datos.append([texto_rol, nombre, afiliacion, pais, '', ''])
-
-        # Extracción de los últimos miembros del editorial board               
-        roles = soup.find_all('h3', class_='roletitle')
-        for rol in roles:
-            texto_rol = rol.text.strip()
-            siguiente_hijo = rol.find_next()
-            while siguiente_hijo and siguiente_hijo.name != 'h3':
-                if siguiente_hijo.name == 'div' and 'indvlistname' in siguiente_hijo.get('class', []):
-                    nombre = siguiente_hijo.text.strip()
-                    div_afiliacion = siguiente_hijo.find_next('div', class_='indvlistaffil')
-                    if div_afiliacion:
-                        partes_afiliacion = div_afiliacion.text.strip().split(',')
-                        afiliacion = ', '.join(part.strip() for part in partes_afiliacion)
-                    else:
-                        afiliacion = ''
-                    div_pais = siguiente_hijo.find_next('div', class_='indvfulllistaddr')
-                    pais = div_pais.text.strip() if div_pais else ''
-                    div_email = siguiente_hijo.find_next('div', class_='indvlistemail')
-                    email = div_email.text.strip() if div_email else ''
-                    div_web = siguiente_hijo.find_next('div', class_='indvlistwebsite')
-                    web = div_web.text.strip() if div_web else ''
-                    datos.append([texto_rol, nombre, afiliacion, pais, email, web])
-                siguiente_hijo = siguiente_hijo.find_next()
-
-        return journal_name, datos
+        return extraer_TNNLS(respuesta.content)
 
     except requests.exceptions.RequestException as e:
         raise Exception(f"Fallo al scrapear los datos del editorial board. Error: {e}")
@@ -110,12 +152,26 @@ def guardar_TNNLS_en_CSV():
     :param: None
     :return: None
     '''
+    from tkinter import messagebox
     
-    # URL de la página web de TNNLS y scrapeo de datos
-    url = 'https://cis.ieee.org/publications/t-neural-networks-and-learning-systems/tnnls-editor-and-associate-editors'
+    # Scrapeo de datos de TNNLS
+    try:
+        journal_name, datos = scrapear_TNNLS(URL_TNNLS)
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+        return
+    escribir_TNNLS_en_CSV(journal_name, datos)
+
+def escribir_TNNLS_en_CSV(journal_name, datos):
+    '''
+    Esta función guarda en un CSV, cuyo PATH se pide al usuario, los datos ya scrapeados de TNNLS.
+    :param journal_name: str - Nombre de la revista.
+    :param datos: list - Lista de miembros del editorial board devuelta por scrapear_TNNLS.
+    :return: None
+    '''
+    from tkinter import messagebox, filedialog
+
     try:
-        journal_name, datos = scrapear_TNNLS(url)
-        
         # Guarda los datos scrapeados en un CSV, cuyo PATH se pide al usuario
         path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if path:
@@ -124,37 +180,39 @@ def guardar_TNNLS_en_CSV():
                 writer.writerow(['Journal Name'])
                 writer.writerow([journal_name])
                 writer.writerow(['Rol', 'Nombre', 'Afiliación', 'Pais', 'Email', 'Web'])
-                writer.writerows(datos)
+                writer.writerows(miembro.valores(CAMPOS_CSV) for miembro in datos)
 
             messagebox.showinfo("Éxito", f"Los datos del editorial board han sido guardados en: '{os.path.basename(path)}'.")
 
     except Exception as e:
         messagebox.showerror("Error", str(e))
         
+@Metricas.medido()
 def mostrar_TNNLS(widget_TNNLS):
     '''
     Función que muestra los datos scrapeados de TNNLS en el widget de texto.
     :param: None
     :return: None
     '''
+    from tkinter import messagebox
     
-    # URL de la página web de TNNLS y scrapeo de datos
-    url = 'https://cis.ieee.org/publications/t-neural-networks-and-learning-systems/tnnls-editor-and-associate-editors'
-    
+    # Scrapeo de datos de TNNLS
     try:
-        journal_name, datos = scrapear_TNNLS(url)
-
-    # Mostrar los datos scrapeados en el widget de texto  
-        widget_TNNLS.delete('1.0', tk.END)
-        widget_TNNLS.insert(tk.END, f"Journal Name: {journal_name}\n\n")
-        for dato in datos:
-            widget_TNNLS.insert(tk.END, f"Rol: {dato[0]}\n")
-            widget_TNNLS.insert(tk.END, f"Nombre: {dato[1]}\n")
-            widget_TNNLS.insert(tk.END, f"Afiliación: {dato[2]}\n")
-            widget_TNNLS.insert(tk.END, f"País: {dato[3]}\n")
-            widget_TNNLS.insert(tk.END, f"Email: {dato[4]}\n")
-            widget_TNNLS.insert(tk.END, f"Web: {dato[5]}\n")
-            widget_TNNLS.insert(tk.END, "\n")
-
+        journal_name, datos = scrapear_TNNLS(URL_TNNLS)
     except Exception as e:
-        messagebox.showerror("Error", str(e))
\ No newline at end of file
+        messagebox.showerror("Error", str(e))
+        return
+    pintar_TNNLS(widget_TNNLS, journal_name, datos)
+
+def pintar_TNNLS(widget_TNNLS, journal_name, datos):
+    '''
+    Función que muestra en el widget de texto los datos ya scrapeados de TNNLS.
+    :param widget_TNNLS: tk.Text - El widget de texto donde se muestran los datos.
+    :param journal_name: str - Nombre de la revista.
+    :param datos: list - Lista de miembros del editorial board devuelta por scrapear_TNNLS.
+    :return: None
+    '''
+    # Mostrar los datos scrapeados en el widget de texto, un bloque por miembro
+    bloques = (Bloque().texto(f"Rol: {dato.texto('rol')}\nNombre: {dato.texto('nombre')}\nAfiliación: {dato.texto('afiliacion')}\n"
+                              f"País: {dato.texto('pais')}\nEmail: {dato.texto('email')}\nWeb: {dato.texto('web')}\n\n") for dato in datos)
+    mostrar_bloques(widget_TNNLS, chain([Bloque().texto(f"Journal Name: {journal_name}\n\n")], bloques))
\ No newline at end of file
@@ -0,0 +1,231 @@
+'''
+Consultas guardadas de arXiv y PubMed que al refrescarse devuelven solo los artículos nuevos desde la vez
+anterior. Cada suscripción guarda una marca hasta la que ya se ha consultado y los identificadores de los
+artículos vistos, y en cada refresco solo se piden los artículos posteriores a la marca: en arXiv con un
+rango de submittedDate ordenado por fecha de envío, y en PubMed con mindate (o reldate la primera vez)
+sobre la fecha de entrada en PubMed. Así un refresco diario cuesta unas pocas peticiones.
+
+Cada refresco recorre todas las páginas de su ventana, sin límite de resultados: si se cortara, los
+artículos de la ventana que no se han pedido quedarían por detrás de la nueva marca y no llegarían nunca.
+La marca de arXiv es la fecha de envío del artículo más reciente; la de PubMed, el momento del último
+refresco, porque los lotes de efetch no traen la fecha de entrada. Como arXiv anuncia algunos artículos
+días después de su envío, y las fechas de PubMed son de la hora de EE. UU., cada refresco empieza
+SOLAPE_DIAS antes de la marca y los artículos ya vistos se descartan por su identificador.
+'''
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import Metricas
+import Planificador
+import Utils
+
+FUENTES = ('arxiv', 'pubmed')
+# Días que se piden la primera vez que se refresca una suscripción
+DIAS_INICIALES = 7
+# Días antes de la marca desde los que se pide cada refresco
+SOLAPE_DIAS = 2
+MAX_HILOS = 4
+FORMATO_MARCA = '%Y-%m-%dT%H:%M:%SZ'
+
+ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS suscripciones (
+    fuente TEXT NOT NULL,
+    consulta TEXT NOT NULL,
+    marca TEXT,
+    actualizada REAL,
+    PRIMARY KEY (fuente, consulta)
+);
+CREATE TABLE IF NOT EXISTS vistos (
+    fuente TEXT NOT NULL,
+    consulta TEXT NOT NULL,
+    identificador TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    PRIMARY KEY (fuente, consulta, identificador)
+);
+'''
+
+
+class AlmacenSuscripciones:
+    '''
+    Almacén SQLite con las consultas guardadas, su marca y los artículos vistos cerca de ella.
+    Se puede usar desde varios hilos: las operaciones sobre la base de datos se serializan con un candado.
+    '''
+
+    def __init__(self, ruta=None):
+        '''
+        :param ruta: str - Fichero de la base de datos. Por defecto suscripciones.sqlite3 del directorio de datos.
+        '''
+        self.ruta = ruta or Utils.ruta_datos('suscripciones.sqlite3')
+        self._candado = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conexion.executescript(ESQUEMA)
+
+    def suscribir(self, fuente, consulta):
+        '''
+        Guarda una consulta. Si ya estaba guardada no cambia su marca.
+        :param fuente: str - 'arxiv' o 'pubmed'.
+        :param consulta: str - La consulta de búsqueda.
+        :return: None
+        '''
+        if fuente not in FUENTES:
+            raise ValueError(f"Fuente no válida: {fuente}")
+        with self._candado, self._conexion:
+            self._conexion.execute('INSERT OR IGNORE INTO suscripciones (fuente, consulta) VALUES (?, ?)', (fuente, consulta))
+
+    def cancelar(self, fuente, consulta):
+        '''
+        Borra una consulta guardada y sus artículos vistos.
+        :param fuente: str - 'arxiv' o 'pubmed'.
+        :param consulta: str - La consulta de búsqueda.
+        :return: None
+        '''
+        with self._candado, self._conexion:
+            self._conexion.execute('DELETE FROM suscripciones WHERE fuente = ? AND consulta = ?', (fuente, consulta))
+            self._conexion.execute('DELETE FROM vistos WHERE fuente = ? AND consulta = ?', (fuente, consulta))
+
+    def suscripciones(self, fuente=None):
+        '''
+        :param fuente: str - 'arxiv' o 'pubmed'. Por defecto las dos.
+        :return: list - Consultas guardadas, como diccionarios con fuente, consulta, marca y actualizada.
+        '''
+        with self._candado:
+            filas = self._conexion.execute('SELECT fuente, consulta, marca, actualizada FROM suscripciones '
+                                           'WHERE ? IS NULL OR fuente = ? ORDER BY fuente, consulta', (fuente, fuente)).fetchall()
+        return [dict(zip(('fuente', 'consulta', 'marca', 'actualizada'), fila)) for fila in filas]
+
+    def estado(self, fuente, consulta):
+        '''
+        :param fuente: str - 'arxiv' o 'pubmed'.
+        :param consulta: str - La consulta de búsqueda.
+        :return: tuple - Marca (None si nunca se ha refrescado) y conjunto de identificadores vistos.
+        '''
+        with self._candado:
+            fila = self._conexion.execute('SELECT marca FROM suscripciones WHERE fuente = ? AND consulta = ?', (fuente, consulta)).fetchone()
+            vistos = self._conexion.execute('SELECT identificador FROM vistos WHERE fuente = ? AND consulta = ?', (fuente, consulta)).fetchall()
+        return (fila[0] if fila else None), {identificador for identificador, in vistos}
+
+    def registrar(self, fuente, consulta, marca, vistos, olvidar_antes):
+        '''
+        Guarda la nueva marca de una suscripción y los artículos vistos en el refresco.
+        :param fuente: str - 'arxiv' o 'pubmed'.
+        :param consulta: str - La consulta de búsqueda.
+        :param marca: str - Nueva marca (FORMATO_MARCA).
+        :param vistos: list - Pares (identificador, fecha AAAA-MM-DD) de los artículos recibidos.
+        :param olvidar_antes: str - Fecha (AAAA-MM-DD) anterior a la que ya no se pide en próximos refrescos:
+                                    los artículos vistos con fecha anterior se borran.
+        :return: None
+        '''
+        with self._candado, self._conexion:
+            self._conexion.execute('INSERT OR REPLACE INTO suscripciones (fuente, consulta, marca, actualizada) VALUES (?, ?, ?, ?)',
+                                   (fuente, consulta, marca, time.time()))
+            self._conexion.executemany('INSERT OR REPLACE INTO vistos (fuente, consulta, identificador, fecha) VALUES (?, ?, ?, ?)',
+                                       [(fuente, consulta, identificador, fecha) for identificador, fecha in vistos])
+            self._conexion.execute('DELETE FROM vistos WHERE fuente = ? AND consulta = ? AND fecha < ?', (fuente, consulta, olvidar_antes))
+
+    def cerrar(self):
+        with self._candado:
+            self._conexion.close()
+
+
+_candado = threading.Lock()
+_almacen = None
+
+
+def obtener_almacen():
+    '''
+    Devuelve el almacén de suscripciones compartido, creándolo la primera vez.
+    :return: AlmacenSuscripciones - El almacén del directorio de datos.
+    '''
+    global _almacen
+    with _candado:
+        if _almacen is None:
+            _almacen = AlmacenSuscripciones()
+        return _almacen
+
+
+def _leer_marca(marca):
+    return datetime.strptime(marca, FORMATO_MARCA).replace(tzinfo=timezone.utc)
+
+
+@Metricas.medido()
+def novedades(fuente, consulta, almacen=None, dias=DIAS_INICIALES):
+    '''
+    Refresca una consulta y devuelve solo los artículos que no se habían visto. Si la consulta no estaba
+    guardada se guarda, y su primer refresco devuelve los artículos de los últimos días. Se piden todas las
+    páginas de la ventana, de forma que ningún artículo posterior a la marca se queda sin pedir.
+    :param fuente: str - 'arxiv' o 'pubmed'.
+    :param consulta: str - La consulta de búsqueda.
+    :param almacen: AlmacenSuscripciones - Almacén de suscripciones. Por defecto el compartido.
+    :param dias: int - Días hacia atrás que se piden en el primer refresco.
+    :return: list - Registros Articulo nuevos. Se guardan en el índice local como los de cualquier búsqueda.
+    '''
+    from Indice import identificador
+    almacen = almacen or obtener_almacen()
+    almacen.suscribir(fuente, consulta)
+    marca, vistos = almacen.estado(fuente, consulta)
+    ahora = datetime.now(timezone.utc)
+    inicio = _leer_marca(marca) - timedelta(days=SOLAPE_DIAS) if marca else ahora - timedelta(days=dias)
+    # Sin límite: los harvesters leen el total de la primera página y recorren la ventana entera
+    todos = sys.maxsize
+
+    if fuente == 'arxiv':
+        from Arxiv import harvestear_arxiv
+        resultados = list(harvestear_arxiv(consulta, todos, desde=inicio.strftime('%Y%m%d%H%M')))
+        # La fecha de cada artículo es la de envío, que es la que filtra submittedDate. Los anteriores a la
+        # ventana no deberían llegar, y sus identificadores ya se han olvidado: se descartan
+        limite = inicio.strftime(FORMATO_MARCA)
+        resultados = [resultado for resultado in resultados if (resultado['fecha_publicacion'] or limite) >= limite]
+        fechas = [resultado['fecha_publicacion'] or '' for resultado in resultados]
+        nueva_marca = max([marca or '', *fechas]) or ahora.strftime(FORMATO_MARCA)
+    else:
+        from Pubmed import harvestear_pubmed
+        if marca:
+            resultados = list(harvestear_pubmed(consulta, todos, desde=inicio.strftime('%Y/%m/%d')))
+        else:
+            resultados = list(harvestear_pubmed(consulta, todos, dias=dias))
+        fechas = [ahora.strftime(FORMATO_MARCA)] * len(resultados)
+        nueva_marca = ahora.strftime(FORMATO_MARCA)
+
+    nuevos = []
+    recibidos = []
+    for resultado, fecha in zip(resultados, fechas):
+        clave = identificador(fuente, resultado)
+        recibidos.append((clave, fecha[:10]))
+        if clave not in vistos:
+            vistos.add(clave)
+            nuevos.append(resultado)
+    # Los próximos refrescos no piden nada anterior a la nueva marca menos el solape
+    olvidar_antes = (_leer_marca(nueva_marca) - timedelta(days=SOLAPE_DIAS)).strftime('%Y-%m-%d')
+    almacen.registrar(fuente, consulta, nueva_marca, recibidos, olvidar_antes)
+    return nuevos
+
+
+@Metricas.medido(contar=lambda resultado: sum(len(articulos) for _, _, articulos in resultado[0]))
+def refrescar_suscripciones(fuente=None, almacen=None, max_hilos=MAX_HILOS):
+    '''
+    Refresca en paralelo todas las consultas guardadas y devuelve solo sus artículos nuevos.
+    :param fuente: str - 'arxiv' o 'pubmed'. Por defecto las dos.
+    :param almacen: AlmacenSuscripciones - Almacén de suscripciones. Por defecto el compartido.
+    :param max_hilos: int - Número de consultas refrescadas a la vez.
+    :return: tuple - Lista de tuplas (fuente, consulta, artículos nuevos) y diccionario con el error de cada
+                     consulta que ha fallado, indexado por (fuente, consulta).
+    '''
+    from Arxiv import URL_ARXIV
+    from Pubmed import URL_EUTILS
+    urls = {'arxiv': URL_ARXIV, 'pubmed': URL_EUTILS}
+    almacen = almacen or obtener_almacen()
+    resultados = []
+    errores = {}
+    # Cada trabajo se identifica con la URL de la API de su fuente y la consulta como fragmento, de forma
+    # que el planificador los reparte por host y se sabe a qué consulta corresponde cada uno
+    guardadas = {f"{urls[s['fuente']]}#{s['consulta']}": s for s in almacen.suscripciones(fuente)}
+    trabajos = ((clave, novedades, s['fuente'], s['consulta'], almacen) for clave, s in guardadas.items())
+    for clave, futuro in Planificador.repartir(trabajos, max_hilos):
+        suscripcion = guardadas[clave]
+        try:
+            resultados.append((suscripcion['fuente'], suscripcion['consulta'], futuro.result()))
+        except Exception as e:
+            errores[(suscripcion['fuente'], suscripcion['consulta'])] = str(e)
+    return resultados, errores
@@ -0,0 +1,258 @@
+'''
+Motor de scrapeo de editorial boards guiado por perfiles declarativos. Cada perfil indica a qué hosts se
+aplica, los selectores CSS de los roles y los miembros y qué selector da cada campo, de forma que añadir una
+revista con la misma maquetación que una ya soportada no requiere código nuevo:
+
+    filas, errores = scrapear_tableros(['https://dl.acm.org/journal/jetc/editorial-board',
+                                        'https://dl.acm.org/journal/tecs/editorial-board'])
+
+Se pueden añadir o sustituir perfiles en el fichero perfiles_tableros.json del directorio de datos.
+'''
+import importlib
+import json
+import os
+import re
+from dataclasses import replace
+from urllib.parse import urlsplit
+import requests
+import soupsieve
+import Http
+import Metricas
+import Planificador
+from Parseo import Zonas, parsear
+from Registros import MiembroTablero
+from Utils import ruta_datos
+
+# Columnas de cada miembro en el conjunto de datos normalizado
+COLUMNAS_TABLERO = ['url', 'perfil', 'revista', 'rol', 'nombre', 'afiliacion', 'pais', 'email', 'web']
+CAMPOS_MIEMBRO = COLUMNAS_TABLERO[3:]
+MAX_HILOS = 8
+
+# Perfiles de las maquetaciones soportadas. Modos:
+#   'secuencial': los encabezados de rol y las fichas de miembro se recorren en orden de documento; cada
+#                 encabezado abre un rol que dura hasta el siguiente elemento que cumpla 'fin_rol'.
+#   'contenedor': cada elemento 'seccion' contiene su encabezado 'rol' (opcional) y sus fichas 'miembro'. Si
+#                 el perfil tiene 'zonas', deben conservar los elementos de 'seccion'.
+#   'extractor':  la página tiene una maquetación irregular y se usa una función de extracción propia, que
+#                 devuelve (revista, miembros) con registros MiembroTablero o con filas en el orden de 'columnas'.
+# Los campos se indican con un selector CSS relativo a la ficha; con '@atributo' al final se toma ese
+# atributo en lugar del texto.
+PERFILES = {
+    'acm': {
+        'hosts': ['dl.acm.org'],
+        'modo': 'secuencial',
+        'titulo': 'h1.title',
+        'titulo_defecto': 'Nombre de la revista no encontrado',
+        'rol': 'h3.section__title',
+        'fin_rol': 'h3',
+        'miembro': '.item-meta__info',
+        'campos': {'nombre': 'h4', 'afiliacion': 'p', 'pais': 'span'},
+        'zonas': {'nombres': ['h1', 'h3'], 'clases': ['item-meta__info']},
+    },
+    'ieee_cis': {
+        'hosts': ['cis.ieee.org'],
+        'modo': 'extractor',
+        'extractor': 'Scraper_TNNLS.extraer_TNNLS',
+        'columnas': ['rol', 'nombre', 'afiliacion', 'pais', 'email', 'web'],
+    },
+}
+
+
+def cargar_perfiles(ruta=None):
+    '''
+    Devuelve los perfiles incorporados junto con los definidos por el usuario en un fichero JSON, que
+    tienen prioridad si usan el mismo nombre.
+    :param ruta: str - Fichero JSON de perfiles. Por defecto perfiles_tableros.json del directorio de datos.
+    :return: dict - Nombre y definición de cada perfil.
+    '''
+    perfiles = dict(PERFILES)
+    ruta = ruta or ruta_datos('perfiles_tableros.json')
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as fichero:
+            perfiles.update(json.load(fichero))
+    return perfiles
+
+
+def perfil_para(url, perfiles=None):
+    '''
+    Busca el perfil que corresponde a una URL por su host (o un subdominio suyo).
+    :param url: str - URL de la página del editorial board.
+    :param perfiles: dict - Perfiles disponibles. Por defecto los de cargar_perfiles().
+    :return: tuple - Nombre y definición del perfil.
+    '''
+    perfiles = perfiles if perfiles is not None else cargar_perfiles()
+    host = (urlsplit(url).hostname or '').lower()
+    for nombre, perfil in perfiles.items():
+        if any(host == h or host.endswith('.' + h) for h in perfil.get('hosts', [])):
+            return nombre, perfil
+    raise ValueError(f"No hay ningún perfil de editorial board para {host or url}")
+
+
+class _Selectores:
+    '''
+    Selectores CSS de un perfil compilados una sola vez.
+    '''
+
+    def __init__(self, perfil):
+        '''
+        :param perfil: dict - Definición del perfil en modo 'secuencial' o 'contenedor'.
+        :raises ValueError: Si faltan los selectores que necesita el modo o las zonas descartan las secciones.
+        '''
+        modo = perfil.get('modo', 'secuencial')
+        requeridos = {'secuencial': ('rol', 'miembro'), 'contenedor': ('miembro',)}
+        if modo not in requeridos:
+            raise ValueError(f"Modo de perfil desconocido: {modo}")
+        faltan = [clave for clave in requeridos[modo] if not perfil.get(clave)]
+        if faltan:
+            raise ValueError(f"El perfil en modo '{modo}' necesita el selector {', '.join(repr(clave) for clave in faltan)}")
+        zonas = perfil.get('zonas')
+        if modo == 'contenedor' and zonas and perfil.get('seccion') and not _conserva(zonas, perfil['seccion']):
+            raise ValueError(f"Las zonas del perfil no conservan los elementos de 'seccion' ({perfil['seccion']})")
+
+        compilar = lambda selector: soupsieve.compile(selector) if selector else None
+        self.titulo = compilar(perfil.get('titulo', 'h1'))
+        self.seccion = compilar(perfil.get('seccion'))
+        self.rol = compilar(perfil.get('rol'))
+        self.fin_rol = compilar(perfil.get('fin_rol'))
+        self.miembro = compilar(perfil['miembro'])
+        self.campos = []
+        for campo, selector in perfil.get('campos', {}).items():
+            selector, _, atributo = selector.partition('@')
+            self.campos.append((campo, compilar(selector.strip()), atributo.strip() or None))
+        self.zonas = Zonas(zonas.get('nombres', ()), zonas.get('clases', ())) if zonas else None
+
+
+# Primer selector simple de un selector CSS (el elemento más externo) y su nombre de etiqueta y clases
+_PRIMER_SELECTOR = re.compile(r'\s*([^\s>+~]+)')
+_NOMBRE_SELECTOR = re.compile(r'^[\w-]+')
+_CLASES_SELECTOR = re.compile(r'\.([\w-]+)')
+
+
+def _conserva(zonas, selector):
+    '''
+    Comprueba que el filtro de zonas conserva los elementos que selecciona un selector. Basta con que se
+    conserve el elemento más externo de cada alternativa, porque las zonas guardan todo su contenido.
+    :param zonas: dict - Nombres y clases de las zonas del perfil.
+    :param selector: str - Selector CSS.
+    :return: bool - True si las zonas conservan el primer elemento de cada alternativa del selector.
+    '''
+    nombres = set(zonas.get('nombres', ()))
+    clases = set(zonas.get('clases', ()))
+    for alternativa in selector.split(','):
+        primero = _PRIMER_SELECTOR.match(alternativa)
+        if not primero:
+            return False
+        nombre = _NOMBRE_SELECTOR.match(primero.group(1))
+        if not (nombre and nombre.group() in nombres) and clases.isdisjoint(_CLASES_SELECTOR.findall(primero.group(1))):
+            return False
+    return True
+
+
+# Selectores compilados de cada perfil, indexados por su definición serializada
+_compilados = {}
+
+
+def _selectores(perfil):
+    clave = json.dumps(perfil, sort_keys=True)
+    if clave not in _compilados:
+        _compilados[clave] = _Selectores(perfil)
+    return _compilados[clave]
+
+
+def _texto(tag):
+    return tag.text.strip() if tag is not None else ''
+
+
+def _miembro(ficha, texto_rol, selectores):
+    campos = {}
+    for campo, selector, atributo in selectores.campos:
+        tag = selector.select_one(ficha) if selector else ficha
+        if atributo:
+            campos[campo] = ((tag.get(atributo) or '').strip() if tag is not None else '') or None
+        else:
+            campos[campo] = _texto(tag) or None
+    return MiembroTablero(rol=texto_rol or None, **campos)
+
+
+def extraer_tablero(html, perfil):
+    '''
+    Extrae los miembros de un editorial board del HTML de su página según un perfil.
+    :param html: str or bytes - El contenido HTML de la página.
+    :param perfil: dict - Definición del perfil.
+    :return: tuple - Nombre de la revista y lista de registros MiembroTablero con CAMPOS_MIEMBRO.
+    '''
+    modo = perfil.get('modo', 'secuencial')
+    if modo == 'extractor':
+        modulo, _, funcion = perfil['extractor'].rpartition('.')
+        journal_name, datos = getattr(importlib.import_module(modulo), funcion)(html)
+        columnas = perfil['columnas']
+        return journal_name, [fila if isinstance(fila, MiembroTablero)
+                              else MiembroTablero(**{columna: valor or None for columna, valor in zip(columnas, fila)})
+                              for fila in datos]
+
+    selectores = _selectores(perfil)
+    soup = parsear(html, selectores.zonas)
+    titulo = selectores.titulo.select_one(soup)
+    journal_name = _texto(titulo) if titulo is not None else perfil.get('titulo_defecto', 'Nombre de la revista no encontrado')
+    miembros = []
+
+    if modo == 'contenedor':
+        secciones = selectores.seccion.select(soup) if selectores.seccion else [soup]
+        for seccion in secciones:
+            texto_rol = _texto(selectores.rol.select_one(seccion)) if selectores.rol else ''
+            for ficha in selectores.miembro.select(seccion):
+                miembros.append(_miembro(ficha, texto_rol, selectores))
+    else:
+        # Una sola pasada en orden de documento: cada encabezado abre un rol y cada ficha se asigna al rol abierto
+        texto_rol = None
+        for tag in soup.find_all(True):
+            if selectores.rol.match(tag):
+                texto_rol = _texto(tag)
+            elif selectores.fin_rol and selectores.fin_rol.match(tag):
+                texto_rol = None
+            elif texto_rol is not None and selectores.miembro.match(tag):
+                miembros.append(_miembro(tag, texto_rol, selectores))
+    return journal_name, miembros
+
+
+@Metricas.medido()
+def scrapear_tablero(url, perfiles=None):
+    '''
+    Descarga la página de un editorial board y extrae sus miembros con el perfil de su host.
+    :param url: str - URL de la página del editorial board.
+    :param perfiles: dict - Perfiles disponibles. Por defecto los de cargar_perfiles().
+    :return: list - Miembros como registros MiembroTablero con COLUMNAS_TABLERO.
+    '''
+    nombre, perfil = perfil_para(url, perfiles)
+    try:
+        respuesta = Http.obtener(url)
+        respuesta.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Fallo al scrapear los datos del editorial board. Error: {e}")
+    journal_name, miembros = extraer_tablero(respuesta.content, perfil)
+    return [replace(miembro, url=url, perfil=nombre, revista=journal_name) for miembro in miembros]
+
+
+@Metricas.medido(contar=lambda resultado: len(resultado[0]))
+def scrapear_tableros(urls, max_hilos=MAX_HILOS, perfiles=None):
+    '''
+    Scrapea en paralelo los editorial boards de varias revistas y los reúne en un único conjunto de datos.
+    Las páginas se reparten entre los hilos según el host que antes admite una petición, de forma que
+    los límites de un host lento no retrasan a los demás.
+    :param urls: iterable - URLs de las páginas de los editorial boards.
+    :param max_hilos: int - Número de páginas descargadas y extraídas a la vez.
+    :param perfiles: dict - Perfiles disponibles. Por defecto los de cargar_perfiles().
+    :return: tuple - Lista de miembros (registros MiembroTablero con COLUMNAS_TABLERO, en el orden de las URLs) y
+                     diccionario con el error de cada URL que ha fallado.
+    '''
+    urls = list(dict.fromkeys(urls))
+    perfiles = perfiles if perfiles is not None else cargar_perfiles()
+    resultados = {}
+    errores = {}
+    for url, futuro in Planificador.repartir(((url, scrapear_tablero, url, perfiles) for url in urls), max_hilos):
+        try:
+            resultados[url] = futuro.result()
+        except Exception as e:
+            errores[url] = str(e)
+    filas = [fila for url in urls for fila in resultados.get(url, [])]
+    return filas, errores
@@ -0,0 +1,203 @@
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class TareaCancelada(Exception):
+    '''
+    Excepción que lanza Tarea.comprobar cuando el usuario ha cancelado la tarea.
+    '''
+
+
+class Tarea:
+    '''
+    Trabajo de scrapeo lanzado desde la interfaz. La función de trabajo recibe la tarea para poder
+    informar del progreso y comprobar si se ha cancelado.
+    '''
+
+    def __init__(self, nombre, cola):
+        '''
+        :param nombre: str - Nombre de la tarea. Solo puede haber una tarea activa con cada nombre.
+        :param cola: queue.Queue - Cola por la que se envían los mensajes al hilo de Tk.
+        '''
+        self.nombre = nombre
+        self._cola = cola
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        '''
+        Marca la tarea como cancelada. Su resultado se descarta aunque el trabajo siga en curso.
+        :return: None
+        '''
+        self._cancelada.set()
+
+    def comprobar(self):
+        '''
+        Lanza TareaCancelada si la tarea se ha cancelado. Los trabajos largos la llaman entre pasos.
+        :return: None
+        '''
+        if self._cancelada.is_set():
+            raise TareaCancelada()
+
+    def progreso(self, hechos, total=None):
+        '''
+        Informa del progreso de la tarea a la interfaz.
+        :param hechos: int - Unidades de trabajo terminadas.
+        :param total: int - Unidades de trabajo totales, o None si no se conocen.
+        :return: None
+        '''
+        self._cola.put((self, 'progreso', (hechos, total)))
+
+
+class EjecutorTareas:
+    '''
+    Ejecuta los trabajos de scrapeo en un pool de hilos para no bloquear el bucle principal de Tk.
+    Los resultados vuelven a los widgets por una cola que se consulta periódicamente con after().
+    '''
+
+    def __init__(self, raiz, max_hilos=5, intervalo=100):
+        '''
+        :param raiz: tk.Tk - Ventana principal de la aplicación.
+        :param max_hilos: int - Número de hilos del pool.
+        :param intervalo: int - Milisegundos entre dos consultas de la cola de mensajes.
+        '''
+        self.raiz = raiz
+        self.intervalo = intervalo
+        self._trabajos = queue.Queue()
+        self._mensajes = queue.Queue()
+        self._activas = {}
+        self._callbacks = {}
+        # Hilos daemon para que cerrar la ventana no espere a las peticiones en curso
+        for _ in range(max_hilos):
+            threading.Thread(target=self._trabajador, daemon=True).start()
+        self.raiz.after(self.intervalo, self._sondear)
+
+    def lanzar(self, nombre, trabajo, al_terminar, al_error=None, al_progreso=None, al_finalizar=None):
+        '''
+        Lanza un trabajo en segundo plano. Si ya hay una tarea activa con el mismo nombre se cancela.
+        :param nombre: str - Nombre de la tarea, normalmente el de la pestaña.
+        :param trabajo: function - Función que recibe la Tarea y devuelve el resultado. Se ejecuta en otro hilo.
+        :param al_terminar: function - Recibe el resultado en el hilo de Tk.
+        :param al_error: function - Recibe la excepción en el hilo de Tk.
+        :param al_progreso: function - Recibe (hechos, total) en el hilo de Tk.
+        :param al_finalizar: function - Se llama en el hilo de Tk al acabar la tarea de cualquier forma.
+        :return: Tarea - La tarea lanzada.
+        '''
+        self.cancelar(nombre)
+        tarea = Tarea(nombre, self._mensajes)
+        self._activas[nombre] = tarea
+        self._callbacks[tarea] = (al_terminar, al_error, al_progreso, al_finalizar)
+        self._trabajos.put((tarea, trabajo))
+        return tarea
+
+    def cancelar(self, nombre):
+        '''
+        Cancela la tarea activa con el nombre indicado, si la hay.
+        :param nombre: str - Nombre de la tarea.
+        :return: None
+        '''
+        tarea = self._activas.pop(nombre, None)
+        if tarea is not None:
+            tarea.cancelar()
+            _, _, _, al_finalizar = self._callbacks.pop(tarea)
+            if al_finalizar:
+                al_finalizar()
+
+    def activa(self, nombre):
+        '''
+        :param nombre: str - Nombre de la tarea.
+        :return: bool - True si hay una tarea en curso con ese nombre.
+        '''
+        return nombre in self._activas
+
+    def _trabajador(self):
+        while True:
+            tarea, trabajo = self._trabajos.get()
+            if tarea.cancelada:
+                continue
+            try:
+                self._mensajes.put((tarea, 'resultado', trabajo(tarea)))
+            except TareaCancelada:
+                pass
+            except Exception as e:
+                self._mensajes.put((tarea, 'error', e))
+
+    def _sondear(self):
+        try:
+            while True:
+                tarea, tipo, dato = self._mensajes.get_nowait()
+                # Los mensajes de tareas canceladas o sustituidas se descartan
+                if tarea.cancelada or tarea not in self._callbacks:
+                    continue
+                al_terminar, al_error, al_progreso, al_finalizar = self._callbacks[tarea]
+                if tipo == 'progreso':
+                    if al_progreso:
+                        al_progreso(*dato)
+                    continue
+                del self._callbacks[tarea]
+                del self._activas[tarea.nombre]
+                try:
+                    if al_finalizar:
+                        al_finalizar()
+                    if tipo == 'resultado':
+                        al_terminar(dato)
+                    elif al_error:
+                        al_error(dato)
+                    else:
+                        messagebox.showerror("Error", str(dato))
+                except Exception as e:
+                    messagebox.showerror("Error", str(e))
+        except queue.Empty:
+            pass
+        self.raiz.after(self.intervalo, self._sondear)
+
+
+class PanelTarea:
+    '''
+    Indicador de progreso y botón de cancelar de una pestaña, asociados a una tarea del ejecutor.
+    '''
+
+    def __init__(self, padre, ejecutor, nombre):
+        '''
+        :param padre: tk.Widget - Frame donde se colocan el indicador y el botón.
+        :param ejecutor: EjecutorTareas - Ejecutor compartido por todas las pestañas.
+        :param nombre: str - Nombre de las tareas de esta pestaña.
+        '''
+        self.ejecutor = ejecutor
+        self.nombre = nombre
+        self.barra = ttk.Progressbar(padre, mode='indeterminate', length=120)
+        self.boton = tk.Button(padre, text="Cancelar", command=self.cancelar, state=tk.DISABLED, bg='#B81212', fg='white', font=("Times New Roman", 10))
+        self.boton.pack(side=tk.RIGHT, padx=5)
+        self.barra.pack(side=tk.RIGHT, padx=5)
+
+    def lanzar(self, trabajo, al_terminar, al_error=None):
+        '''
+        Lanza un trabajo de la pestaña mostrando el progreso hasta que termine o se cancele.
+        :param trabajo: function - Función que recibe la Tarea y devuelve el resultado.
+        :param al_terminar: function - Recibe el resultado en el hilo de Tk.
+        :param al_error: function - Recibe la excepción en el hilo de Tk.
+        :return: Tarea - La tarea lanzada.
+        '''
+        tarea = self.ejecutor.lanzar(self.nombre, trabajo, al_terminar, al_error, self._progreso, self._finalizar)
+        self.barra.configure(mode='indeterminate', value=0)
+        self.barra.start(15)
+        self.boton.configure(state=tk.NORMAL)
+        return tarea
+
+    def cancelar(self):
+        self.ejecutor.cancelar(self.nombre)
+
+    def _progreso(self, hechos, total):
+        if total:
+            self.barra.stop()
+            self.barra.configure(mode='determinate', maximum=total, value=hechos)
+
+    def _finalizar(self):
+        self.barra.stop()
+        self.barra.configure(mode='indeterminate', value=0)
+        self.boton.configure(state=tk.DISABLED)
@@ -0,0 +1,186 @@
+'''
+Tubería de dos etapas para los trabajos por lotes. La etapa de descarga usa varios hilos, que pasan las
+respuestas sin analizar a una cola acotada; la etapa de extracción las analiza con BeautifulSoup,
+feedparser o iterparse en un pool de procesos, de forma que el parseo no compite por el GIL con las
+descargas y escala con el número de núcleos. Las dos colas están acotadas: si el pool no da abasto, los
+hilos de descarga esperan a que haya sitio, y si quien consume los resultados no los pide, no se lanzan
+más extracciones.
+
+    for consulta, resultados, error in procesar('web', urls, hilos=8, procesos=4):
+        ...
+
+Cada fuente define una función de descarga (en un hilo, genera uno o varios contenidos por consulta) y
+una de extracción (en un proceso, convierte un contenido en una lista de registros).
+'''
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import replace
+import Metricas
+
+# Hilos de descarga por defecto
+HILOS_DESCARGA = 8
+# Contenidos pendientes de extraer y extracciones en vuelo por cada proceso del pool
+PENDIENTES_POR_PROCESO = 2
+# Resultados por consulta de PubMed si no se indica un máximo
+MAX_PUBMED = 100
+# Segundos que se espera a las extracciones en vuelo antes de mirar si hay nuevos contenidos descargados
+ESPERA = 0.05
+
+
+def _descargar_pagina(url, max_resultados):
+    import Http
+    respuesta = Http.obtener(url)
+    respuesta.raise_for_status()
+    yield respuesta.content
+
+
+def _descargar_web(url, max_resultados):
+    from Scraper import descargar_web
+    # Como en scrapear_web, se pasan los bytes y su codificación
+    yield descargar_web(url)
+
+
+def _descargar_arxiv(query, max_resultados):
+    from Arxiv import descargar_paginas_arxiv
+    return descargar_paginas_arxiv(query, max_resultados)
+
+
+def _descargar_pubmed(query, max_resultados):
+    from Pubmed import descargar_lotes_pubmed
+    return descargar_lotes_pubmed(query, max_resultados or MAX_PUBMED)
+
+
+def _extraer_web(url, descarga):
+    from Scraper import extraer_web
+    return [extraer_web(url, *descarga)]
+
+
+def _extraer_acm(url, html):
+    from Scraper_ACM import extraer_ACM
+    journal_name, miembros = extraer_ACM(html)
+    return [replace(miembro, revista=journal_name) for miembro in miembros]
+
+
+def _extraer_tnnls(url, html):
+    from Scraper_TNNLS import extraer_TNNLS
+    journal_name, miembros = extraer_TNNLS(html)
+    return [replace(miembro, revista=journal_name) for miembro in miembros]
+
+
+def _extraer_arxiv(query, contenido):
+    from Arxiv import extraer_arxiv
+    return extraer_arxiv(contenido)
+
+
+def _extraer_pubmed(query, contenido):
+    from Pubmed import extraer_pubmed
+    return extraer_pubmed(contenido)
+
+
+# Función de descarga, función de extracción y fuente del índice local de cada tipo de consulta
+FUENTES = {
+    'web': (_descargar_web, _extraer_web, None),
+    'acm': (_descargar_pagina, _extraer_acm, None),
+    'tnnls': (_descargar_pagina, _extraer_tnnls, None),
+    'arxiv': (_descargar_arxiv, _extraer_arxiv, 'arxiv'),
+    'pubmed': (_descargar_pubmed, _extraer_pubmed, 'pubmed'),
+}
+
+# Marca que deja cada hilo de descarga en la cola al terminar
+_FIN = None
+
+
+@Metricas.medido()
+def procesar(fuente, consultas, max_resultados=None, hilos=HILOS_DESCARGA, procesos=None, max_pendientes=None):
+    '''
+    Ejecuta las consultas de una fuente con la descarga en hilos y la extracción en un pool de procesos.
+    Los resultados de arXiv y PubMed se guardan en el índice local, como en sus scrapers.
+    :param fuente: str - Tipo de consulta, una de FUENTES.
+    :param consultas: iterable - Consultas o URLs. Se van leyendo según quedan hilos de descarga libres.
+    :param max_resultados: int - Número máximo de artículos por consulta de arXiv o PubMed.
+    :param hilos: int - Descargas simultáneas.
+    :param procesos: int - Procesos de extracción. Por defecto uno por núcleo.
+    :param max_pendientes: int - Contenidos descargados que pueden esperar a ser extraídos.
+    :return: generator - Tuplas (consulta, resultados, error) según termina cada contenido: la lista de
+                         registros extraídos y None, o una lista vacía y la excepción si ha fallado.
+                         Una consulta de arXiv o PubMed puede dar varias tuplas, una por página o lote.
+    '''
+    descargar, extraer, fuente_indice = FUENTES[fuente]
+    procesos = max(1, procesos or os.cpu_count() or 1)
+    limite = PENDIENTES_POR_PROCESO * procesos
+    contenidos = queue.Queue(max_pendientes or limite)
+    pendientes = iter(consultas)
+    candado = threading.Lock()
+    parar = threading.Event()
+
+    def poner(elemento):
+        # Espera a que haya sitio en la cola, salvo que se haya dejado de leer la tubería
+        while not parar.is_set():
+            try:
+                contenidos.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def descargador():
+        try:
+            while not parar.is_set():
+                with candado:
+                    consulta = next(pendientes, _FIN)
+                if consulta is _FIN:
+                    return
+                try:
+                    for contenido in descargar(consulta, max_resultados):
+                        if not poner((consulta, contenido, None)):
+                            return
+                except Exception as e:
+                    poner((consulta, None, e))
+        finally:
+            poner(_FIN)
+
+    descargadores = [threading.Thread(target=Metricas.propagar(descargador), daemon=True) for _ in range(max(1, hilos))]
+    for hilo in descargadores:
+        hilo.start()
+    activos = len(descargadores)
+    en_vuelo = {}
+    # Los procesos se crean con spawn: la tubería ya tiene hilos en marcha cuando se lanzan, y es lo que
+    # se usa en Windows
+    ejecutor = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        while activos or en_vuelo:
+            # Pasa al pool los contenidos ya descargados mientras haya sitio. Si no hay ninguna extracción
+            # en vuelo se espera al siguiente contenido; si las hay, solo se toman los que ya estén en la cola
+            while activos and len(en_vuelo) < limite:
+                try:
+                    elemento = contenidos.get(block=not en_vuelo)
+                except queue.Empty:
+                    break
+                if elemento is _FIN:
+                    activos -= 1
+                    continue
+                consulta, contenido, error = elemento
+                if error is not None:
+                    yield consulta, [], error
+                    continue
+                en_vuelo[ejecutor.submit(extraer, consulta, contenido)] = consulta
+            if not en_vuelo:
+                continue
+            terminados, _ = wait(en_vuelo, timeout=ESPERA if activos else None, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                consulta = en_vuelo.pop(futuro)
+                try:
+                    resultados = futuro.result()
+                except Exception as e:
+                    yield consulta, [], e
+                    continue
+                if fuente_indice:
+                    import Indice
+                    resultados = Indice.indexar(fuente_indice, resultados, consulta)
+                yield consulta, resultados, None
+    finally:
+        parar.set()
+        ejecutor.shutdown(wait=True, cancel_futures=True)